@@ -1,32 +1,164 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, g
+import json
 from flask_cors import CORS
 import sys
 import os
+import time
+import uuid
+import threading
 
 # Add the current directory to Python path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from stock_predictor_api import StockPredictorAPI
-
 app = Flask(__name__)
 CORS(app)  # Enable CORS for all domains
 
-# Initialize the predictor
-predictor = StockPredictorAPI()
+from metrics import default_metrics
+from profiling import RequestProfiler, profiler_from_env
+
+# Off unless ML_PROFILE_ON_DEMAND or ML_PROFILE_SAMPLE_EVERY is set
+profiler = profiler_from_env()
+
+HTTP_REQUEST_SECONDS = default_metrics.histogram(
+    "ml_http_request_seconds", "HTTP request latency by route", labelnames=("method", "route"))
+HTTP_RESPONSES = default_metrics.counter(
+    "ml_http_responses_total", "HTTP responses by route and status code", labelnames=("method", "route", "code"))
+
+# The predictor (and its pandas/ML imports) is created on first use so the
+# server starts, and answers /health, without loading them
+_predictor = None
+_predictor_lock = threading.Lock()
+_warm_up_state = {"status": "disabled", "seconds": None}
+
+def get_predictor():
+    """Shared predictor (stateless per request, so it is shared across threads)"""
+    global _predictor
+    if _predictor is None:
+        with _predictor_lock:
+            if _predictor is None:
+                from stock_predictor_api import StockPredictorAPI
+                _predictor = StockPredictorAPI()
+                register_predictor_metrics(_predictor)
+    return _predictor
+
+def register_predictor_metrics(predictor):
+    """Expose the predictor's cache, coalescing, circuit and batching counters on /metrics (read at scrape time)"""
+    cache, registry, flights = predictor.prediction_cache, predictor.model_registry, predictor.single_flight
+    default_metrics.callback("ml_prediction_cache_hits_total", "Prediction cache hits", "counter", lambda: cache.hits)
+    default_metrics.callback("ml_prediction_cache_misses_total", "Prediction cache misses", "counter", lambda: cache.misses)
+    default_metrics.callback("ml_model_cache_hits_total", "Model registry hits", "counter", lambda: registry.hits)
+    default_metrics.callback("ml_model_cache_misses_total", "Model registry loads", "counter", lambda: registry.misses)
+    default_metrics.callback("ml_model_cache_models", "Models held in memory", "gauge", lambda: registry.stats()["cached_models"])
+    default_metrics.callback("ml_coalesced_requests_total", "Requests that shared another request's computation",
+                             "counter", lambda: flights.coalesced)
+    breaker = predictor.circuit_breaker
+    default_metrics.callback("ml_circuit_state", "Market data circuit breaker state (1 for the current state)", "gauge",
+                             lambda: {state: int(breaker.state == state)
+                                      for state in (breaker.CLOSED, breaker.OPEN, breaker.HALF_OPEN)},
+                             labelname="state")
+    if predictor.micro_batcher is not None:
+        default_metrics.register(predictor.micro_batcher.batch_sizes)
+        default_metrics.register(predictor.micro_batcher.queue_depths)
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def record_request(response):
+    # Label by route pattern, not the raw path, so tickers do not multiply the series
+    route = request.url_rule.rule if request.url_rule is not None else "unmatched"
+    started = g.pop("request_started", None)
+    if started is not None:
+        HTTP_REQUEST_SECONDS.observe(time.perf_counter() - started, method=request.method, route=route)
+    HTTP_RESPONSES.inc(method=request.method, route=route, code=str(response.status_code))
+    return response
+
+def start_warm_up(tickers=()):
+    """Preload the predictor, models and a reference window on a background thread"""
+    def run():
+        try:
+            _warm_up_state["seconds"] = round(get_predictor().warm_up(tickers), 3)
+            _warm_up_state["status"] = "ready"
+        except Exception as e:
+            _warm_up_state["status"] = f"failed: {e}"
+    
+    _warm_up_state["status"] = "running"
+    thread = threading.Thread(target=run, name="warm-up", daemon=True)
+    thread.start()
+    return thread
+
+# ML_WARMUP=1 warms up the shared model; ML_WARMUP=AAPL,MSFT also loads those tickers' models
+_warm_up_setting = os.environ.get("ML_WARMUP", "").strip()
+if _warm_up_setting and _warm_up_setting.lower() not in ("0", "false", "no"):
+    start_warm_up([] if _warm_up_setting.lower() in ("1", "true", "yes")
+                  else [t.strip().upper() for t in _warm_up_setting.split(",") if t.strip()])
+
+MAX_BATCH_TICKERS = 200
+# Seconds between keep-alive comments on an idle prediction stream
+STREAM_HEARTBEAT = 15
+# Beyond the 60-day look-back window a recursive forecast is built only on its own outputs
+MAX_HORIZON = 60
+
+def parse_horizon(value):
+    """Validate a horizon parameter; returns (steps or None, error message or None)"""
+    if value is None or value == "":
+        return None, None
+    try:
+        steps = int(value)
+    except (TypeError, ValueError):
+        return None, "Horizon must be an integer"
+    if not 1 <= steps <= MAX_HORIZON:
+        return None, f"Horizon must be between 1 and {MAX_HORIZON}"
+    return steps, None
+
+def request_id():
+    """The caller's X-Request-ID if it looks like an id, otherwise a new one (recorded in profiles for correlation)"""
+    supplied = request.headers.get("X-Request-ID", "")
+    return supplied if RequestProfiler.REQUEST_ID_PATTERN.match(supplied) else uuid.uuid4().hex[:16]
+
+def run_profiled(fn, *args):
+    """Call fn, under the profiler when this request asked for it (X-Profile header or ?profile=) or is sampled"""
+    if not profiler.enabled:
+        return fn(*args), None
+    reason = profiler.should_profile(request.headers.get("X-Profile") or request.args.get("profile"))
+    if reason is None:
+        return fn(*args), None
+    return profiler.profile(request_id(), reason, fn, *args)
+
+def prediction_response(result, profile=None):
+    """JSON response for a prediction, with its cache status (and profile id, if profiled) as headers"""
+    cache_status = result.pop("cache_status", None)
+    response = jsonify(result)
+    if cache_status:
+        response.headers["X-Prediction-Cache"] = cache_status
+    if profile is not None:
+        response.headers["X-Profile-Id"] = profile["profile_id"]
+    return response, (200 if result["success"] else 400)
 
 @app.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
-    return jsonify({"status": "healthy", "service": "ML Stock Predictor API"})
+    return jsonify({"status": "healthy", "service": "ML Stock Predictor API", "warm_up": _warm_up_state})
+
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """Prometheus scrape endpoint"""
+    return Response(default_metrics.render(), mimetype="text/plain; version=0.0.4")
 
 @app.route('/status', methods=['GET'])
 def yahoo_finance_status():
     """Check Yahoo Finance API status"""
     try:
-        status = predictor.get_yahoo_finance_status()
+        status = get_predictor().get_yahoo_finance_status()
         return jsonify({
             "yahoo_finance": status,
             "mock_data_available": True,
+            "model_cache": get_predictor().model_registry.stats(),
+            "request_coalescing": get_predictor().single_flight.stats(),
+            "prediction_cache": get_predictor().prediction_cache.stats(),
+            "micro_batching": get_predictor().micro_batcher.stats() if get_predictor().micro_batcher else None,
+            "profiling": profiler.stats() if profiler.enabled else None,
             "service": "ML Stock Predictor API"
         })
     except Exception as e:
@@ -60,12 +192,54 @@ def predict_stock():
             }), 400
         
         # Make prediction
-        result = predictor.predict_next_day(ticker)
+        result, profile = run_profiled(get_predictor().predict_next_day, ticker)
+        return prediction_response(result, profile)
+            
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": f"Internal server error: {str(e)}"
+        }), 500
+
+@app.route('/predict/batch', methods=['POST'])
+def predict_stock_batch():
+    """Predict next day prices for many tickers in one batched model call"""
+    try:
+        data = request.get_json()
+        
+        if not data or not isinstance(data.get('tickers'), list):
+            return jsonify({
+                "success": False,
+                "error": "Missing 'tickers' list in request body"
+            }), 400
+        
+        tickers = [str(t).strip().upper() for t in data['tickers'] if str(t).strip()]
         
-        if result["success"]:
-            return jsonify(result), 200
+        if not tickers:
+            return jsonify({
+                "success": False,
+                "error": "Ticker list cannot be empty"
+            }), 400
+        
+        if len(tickers) > MAX_BATCH_TICKERS:
+            return jsonify({
+                "success": False,
+                "error": f"Too many tickers (max {MAX_BATCH_TICKERS})"
+            }), 400
+        
+        horizon, error = parse_horizon(data.get('horizon'))
+        if error:
+            return jsonify({"success": False, "error": error}), 400
+        
+        if horizon is None:
+            result = get_predictor().predict_many(tickers)
         else:
-            return jsonify(result), 400
+            result = get_predictor().predict_horizon_many(tickers, horizon)
+        
+        # Partial failures are reported per ticker; only an all-failed batch is an error
+        response = jsonify(result)
+        response.headers["X-Prediction-Cache-Hits"] = str(result["cache_hits"])
+        return response, (200 if result["success"] else 400)
             
     except Exception as e:
         return jsonify({
@@ -73,16 +247,122 @@ def predict_stock():
             "error": f"Internal server error: {str(e)}"
         }), 500
 
+def sse_event(event, data, event_id=None):
+    """One server-sent event with a JSON payload"""
+    lines = [f"event: {event}"]
+    if event_id:
+        lines.append(f"id: {event_id}")
+    lines.append(f"data: {json.dumps(data)}")
+    return "\n".join(lines) + "\n\n"
+
+@app.route('/predict/stream', methods=['GET'])
+def predict_stock_stream():
+    """Stream next day predictions for ?tickers=A,B,C as server-sent events, each as soon as it is ready"""
+    tickers = list(dict.fromkeys(t.strip().upper() for t in request.args.get('tickers', '').split(',') if t.strip()))
+    
+    if not tickers:
+        return jsonify({
+            "success": False,
+            "error": "Missing 'tickers' query parameter"
+        }), 400
+    
+    if len(tickers) > MAX_BATCH_TICKERS:
+        return jsonify({
+            "success": False,
+            "error": f"Too many tickers (max {MAX_BATCH_TICKERS})"
+        }), 400
+    
+    def events():
+        results = get_predictor().predict_stream(tickers, heartbeat=STREAM_HEARTBEAT)
+        succeeded = failed = cache_hits = 0
+        try:
+            for result in results:
+                if result is None:
+                    # Keeps proxies from timing out the stream, and notices a departed client
+                    yield ": keep-alive\n\n"
+                    continue
+                cache_status = result.pop("cache_status", None)
+                cache_hits += cache_status == "HIT"
+                succeeded += result["success"]
+                failed += not result["success"]
+                yield sse_event("prediction", dict(result, cache_status=cache_status), result["ticker"])
+            yield sse_event("done", {"count": len(tickers), "succeeded": succeeded, "failed": failed,
+                                     "cache_hits": cache_hits})
+        finally:
+            # Runs when the client disconnects too: stops the tickers not yet started
+            results.close()
+    
+    return Response(events(), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
 @app.route('/predict/<ticker>', methods=['GET'])
 def predict_stock_get(ticker):
-    """Predict stock price using GET method"""
+    """Predict stock price using GET method (?horizon=N for an N-day path)"""
+    try:
+        horizon, error = parse_horizon(request.args.get('horizon'))
+        if error:
+            return jsonify({"success": False, "error": error}), 400
+        
+        if horizon is None:
+            result, profile = run_profiled(get_predictor().predict_next_day, ticker)
+        else:
+            result, profile = run_profiled(get_predictor().predict_horizon, ticker, horizon)
+        return prediction_response(result, profile)
+            
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": f"Internal server error: {str(e)}"
+        }), 500
+
+@app.route('/profiles/<profile_id>', methods=['GET'])
+def profile_summary(profile_id):
+    """Summary of a stored request profile (the .prof file next to it loads with pstats/snakeviz)"""
+    summary = profiler.load(profile_id) if profiler.enabled else None
+    
+    if summary is None:
+        return jsonify({
+            "success": False,
+            "error": f"Unknown profile '{profile_id}'"
+        }), 404
+    
+    return jsonify({"success": True, "profile": summary}), 200
+
+@app.route('/training', methods=['POST'])
+def queue_training():
+    """Queue background training of dedicated models for a ticker or a list of tickers"""
     try:
-        result = predictor.predict_next_day(ticker)
+        data = request.get_json(silent=True) or {}
         
-        if result["success"]:
-            return jsonify(result), 200
+        if isinstance(data.get('tickers'), list):
+            tickers = [str(t).strip().upper() for t in data['tickers'] if str(t).strip()]
+        elif str(data.get('ticker', '')).strip():
+            tickers = [str(data['ticker']).strip().upper()]
         else:
-            return jsonify(result), 400
+            return jsonify({
+                "success": False,
+                "error": "Missing 'ticker' or 'tickers' list in request body"
+            }), 400
+        
+        if not tickers:
+            return jsonify({
+                "success": False,
+                "error": "Ticker list cannot be empty"
+            }), 400
+        
+        if len(tickers) > MAX_BATCH_TICKERS:
+            return jsonify({
+                "success": False,
+                "error": f"Too many tickers (max {MAX_BATCH_TICKERS})"
+            }), 400
+        
+        training_queue = get_predictor().training_queue
+        # An explicit request retries a recently failed ticker right away
+        jobs = [training_queue.get(training_queue.submit(ticker, force=True)) for ticker in dict.fromkeys(tickers)]
+        body = {"success": True, "jobs": jobs}
+        if 'tickers' not in data:
+            body["job"] = jobs[0]
+        return jsonify(body), 202
             
     except Exception as e:
         return jsonify({
@@ -90,14 +370,35 @@ def predict_stock_get(ticker):
             "error": f"Internal server error: {str(e)}"
         }), 500
 
+@app.route('/training/<job_id>', methods=['GET'])
+def training_status(job_id):
+    """Status of a background training job"""
+    job = get_predictor().training_queue.get(job_id)
+    
+    if job is None:
+        return jsonify({
+            "success": False,
+            "error": f"Unknown training job '{job_id}'"
+        }), 404
+    
+    return jsonify({"success": True, "job": job}), 200
+
 if __name__ == '__main__':
     print("Starting ML Stock Predictor API Server...")
     print("Available endpoints:")
     print("  GET  /health")
+    print("  GET  /metrics")
     print("  POST /predict")
-    print("  GET  /predict/<ticker>")
+    print("  POST /predict/batch")
+    print("  GET  /predict/<ticker>[?horizon=N]")
+    print("  GET  /predict/stream?tickers=AAPL,MSFT")
+    print("  GET  /profiles/<profile_id>")
+    print("  POST /training")
+    print("  GET  /training/<job_id>")
     print("\nExample usage:")
     print("  curl -X POST http://localhost:5000/predict -H 'Content-Type: application/json' -d '{\"ticker\": \"AAPL\"}'")
     print("  curl http://localhost:5000/predict/AAPL")
+    print("  curl http://localhost:5000/predict/AAPL?horizon=10")
+    print("  curl -N 'http://localhost:5000/predict/stream?tickers=AAPL,MSFT,TSLA'")
     
-    app.run(debug=True, host='0.0.0.0', port=5000)
+    app.run(debug=True, host='0.0.0.0', port=5000, threaded=True)
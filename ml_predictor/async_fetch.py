@@ -0,0 +1,109 @@
+import random
+import asyncio
+
+from circuit_breaker import CircuitBreaker, classify_error
+from metrics import FETCH_RETRIES, FETCH_SKIPPED, PROVIDER_ERRORS
+
+
+class AsyncProviderSource:
+    """Async adapter for a synchronous provider (YahooFinanceProvider, MockStockDataProvider, ...)
+
+    Each download runs the provider's own download() in a worker thread, so
+    the batch path uses the same HTTP stack (and proxy settings) as single
+    requests.
+    """
+    def __init__(self, provider):
+        self.provider = provider
+        self.is_remote = getattr(provider, "is_remote", False)
+
+    async def download(self, ticker, start_date, end_date):
+        return await asyncio.to_thread(self.provider.download, ticker, start_date, end_date)
+
+
+class AsyncFetcher:
+    """Fetches many tickers concurrently under a concurrency limit and a shared call budget
+
+    At most max_concurrency downloads are in flight. Every attempt against a
+    remote source spends a token from rate_limiter (waiting up to
+    max_rate_wait seconds for one) and is reported to circuit_breaker.
+    Failed attempts back off exponentially with asyncio.sleep, so waiting
+    tickers hold neither a thread nor a concurrency slot.
+    Create one fetcher per event loop.
+    """
+    def __init__(self, source, max_concurrency=8, rate_limiter=None, max_rate_wait=0.0,
+                 circuit_breaker=None, max_retries=4, base_delay=2.0):
+        self.source = source
+        self.rate_limiter = rate_limiter
+        self.max_rate_wait = max_rate_wait
+        self.circuit_breaker = circuit_breaker
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.attempts = 0
+
+    async def _acquire_budget(self):
+        if self.rate_limiter is None or not self.source.is_remote:
+            return True
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + (self.max_rate_wait or 0.0)
+        while True:
+            acquired, wait = self.rate_limiter.try_acquire()
+            if acquired:
+                return True
+            if loop.time() + wait > deadline:
+                return False
+            await asyncio.sleep(wait)
+
+    async def fetch(self, ticker, start_date, end_date, min_rows=0):
+        """Download one ticker with retries; raises the last error if every attempt fails"""
+        last_error = None
+        for attempt in range(self.max_retries):
+            if attempt > 0:
+                FETCH_RETRIES.inc()
+                await asyncio.sleep(self.base_delay * (2 ** attempt) + random.uniform(0, self.base_delay))
+            if self.circuit_breaker is not None and not self.circuit_breaker.allow_request():
+                FETCH_SKIPPED.inc(reason="circuit_open")
+                raise RuntimeError(f"Circuit is open; not fetching {ticker}") from last_error
+            if not await self._acquire_budget():
+                FETCH_SKIPPED.inc(reason="rate_budget")
+                # No call is made, so hand a claimed half-open trial back
+                if self.circuit_breaker is not None:
+                    self.circuit_breaker.release_trial()
+                raise RuntimeError(f"Call budget exhausted; not fetching {ticker}") from last_error
+
+            async with self._semaphore:
+                self.attempts += 1
+                try:
+                    data = await self.source.download(ticker, start_date, end_date)
+                except Exception as e:
+                    last_error = e
+                    kind = classify_error(e)
+                    PROVIDER_ERRORS.inc(kind=kind)
+                    if self.circuit_breaker is not None:
+                        self.circuit_breaker.record_failure(e)
+                        if self.circuit_breaker.state == CircuitBreaker.OPEN:
+                            break
+                    continue
+
+            if self.circuit_breaker is not None:
+                self.circuit_breaker.record_success()
+            if data is not None and len(data) >= min_rows:
+                return data
+            last_error = RuntimeError(f"Only {0 if data is None else len(data)} bars returned for {ticker}")
+        raise last_error
+
+    async def fetch_many(self, requests):
+        """requests: {ticker: (start_date, end_date, min_rows)}; returns {ticker: DataFrame or Exception}"""
+        tickers = list(requests)
+        results = await asyncio.gather(
+            *(self.fetch(ticker, *requests[ticker]) for ticker in tickers), return_exceptions=True
+        )
+        return dict(zip(tickers, results))
+
+
+def fetch_universe(requests, provider, max_concurrency=8, **fetcher_kwargs):
+    """Synchronous entry point: fetch {ticker: (start, end, min_rows)} concurrently from provider"""
+    async def run():
+        fetcher = AsyncFetcher(AsyncProviderSource(provider), max_concurrency=max_concurrency, **fetcher_kwargs)
+        return await fetcher.fetch_many(requests)
+    return asyncio.run(run())
@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Vectorized walk-forward backtest of the next-day predictor
+
+For every ticker and every historical day with enough history, the model
+predicts the next close from the trailing 60-day window, scaled as serving
+would scale it with no look-ahead. Stored tickers are tested with their own
+published model and its training scaler, widened by each later bar as
+serving does (see scaling.py). A single --model, or the synthetic universe,
+is scaled over the trailing year like the shared and naive fallbacks. All
+(ticker, day) windows go through the model as large batches, and MAE, RMSE,
+directional accuracy and a naive long/short PnL are computed per ticker.
+
+Usage:
+    python backtest.py --synthetic 1000 --days 2520 [--model stock_model.h5]
+    python backtest.py AAPL MSFT --data-dir market_data --models-dir models [--json]
+    python backtest.py AAPL MSFT --model naive
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+METRICS = ["mae", "rmse", "naive_mae", "directional_accuracy", "strategy_return", "buy_and_hold_return"]
+
+
+def rolling_min_max(values, window):
+    """Trailing rolling min and max along the last axis (NaN until the window is full)
+
+    Uses the van Herk/Gil-Werman block scan, so the cost is O(T) per row
+    whatever the window length.
+    """
+    values = np.atleast_2d(np.asarray(values, dtype=float))
+    rows, length = values.shape
+    out_min = np.full(values.shape, np.nan)
+    out_max = np.full(values.shape, np.nan)
+    if length < window:
+        return out_min, out_max
+
+    pad = (-length) % window
+    ends = np.arange(window - 1, length)
+    for ufunc, fill, out in ((np.minimum, np.inf, out_min), (np.maximum, -np.inf, out_max)):
+        blocks = np.concatenate([values, np.full((rows, pad), fill)], axis=1).reshape(rows, -1, window)
+        prefix = ufunc.accumulate(blocks, axis=2).reshape(rows, -1)
+        suffix = ufunc.accumulate(blocks[:, :, ::-1], axis=2)[:, :, ::-1].reshape(rows, -1)
+        # The window ending at i starts at i - window + 1; the two partial blocks cover it exactly
+        out[:, window - 1:] = ufunc(suffix[:, ends - window + 1], prefix[:, ends])
+    return out_min, out_max
+
+
+def forecast_metrics(current, predicted, actual):
+    """Per-row accuracy and PnL metrics for (N, S) arrays of prices"""
+    errors = predicted - actual
+    # Moves within float32 round-off of the scaled model input/output count as "no change"
+    predicted_move = np.where(np.abs(predicted - current) > 1e-6 * current, np.sign(predicted - current), 0.0)
+    actual_move = np.sign(actual - current)
+    daily_return = actual / current - 1
+    # Naive strategy: long when the model predicts a rise, short when it predicts a fall.
+    # A day losing 100% or more (a short through a doubling) wipes the strategy out.
+    gross = 1 + predicted_move * daily_return
+    wiped_out = (gross <= 0).any(axis=1)
+    compounded = np.expm1(np.log(np.where(gross > 0, gross, 1.0)).sum(axis=1))
+    return {
+        "mae": np.abs(errors).mean(axis=1),
+        "rmse": np.sqrt((errors ** 2).mean(axis=1)),
+        "naive_mae": np.abs(actual - current).mean(axis=1),
+        "directional_accuracy": (predicted_move == actual_move).mean(axis=1),
+        "strategy_return": np.where(wiped_out, -1.0, compounded),
+        "buy_and_hold_return": actual[:, -1] / current[:, 0] - 1,
+    }
+
+
+class WalkForwardBacktest:
+    """Walk-forward next-day predictions over an (N, T) block of closes, as batched inference
+
+    With a scaler (a MinMaxState, as saved with a published model) each day is
+    scaled by that range widened with every close up to the day; without one,
+    by the trailing scale_window closes.
+    """
+    def __init__(self, model, look_back=60, scale_window=252, batch_size=4096, scaler=None):
+        self.model = model
+        self.look_back = look_back
+        # Fallback models are served scaled over the last 365 calendar days (~252 bars)
+        self.scale_window = scale_window
+        self.batch_size = batch_size
+        self.scaler = scaler
+
+    def _scale_ranges(self, closes):
+        """(first usable day, low, high) with the scaling range in effect on each day"""
+        if self.scaler is None:
+            low, high = rolling_min_max(closes, self.scale_window)
+            return max(self.look_back, self.scale_window) - 1, low, high
+        low = np.minimum(self.scaler.data_min, np.minimum.accumulate(closes, axis=1))
+        high = np.maximum(self.scaler.data_max, np.maximum.accumulate(closes, axis=1))
+        return self.look_back - 1, low, high
+
+    def predict_block(self, closes):
+        """Predicted next closes for every usable day; returns (days, predictions of shape (N, S))"""
+        closes = np.atleast_2d(np.asarray(closes, dtype=float))
+        first, low, high = self._scale_ranges(closes)
+        days = np.arange(first, closes.shape[1] - 1)
+        if len(days) == 0:
+            raise ValueError(f"Need more than {first + 1} days of history per ticker")
+
+        span = np.where(high > low, high - low, 1.0)  # MinMaxScaler treats constant input the same way
+        windows = sliding_window_view(closes, self.look_back, axis=1)  # windows[:, d - look_back + 1] ends on day d
+
+        predictions = np.empty((len(closes), len(days)))
+        total = predictions.size
+        for start in range(0, total, self.batch_size):
+            rows, cols = np.divmod(np.arange(start, min(start + self.batch_size, total)), len(days))
+            day = days[cols]
+            row_low, row_span = low[rows, day][:, None], span[rows, day][:, None]
+            X = ((windows[rows, day - self.look_back + 1] - row_low) / row_span).astype(np.float32)
+            predicted_scaled = np.asarray(self.model.predict(X[..., None], verbose=0))[:, 0]
+            predictions[rows, cols] = predicted_scaled * row_span[:, 0] + row_low[:, 0]
+        return days, predictions
+
+    def run(self, closes):
+        """Backtest one block; returns {metric: (N,) array} plus sample count"""
+        closes = np.atleast_2d(np.asarray(closes, dtype=float))
+        days, predictions = self.predict_block(closes)
+        metrics = forecast_metrics(closes[:, days], predictions, closes[:, days + 1])
+        metrics["samples"] = np.full(len(closes), len(days))
+        return metrics
+
+    def run_chunks(self, chunks):
+        """Backtest (tickers, closes) chunks, e.g. slices of a large memmap; returns a report"""
+        started = time.time()
+        tickers, parts = [], []
+        for chunk_tickers, closes in chunks:
+            tickers += list(chunk_tickers)
+            parts.append(self.run(closes))
+        return combine_parts(tickers, parts, time.time() - started)
+
+
+def run_published(store, artifacts, tickers, days, look_back=60, batch_size=4096, registry=None):
+    """Backtest each stored ticker with its newest published model and that version's training scaler"""
+    from scaling import MinMaxState
+    if registry is None:
+        from model_registry import default_registry as registry
+
+    started = time.time()
+    kept, parts = [], []
+    for ticker in tickers:
+        version, path = artifacts.latest(ticker)
+        if version is None:
+            print(f"⚠ Skipping {ticker}: no published model")
+            continue
+        for chunk_tickers, closes in store_chunks(store, [ticker], days):
+            # The training scaler, not the serving one, which has already seen every later bar
+            saved = artifacts.metadata(ticker, version).get("scaler") or artifacts.scaler(ticker, version)
+            scaler = MinMaxState.from_dict(saved) if saved else MinMaxState()
+            backtest = WalkForwardBacktest(registry.get(path), look_back=look_back, batch_size=batch_size, scaler=scaler)
+            kept += list(chunk_tickers)
+            parts.append(backtest.run(closes))
+    return combine_parts(kept, parts, time.time() - started)
+
+
+def combine_parts(tickers, parts, seconds):
+    if not parts:
+        raise ValueError("No tickers to backtest")
+    metrics = {key: np.concatenate([part[key] for part in parts]) for key in parts[0]}
+    return build_report(tickers, metrics, seconds)
+
+
+def build_report(tickers, metrics, seconds):
+    """Per-ticker metrics plus averages across tickers and throughput"""
+    samples = int(metrics["samples"].sum())
+    return {
+        "tickers": len(tickers),
+        "samples": samples,
+        "seconds": round(seconds, 3),
+        "predictions_per_second": round(samples / seconds, 1) if seconds > 0 else None,
+        "mean": {key: float(np.mean(metrics[key])) for key in METRICS},
+        "per_ticker": {
+            ticker: {key: float(metrics[key][i]) for key in METRICS + ["samples"]}
+            for i, ticker in enumerate(tickers)
+        },
+    }
+
+
+def synthetic_chunks(market, chunk_size=500):
+    """Yield (tickers, closes) blocks of a SyntheticMarket so the universe never sits in memory at once"""
+    for start in range(0, len(market.tickers), chunk_size):
+        tickers = market.tickers[start:start + chunk_size]
+        yield tickers, market.close_block(tickers)
+
+
+def store_chunks(store, tickers, days):
+    """Yield one (tickers, closes) block of each ticker's last `days` stored closes (shorter histories are skipped)"""
+    kept, rows = [], []
+    for ticker in tickers:
+        closes = store.column(ticker, 'Close') if store.has(ticker) else None
+        if closes is None or len(closes) < days:
+            print(f"⚠ Skipping {ticker}: fewer than {days} stored days")
+            continue
+        kept.append(ticker.upper())
+        rows.append(np.asarray(closes[-days:], dtype=float))
+    if kept:
+        yield kept, np.stack(rows)
+
+
+def load_model(path):
+    """Keras .h5 or NumPy .npz model via the model registry loader; the naive last-price model for "naive" or no path"""
+    if not path or path == "naive":
+        from stock_predictor_api import LastValueModel
+        return LastValueModel()
+    from model_registry import default_registry
+    return default_registry.get(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Walk-forward backtest of next-day predictions")
+    parser.add_argument("tickers", nargs="*", help="Tickers to backtest from the local data store")
+    parser.add_argument("--data-dir", default="market_data", help="Local OHLCV store directory")
+    parser.add_argument("--models-dir", default="models", help="Published per-ticker models, used for stored tickers")
+    parser.add_argument("--synthetic", type=int, default=0, help="Backtest N synthetic tickers instead (offline)")
+    parser.add_argument("--days", type=int, default=756, help="Days of history per ticker")
+    parser.add_argument("--seed", type=int, default=0, help="Synthetic market seed")
+    parser.add_argument("--model", default="",
+                        help="One model (.h5, .npz or 'naive') for every ticker "
+                             "(default: each stored ticker's published model; naive for --synthetic)")
+    parser.add_argument("--look-back", type=int, default=60, help="Days per input window")
+    parser.add_argument("--batch-size", type=int, default=4096, help="Windows per forward pass")
+    parser.add_argument("--chunk-size", type=int, default=500, help="Synthetic tickers generated at a time")
+    parser.add_argument("--json", action="store_true", help="Print the full report as JSON")
+    args = parser.parse_args()
+
+    if args.synthetic:
+        from mock_data_provider import SyntheticMarket
+        market = SyntheticMarket([f"SYN{i:05d}" for i in range(args.synthetic)], days=args.days, seed=args.seed)
+        chunks = synthetic_chunks(market, args.chunk_size)
+    elif args.tickers:
+        from data_store import OHLCVStore
+        store = OHLCVStore(args.data_dir)
+        chunks = store_chunks(store, args.tickers, args.days)
+    else:
+        parser.error("give tickers or --synthetic N")
+
+    if args.model or args.synthetic:
+        model_name = args.model or "naive (last price)"
+        backtest = WalkForwardBacktest(load_model(args.model), look_back=args.look_back, batch_size=args.batch_size)
+        report = backtest.run_chunks(chunks)
+    else:
+        from model_registry import ModelArtifacts
+        model_name = f"published models in {args.models_dir}"
+        report = run_published(store, ModelArtifacts(args.models_dir), args.tickers, args.days,
+                               look_back=args.look_back, batch_size=args.batch_size)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print("=" * 60)
+    print("WALK-FORWARD BACKTEST")
+    print(f"Model: {model_name} | {report['tickers']} tickers, "
+          f"{report['samples']} predictions in {report['seconds']:.1f}s "
+          f"({report['predictions_per_second']:.0f}/s)")
+    print("=" * 60)
+    for key, value in report["mean"].items():
+        print(f"  {key:<22} {value:12.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark of the prediction pipeline stages
+
+Times each stage of predict_next_day (fetch, indicators, data preparation,
+model load, model.predict) for a single ticker, batch throughput of
+predict_many, and cold versus warm start (via benchmark_startup), with the
+memory high-water mark after each section. Everything runs on
+MockStockDataProvider data in a temporary directory, so no network is used.
+
+Results are JSON so runs can be compared across commits:
+    python benchmark_pipeline.py --output before.json
+    python benchmark_pipeline.py --compare before.json
+
+Usage:
+    python benchmark_pipeline.py [--model stock_model.h5] [--iterations 30] [--batch-size 100]
+                                 [--startup-runs 1] [--output results.json] [--compare baseline.json]
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import resource
+import tempfile
+import statistics
+import contextlib
+import subprocess
+import datetime as dt
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(HERE)
+
+
+def max_rss_mb():
+    """Peak resident set size of this process so far (ru_maxrss is KB on Linux, bytes on macOS)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def summarize(samples):
+    """Latency statistics in milliseconds"""
+    ordered = sorted(samples)
+    return {
+        "runs": len(ordered),
+        "median_ms": round(statistics.median(ordered) * 1000, 3),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))] * 1000, 3),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 3),
+        "min_ms": round(ordered[0] * 1000, 3),
+    }
+
+
+def timed(fn, *args):
+    started = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - started
+
+
+def make_predictor(tmp_dir, model_path, seed):
+    """Offline predictor: seeded mock data, temp store and artifacts, no prediction cache"""
+    from stock_predictor_api import StockPredictorAPI
+    from mock_data_provider import MockStockDataProvider
+    from data_store import OHLCVStore
+    from model_registry import ModelArtifacts, ModelRegistry
+    from prediction_cache import PredictionCache
+
+    predictor = StockPredictorAPI(
+        provider=MockStockDataProvider(seed=seed),
+        data_store=OHLCVStore(os.path.join(tmp_dir, "market_data")),
+        model_registry=ModelRegistry(),
+        model_artifacts=ModelArtifacts(os.path.join(tmp_dir, "models")),
+        train_in_background=False,
+        prediction_cache=PredictionCache(ttl=0),
+    )
+    predictor.model_path = model_path or os.path.join(tmp_dir, "missing.h5")
+    return predictor
+
+
+def bench_stages(predictor, iterations):
+    """Per-stage latency for one ticker: cold fetches hit the provider, warm ones the local store"""
+    from stock_predictor_api import PredictionContext
+
+    stages = {name: [] for name in ("fetch_cold", "fetch_warm", "indicators_cold", "indicators_warm",
+                                    "prepare", "model_load", "model_lookup", "predict", "predict_next_day")}
+
+    # Cold: a new ticker each time, so the provider is called and the indicator state is built
+    for i in range(iterations):
+        ctx = PredictionContext(f"BENCH{i:03d}")
+        _, seconds = timed(predictor.fetch_data, ctx)
+        stages["fetch_cold"].append(seconds)
+        _, seconds = timed(predictor.add_technical_indicators, ctx)
+        stages["indicators_cold"].append(seconds)
+
+    # Model load: deserializing the model file into an empty registry
+    if os.path.exists(predictor.model_path):
+        for _ in range(min(iterations, 5)):
+            predictor.model_registry.invalidate(predictor.model_path)
+            _, seconds = timed(predictor.model_registry.get, predictor.model_path)
+            stages["model_load"].append(seconds)
+
+    # Warm: the same ticker again, as a server sees repeat requests. One untimed pass
+    # first, so lazy imports are not charged to a stage
+    predictor.predict_next_day("BENCH000")
+    for _ in range(iterations):
+        ctx = PredictionContext("BENCH000")
+        _, seconds = timed(predictor.fetch_data, ctx)
+        stages["fetch_warm"].append(seconds)
+        _, seconds = timed(predictor.add_technical_indicators, ctx)
+        stages["indicators_warm"].append(seconds)
+        X, seconds = timed(predictor.prepare_data_for_prediction, ctx)
+        stages["prepare"].append(seconds)
+        model, seconds = timed(predictor.build_and_train_model, ctx)
+        stages["model_lookup"].append(seconds)
+        _, seconds = timed(lambda: model.predict(X, verbose=0))
+        stages["predict"].append(seconds)
+        result, seconds = timed(predictor.predict_next_day, "BENCH000")
+        stages["predict_next_day"].append(seconds)
+        assert result["success"], result
+
+    return {name: summarize(samples) for name, samples in stages.items() if samples}
+
+
+def bench_batch(predictor, batch_size, rounds=3):
+    """predict_many throughput over batch_size tickers (stored data, so this measures the pipeline)"""
+    tickers = [f"BATCH{i:04d}" for i in range(batch_size)]
+    result, first = timed(predictor.predict_many, tickers)  # also stores the histories
+    assert result["succeeded"] == batch_size, result
+    samples = [timed(predictor.predict_many, tickers)[1] for _ in range(rounds)]
+    median = statistics.median(samples)
+    return {
+        "tickers": batch_size,
+        "first_batch_ms": round(first * 1000, 3),
+        "batch": summarize(samples),
+        "tickers_per_second": round(batch_size / median, 1),
+    }
+
+
+def bench_startup(model_path, runs):
+    """Cold versus warm start in fresh processes (see benchmark_startup.py)"""
+    from benchmark_startup import run_once, summarize as summarize_startup
+    results = {}
+    for scenario, warm_up in (("cold", False), ("warm_up", True)):
+        timings = summarize_startup([run_once(model_path, warm_up) for _ in range(runs)])
+        results[scenario] = {key: round(value * 1000, 3) for key, value in timings.items()}
+    return results
+
+
+def environment():
+    """Versions and commit, so results from different runs can be told apart"""
+    import numpy as np
+    import pandas as pd
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=HERE, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        "commit": commit,
+        "timestamp": dt.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def run_benchmarks(model_path="", iterations=30, batch_size=100, startup_runs=1, seed=0):
+    results = {"parameters": {"model": model_path or None, "iterations": iterations,
+                              "batch_size": batch_size, "startup_runs": startup_runs, "seed": seed}}
+    memory = {"baseline_mb": max_rss_mb()}
+
+    with tempfile.TemporaryDirectory() as tmp_dir, contextlib.redirect_stdout(io.StringIO()):
+        predictor, seconds = timed(make_predictor, tmp_dir, model_path, seed)
+        results["import_and_construct_ms"] = round(seconds * 1000, 3)
+        results["single_ticker"] = bench_stages(predictor, iterations)
+        memory["after_single_ticker_mb"] = max_rss_mb()
+        results["batch"] = bench_batch(predictor, batch_size)
+        memory["after_batch_mb"] = max_rss_mb()
+        results["model_version"] = predictor._model_version_key("BENCH000")
+
+    if startup_runs:
+        results["startup"] = bench_startup(model_path, startup_runs)
+    results["memory_high_water"] = memory
+    results["environment"] = environment()
+    return results
+
+
+def flatten(results, prefix=""):
+    """{'a': {'b': 1}} -> {'a.b': 1}, numeric leaves only"""
+    flat = {}
+    for key, value in results.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, f"{name}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+
+def compare(current, baseline):
+    """Relative change of every shared timing/throughput/memory figure"""
+    ignore = ("parameters.", "environment.")
+    now, before = flatten(current), flatten(baseline)
+    changes = {}
+    for key in sorted(set(now) & set(before)):
+        if key.startswith(ignore) or not before[key]:
+            continue
+        changes[key] = {"baseline": before[key], "current": now[key],
+                        "change_pct": round((now[key] - before[key]) / before[key] * 100, 1)}
+    return changes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmark of the prediction pipeline stages")
+    parser.add_argument("--model", default="", help="Keras .h5 model to serve as the shared model (default: naive fallback)")
+    parser.add_argument("--iterations", type=int, default=30, help="Samples per single-ticker stage")
+    parser.add_argument("--batch-size", type=int, default=100, help="Tickers per predict_many batch")
+    parser.add_argument("--startup-runs", type=int, default=1, help="Fresh processes per start-up scenario (0 to skip)")
+    parser.add_argument("--seed", type=int, default=0, help="Mock data seed")
+    parser.add_argument("--output", help="Write the JSON results to this file")
+    parser.add_argument("--compare", help="Baseline JSON results to compare against")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    model_path = os.path.abspath(args.model) if args.model else ""
+    results = run_benchmarks(model_path, args.iterations, args.batch_size, args.startup_runs, args.seed)
+    if args.compare:
+        with open(args.compare) as f:
+            results["comparison"] = compare(results, json.load(f))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print("=" * 60)
+    print("ML STOCK PREDICTOR PIPELINE BENCHMARK")
+    print(f"Model: {model_path or 'none (naive fallback)'} ({results['model_version']}) | "
+          f"commit {results['environment']['commit'] or 'unknown'}")
+    print("=" * 60)
+    print("\n[single ticker]                median        p95")
+    for stage, stats in results["single_ticker"].items():
+        print(f"  {stage:<22} {stats['median_ms']:9.2f} ms {stats['p95_ms']:9.2f} ms")
+    batch = results["batch"]
+    print(f"\n[batch] {batch['tickers']} tickers: {batch['batch']['median_ms']:.1f} ms "
+          f"({batch['tickers_per_second']:.0f} tickers/s)")
+    for scenario, timings in results.get("startup", {}).items():
+        print(f"\n[startup: {scenario}]")
+        for key, value in timings.items():
+            print(f"  {key:<22} {value:9.1f} ms")
+    print("\n[memory high-water]")
+    for key, value in results["memory_high_water"].items():
+        print(f"  {key:<22} {value:9.1f} MB")
+    if args.output:
+        print(f"\n✓ Results written to {args.output}")
+
+    changed = {key: c for key, c in results.get("comparison", {}).items() if abs(c["change_pct"]) >= 10}
+    if args.compare:
+        print(f"\n[vs {args.compare}] {len(changed)} figure(s) changed by 10% or more")
+    for key, change in changed.items():
+        # Throughput should go up; times and memory should go down
+        worse = change["change_pct"] < 0 if key.endswith("per_second") else change["change_pct"] > 0
+        print(f"  {'⚠' if worse else '✓'} {key}: {change['baseline']} -> "
+              f"{change['current']} ({change['change_pct']:+.1f}%)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Startup-time benchmark for the ML Stock Predictor API
+
+Each measurement runs in a fresh Python process so import costs are cold.
+Predictions use the mock data provider, so no network access is needed.
+
+Usage:
+    python benchmark_startup.py [--model stock_model.h5] [--runs 3] [--json]
+"""
+
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Runs in a child process; prints one JSON line of timings
+CHILD_SCRIPT = r'''
+import os, sys, json, time, tempfile
+sys.path.insert(0, {here!r})
+timings = {{}}
+
+t = time.perf_counter()
+import api_server
+timings["import_api_server"] = time.perf_counter() - t
+
+client = api_server.app.test_client()
+t = time.perf_counter()
+client.get("/health")
+timings["first_health"] = time.perf_counter() - t
+
+t = time.perf_counter()
+from stock_predictor_api import StockPredictorAPI
+from mock_data_provider import MockStockDataProvider
+from data_store import OHLCVStore
+from model_registry import ModelArtifacts
+timings["import_predictor"] = time.perf_counter() - t
+
+tmp_dir = tempfile.mkdtemp()
+predictor = StockPredictorAPI(
+    provider=MockStockDataProvider(),
+    data_store=OHLCVStore(os.path.join(tmp_dir, "market_data")),
+    model_artifacts=ModelArtifacts(os.path.join(tmp_dir, "models")),
+    train_in_background=False,
+)
+model_path = {model_path!r}
+predictor.model_path = model_path or os.path.join(tmp_dir, "missing.h5")
+
+if {warm_up!r}:
+    t = time.perf_counter()
+    predictor.warm_up()
+    timings["warm_up"] = time.perf_counter() - t
+
+import contextlib, io
+for label in ("first_prediction", "second_prediction"):
+    t = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = predictor.predict_next_day("AAPL")
+    timings[label] = time.perf_counter() - t
+    assert result["success"], result
+
+timings["model_version"] = result["model_version"]
+print(json.dumps(timings))
+'''
+
+
+def run_once(model_path, warm_up):
+    """Run the child script in a fresh interpreter and return its timings"""
+    code = CHILD_SCRIPT.format(here=HERE, model_path=model_path, warm_up=warm_up)
+    env = dict(os.environ, TF_CPP_MIN_LOG_LEVEL="3", ML_WARMUP="")
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, env=env, cwd=HERE)
+    if output.returncode != 0:
+        raise RuntimeError(output.stderr.strip().splitlines()[-1] if output.stderr else "benchmark child failed")
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def summarize(runs):
+    """Median of each numeric timing across runs"""
+    keys = [k for k, v in runs[0].items() if isinstance(v, float)]
+    return {k: statistics.median(run[k] for run in runs) for k in keys}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure API import and first-prediction latency")
+    parser.add_argument("--model", default="", help="Keras .h5 model to serve as the shared model (default: naive fallback)")
+    parser.add_argument("--runs", type=int, default=3, help="Fresh processes per scenario")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    model_path = os.path.abspath(args.model) if args.model else ""
+    results = {}
+    for scenario, warm_up in (("cold", False), ("warm_up", True)):
+        runs = [run_once(model_path, warm_up) for _ in range(args.runs)]
+        results[scenario] = summarize(runs)
+        results[scenario]["model_version"] = runs[0]["model_version"]
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print("=" * 60)
+    print("ML STOCK PREDICTOR STARTUP BENCHMARK")
+    print(f"Model: {model_path or 'none (naive fallback)'} | runs per scenario: {args.runs} (median)")
+    print("=" * 60)
+    for scenario, timings in results.items():
+        print(f"\n[{scenario}] model_version={timings['model_version']}")
+        for key, value in timings.items():
+            if isinstance(value, float):
+                print(f"  {key:<20} {value * 1000:9.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+import time
+import threading
+
+RATE_LIMIT_TERMS = ["429", "too many requests", "rate limit"]
+NETWORK_TERMS = ["timeout", "timed out", "connection", "network", "resolve"]
+
+
+def classify_error(error):
+    """Map a provider error to 'rate_limited', 'network_error' or 'error'"""
+    error_str = str(error).lower()
+    if any(term in error_str for term in RATE_LIMIT_TERMS):
+        return "rate_limited"
+    if any(term in error_str for term in NETWORK_TERMS):
+        return "network_error"
+    return "error"
+
+
+class CircuitBreaker:
+    """Provider health tracked from real request outcomes (closed / open / half_open)
+
+    closed:    requests flow normally.
+    open:      after failure_threshold consecutive provider failures, requests are
+               refused for recovery_timeout seconds (callers serve stored/mock data).
+    half_open: after the timeout, one trial request is let through; its outcome
+               closes or re-opens the circuit. A caller that claimed the trial
+               but made no call must release_trial().
+
+    Only rate-limit and network errors count as failures; errors such as an
+    unknown ticker say nothing about the provider's health.
+    """
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold=3, recovery_timeout=60, status_ttl=300, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.status_ttl = status_ttl
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+        self._last_success = None
+        self._last_failure = None
+        self._last_failure_kind = None
+        self._last_error = None
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self):
+        if self._state == self.OPEN and self.clock() - self._opened_at >= self.recovery_timeout:
+            self._state = self.HALF_OPEN
+            self._trial_in_flight = False
+        return self._state
+
+    def allow_request(self):
+        """Whether a provider call may be made now (claims the trial slot when half-open)"""
+        with self._lock:
+            state = self._current_state()
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def release_trial(self):
+        """Give back a half-open trial slot claimed by allow_request() when no provider call was made"""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_success(self):
+        with self._lock:
+            self._state = self.CLOSED
+            self._consecutive_failures = 0
+            self._trial_in_flight = False
+            self._last_success = self.clock()
+
+    def record_failure(self, error):
+        """Record a failed provider call; returns the error kind"""
+        kind = classify_error(error)
+        with self._lock:
+            self._trial_in_flight = False
+            if kind == "error":
+                # Not a provider health signal, but let a half-open probe be retried
+                return kind
+
+            self._consecutive_failures += 1
+            self._last_failure = self.clock()
+            self._last_failure_kind = kind
+            self._last_error = str(error)
+            if self._state == self.HALF_OPEN or self._consecutive_failures >= self.failure_threshold:
+                self._state = self.OPEN
+                self._opened_at = self.clock()
+        return kind
+
+    def status(self):
+        """Provider status derived from recorded outcomes; never makes a network call"""
+        with self._lock:
+            state = self._current_state()
+            now = self.clock()
+            info = {
+                "circuit_state": state,
+                "consecutive_failures": self._consecutive_failures,
+                "seconds_since_success": None if self._last_success is None else round(now - self._last_success, 1),
+                "seconds_since_failure": None if self._last_failure is None else round(now - self._last_failure, 1),
+            }
+
+            if state == self.OPEN:
+                retry_in = max(0.0, self.recovery_timeout - (now - self._opened_at))
+                if self._last_failure_kind == "rate_limited":
+                    info.update(status="rate_limited", message="Yahoo Finance API is rate limited (429 error)")
+                else:
+                    info.update(status="network_error", message="Network connectivity issues with Yahoo Finance")
+                info["retry_in_seconds"] = round(retry_in, 1)
+            elif state == self.HALF_OPEN:
+                info.update(status="limited", message="Yahoo Finance API is recovering; probing with a trial request")
+            elif self._last_success is not None and now - self._last_success <= self.status_ttl:
+                info.update(status="working", message="Yahoo Finance API is accessible")
+            elif self._consecutive_failures:
+                info.update(status="limited", message=f"Recent Yahoo Finance errors: {self._last_error}")
+            else:
+                info.update(status="unknown", message="No recent Yahoo Finance requests")
+            return info
+
+
+# Shared by every StockPredictorAPI in the process
+yahoo_finance_breaker = CircuitBreaker()
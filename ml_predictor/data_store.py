@@ -0,0 +1,139 @@
+import os
+import threading
+import datetime as dt
+import numpy as np
+import pandas as pd
+
+OHLCV_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+# On-disk record layout: one row per trading day, sorted by date
+OHLCV_DTYPE = np.dtype([
+    ('Date', 'datetime64[D]'),
+    ('Open', 'f8'),
+    ('High', 'f8'),
+    ('Low', 'f8'),
+    ('Close', 'f8'),
+    ('Volume', 'f8'),
+])
+
+
+class OHLCVStore:
+    """Persistent per-ticker OHLCV history backed by memory-mapped NumPy files"""
+    def __init__(self, root="market_data"):
+        self.root = root
+        self._lock = threading.Lock()
+        # Called with the ticker whenever its stored history changes
+        self.listeners = []
+        os.makedirs(self.root, exist_ok=True)
+
+    def _path(self, ticker):
+        """Return the file path holding the history for a ticker"""
+        safe_name = ticker.upper().replace('/', '_').replace('\\', '_')
+        return os.path.join(self.root, f"{safe_name}.npy")
+
+    def _load(self, ticker):
+        """Memory-map the stored records for a ticker (None if not stored)"""
+        path = self._path(ticker)
+        if not os.path.exists(path):
+            return None
+        return np.load(path, mmap_mode='r')
+
+    def has(self, ticker):
+        """Check whether any history is stored for the ticker"""
+        return os.path.exists(self._path(ticker))
+
+    def last_date(self, ticker):
+        """Return the date of the last stored bar, or None"""
+        records = self._load(ticker)
+        if records is None or len(records) == 0:
+            return None
+        return records['Date'][-1].astype(dt.date)
+
+    def read(self, ticker, start=None, end=None):
+        """Read stored history as a DataFrame indexed by Date"""
+        records = self._load(ticker)
+        if records is None:
+            return None
+
+        lo, hi = self._bounds(records['Date'], start, end)
+        window = records[lo:hi]
+
+        index = pd.DatetimeIndex(window['Date'].astype('datetime64[ns]'), name='Date')
+        return pd.DataFrame({col: np.array(window[col]) for col in OHLCV_COLUMNS}, index=index)
+
+    def column(self, ticker, column='Close', start=None, end=None):
+        """One stored column as a read-only memory-mapped view (None if not stored)"""
+        records = self._load(ticker)
+        if records is None:
+            return None
+        lo, hi = self._bounds(records['Date'], start, end)
+        return records[column][lo:hi]
+
+    def append(self, ticker, df):
+        """Merge new bars into the stored history, replacing overlapping dates"""
+        new_records = self._to_records(df)
+        if len(new_records) == 0:
+            return 0
+
+        with self._lock:
+            existing = self._load(ticker)
+            if existing is not None and len(existing) > 0:
+                keep = ~np.isin(existing['Date'], new_records['Date'])
+                merged = np.concatenate([np.array(existing[keep]), new_records])
+            else:
+                merged = new_records
+            merged = merged[np.argsort(merged['Date'], kind='stable')]
+            del existing
+
+            # Write to a temp file and swap so readers never see a partial file
+            path = self._path(ticker)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                np.save(f, merged)
+            os.replace(tmp_path, path)
+
+        self._notify(ticker)
+        return len(new_records)
+
+    def delete(self, ticker):
+        """Remove the stored history for a ticker"""
+        path = self._path(ticker)
+        if os.path.exists(path):
+            os.remove(path)
+            self._notify(ticker)
+
+    @staticmethod
+    def _bounds(dates, start, end):
+        """Index range of the bars dated within [start, end]"""
+        lo = 0 if start is None else np.searchsorted(dates, np.datetime64(pd.Timestamp(start).date(), 'D'), side='left')
+        hi = len(dates) if end is None else np.searchsorted(dates, np.datetime64(pd.Timestamp(end).date(), 'D'), side='right')
+        return lo, hi
+
+    def _notify(self, ticker):
+        for listener in list(self.listeners):
+            listener(ticker.upper())
+
+    @staticmethod
+    def _to_records(df):
+        """Convert a provider DataFrame into the on-disk record layout"""
+        if df is None or df.empty:
+            return np.empty(0, dtype=OHLCV_DTYPE)
+
+        # yfinance may return (Price, Ticker) MultiIndex columns
+        if isinstance(df.columns, pd.MultiIndex):
+            df = df.copy()
+            df.columns = df.columns.get_level_values(0)
+
+        index = pd.DatetimeIndex(df.index)
+        if index.tz is not None:
+            index = index.tz_localize(None)
+
+        records = np.empty(len(df), dtype=OHLCV_DTYPE)
+        records['Date'] = index.normalize().values.astype('datetime64[D]')
+        for col in OHLCV_COLUMNS:
+            records[col] = df[col].to_numpy(dtype='f8') if col in df.columns else np.nan
+
+        records = records[~np.isnan(records['Close'])]
+        # Keep the last bar when the provider returns duplicate dates
+        _, last_idx = np.unique(records['Date'][::-1], return_index=True)
+        return records[::-1][last_idx]
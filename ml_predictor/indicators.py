@@ -0,0 +1,214 @@
+import threading
+import numpy as np
+
+MA_WINDOWS = (10, 20, 50)
+RSI_WINDOW = 14
+MACD_FAST = 12
+MACD_SLOW = 26
+INDICATOR_COLUMNS = ['MA_10', 'MA_20', 'MA_50', 'RSI', 'MACD']
+
+
+class IndicatorState:
+    """Rolling indicator state for one ticker; update() with a new close is O(1)
+
+    Reproduces the pandas formulas previously used in add_technical_indicators:
+    simple moving averages, RSI from 14-bar rolling means of gains and losses,
+    MACD from adjust=False EMAs, and forward-filling of undefined values.
+    """
+    def __init__(self):
+        self.count = 0
+        self.last_close = None
+        self.last_date = None
+        self._closes = np.zeros(max(MA_WINDOWS))  # ring buffer of recent closes
+        self._ma_sums = {n: 0.0 for n in MA_WINDOWS}
+        self._gains = np.zeros(RSI_WINDOW)
+        self._losses = np.zeros(RSI_WINDOW)
+        self._gain_sum = 0.0
+        self._loss_sum = 0.0
+        self._ema_fast = None
+        self._ema_slow = None
+        self.values = dict.fromkeys(INDICATOR_COLUMNS, np.nan)
+
+    @classmethod
+    def from_closes(cls, closes, dates=None):
+        """State after update() with every close, built in one vectorized pass instead of bar by bar"""
+        closes = np.asarray(closes, dtype=float).ravel()
+        state = cls()
+        count = len(closes)
+        if not count:
+            return state
+
+        recent = np.arange(max(0, count - len(state._closes)), count)
+        state._closes[recent % len(state._closes)] = closes[recent]
+        for n in MA_WINDOWS:
+            state._ma_sums[n] = float(closes[-n:].sum())
+
+        delta = np.diff(closes, prepend=closes[0])
+        recent = np.arange(max(0, count - RSI_WINDOW), count)
+        state._gains[recent % RSI_WINDOW] = np.maximum(delta[recent], 0.0)
+        state._losses[recent % RSI_WINDOW] = np.maximum(-delta[recent], 0.0)
+        state._gain_sum = float(state._gains.sum())
+        state._loss_sum = float(state._losses.sum())
+
+        state._ema_fast = float(_ema(closes[None], 2.0 / (MACD_FAST + 1))[0, -1])
+        state._ema_slow = float(_ema(closes[None], 2.0 / (MACD_SLOW + 1))[0, -1])
+        state.count = count
+        state.last_close = float(closes[-1])
+        state.last_date = None if dates is None else dates[-1]
+        state.values = {key: float(values[-1]) for key, values in compute_indicators(closes).items()}
+        return state
+
+    def update(self, close, date=None):
+        """Add one bar and return the latest indicator values"""
+        close = float(close)
+        buffer_size = len(self._closes)
+        slot = self.count % buffer_size
+
+        # Moving averages: add the new close, drop the one leaving each window
+        for n in MA_WINDOWS:
+            self._ma_sums[n] += close
+            if self.count >= n:
+                self._ma_sums[n] -= self._closes[(self.count - n) % buffer_size]
+        self._closes[slot] = close
+
+        # RSI: the first bar has no change and contributes a zero gain and loss
+        delta = 0.0 if self.last_close is None else close - self.last_close
+        rsi_slot = self.count % RSI_WINDOW
+        self._gain_sum += max(delta, 0.0) - self._gains[rsi_slot]
+        self._loss_sum += max(-delta, 0.0) - self._losses[rsi_slot]
+        self._gains[rsi_slot] = max(delta, 0.0)
+        self._losses[rsi_slot] = max(-delta, 0.0)
+
+        # MACD: EMAs seeded with the first close (pandas ewm(adjust=False))
+        if self._ema_fast is None:
+            self._ema_fast = self._ema_slow = close
+        else:
+            alpha_fast = 2.0 / (MACD_FAST + 1)
+            alpha_slow = 2.0 / (MACD_SLOW + 1)
+            self._ema_fast += alpha_fast * (close - self._ema_fast)
+            self._ema_slow += alpha_slow * (close - self._ema_slow)
+
+        self.count += 1
+        self.last_close = close
+        self.last_date = date
+
+        latest = {}
+        for n in MA_WINDOWS:
+            latest[f'MA_{n}'] = self._ma_sums[n] / n if self.count >= n else np.nan
+        latest['RSI'] = _rsi(self._gain_sum / RSI_WINDOW, self._loss_sum / RSI_WINDOW) if self.count >= RSI_WINDOW else np.nan
+        latest['MACD'] = self._ema_fast - self._ema_slow
+
+        # Forward-fill: keep the previous value where the new one is undefined
+        for key, value in latest.items():
+            if not np.isnan(value):
+                self.values[key] = value
+        return dict(self.values)
+
+
+def _rsi(avg_gain, avg_loss):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rs = np.divide(avg_gain, avg_loss)
+        return 100 - (100 / (1 + rs))
+
+
+class IndicatorEngine:
+    """Per-ticker indicator states kept across requests
+
+    latest() only feeds the bars added since the ticker's previous call, so a
+    request with one new daily bar costs O(1) instead of recomputing the full
+    history. History that does not extend the stored state is recomputed in
+    one vectorized pass.
+    """
+    def __init__(self):
+        self._states = {}
+        self._lock = threading.Lock()
+
+    def latest(self, ticker, df):
+        """Latest indicator values for a ticker's Close history (DataFrame indexed by date)"""
+        closes = df['Close'].to_numpy(dtype=float)
+        dates = df.index
+        ticker = ticker.upper()
+
+        with self._lock:
+            state = self._states.get(ticker)
+            start = None
+            if state is not None and state.last_date is not None:
+                position = dates.searchsorted(state.last_date)
+                if position < len(dates) and dates[position] == state.last_date and closes[position] == state.last_close:
+                    start = position + 1
+            if start is None:
+                state = IndicatorState.from_closes(closes, dates)
+                start = len(closes)
+
+            for i in range(start, len(closes)):
+                state.update(closes[i], dates[i])
+            self._states[ticker] = state
+            return dict(state.values)
+
+    def reset(self, ticker=None):
+        with self._lock:
+            if ticker is None:
+                self._states.clear()
+            else:
+                self._states.pop(ticker.upper(), None)
+
+
+def _rolling_mean(values, window):
+    """Trailing rolling mean along the last axis (NaN until the window is full)"""
+    out = np.full(values.shape, np.nan)
+    if values.shape[-1] >= window:
+        cumsum = np.cumsum(values, axis=-1)
+        cumsum = np.concatenate([np.zeros(values.shape[:-1] + (1,)), cumsum], axis=-1)
+        out[..., window - 1:] = (cumsum[..., window:] - cumsum[..., :-window]) / window
+    return out
+
+
+def _ffill(values):
+    """Forward-fill NaNs along the last axis"""
+    valid = ~np.isnan(values)
+    index = np.where(valid, np.arange(values.shape[-1]), 0)
+    np.maximum.accumulate(index, axis=-1, out=index)
+    filled = np.take_along_axis(values, index, axis=-1)
+    # Leading NaNs stay NaN
+    return np.where(np.maximum.accumulate(valid, axis=-1), filled, np.nan)
+
+
+def _ema(values, alpha, block=256):
+    """adjust=False EMA along the last axis of a 2-D array, seeded with the first value
+
+    Within a block, e[s + j] = d^(j+1) * (e[s - 1] + alpha * sum_{i<=j} d^-(i+1) x[s + i])
+    with d = 1 - alpha, which is a cumulative sum. Blocks keep d^-block finite.
+    """
+    decay = 1.0 - alpha
+    out = np.empty(values.shape)
+    carry = values[:, 0]
+    for start in range(0, values.shape[1], block):
+        chunk = values[:, start:start + block]
+        powers = decay ** np.arange(1, chunk.shape[1] + 1)
+        out[:, start:start + block] = powers * (carry[:, None] + alpha * np.cumsum(chunk / powers, axis=1))
+        carry = out[:, start + chunk.shape[1] - 1]
+    return out
+
+
+def compute_indicators(closes):
+    """Batch mode: indicators for many tickers at once over an (N, T) array of closes
+
+    Returns a dict of (N, T) arrays keyed by indicator column name.
+    """
+    closes = np.asarray(closes, dtype=float)
+    squeeze = closes.ndim == 1
+    closes = np.atleast_2d(closes)
+    result = {}
+
+    for n in MA_WINDOWS:
+        result[f'MA_{n}'] = _rolling_mean(closes, n)
+
+    delta = np.diff(closes, axis=-1, prepend=closes[:, :1])
+    result['RSI'] = _ffill(_rsi(_rolling_mean(np.maximum(delta, 0.0), RSI_WINDOW),
+                                _rolling_mean(np.maximum(-delta, 0.0), RSI_WINDOW)))
+
+    result['MACD'] = _ema(closes, 2.0 / (MACD_FAST + 1)) - _ema(closes, 2.0 / (MACD_SLOW + 1))
+
+    if squeeze:
+        result = {key: value[0] for key, value in result.items()}
+    return result
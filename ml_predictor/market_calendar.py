@@ -0,0 +1,49 @@
+import datetime as dt
+import pandas as pd
+
+# Yahoo Finance suffix -> (exchange timezone, regular session close); no suffix means a US listing
+EXCHANGES = {
+    "": ("America/New_York", dt.time(16, 0)),
+    ".TO": ("America/Toronto", dt.time(16, 0)),
+    ".L": ("Europe/London", dt.time(16, 30)),
+    ".DE": ("Europe/Berlin", dt.time(17, 30)),
+    ".PA": ("Europe/Paris", dt.time(17, 30)),
+    ".AS": ("Europe/Amsterdam", dt.time(17, 30)),
+    ".NS": ("Asia/Kolkata", dt.time(15, 30)),
+    ".BO": ("Asia/Kolkata", dt.time(15, 30)),
+    ".T": ("Asia/Tokyo", dt.time(15, 0)),
+    ".HK": ("Asia/Hong_Kong", dt.time(16, 0)),
+    ".SS": ("Asia/Shanghai", dt.time(15, 0)),
+    ".SZ": ("Asia/Shanghai", dt.time(15, 0)),
+    ".AX": ("Australia/Sydney", dt.time(16, 0)),
+}
+
+# Time after the close before the day's bar is treated as final
+SETTLE_DELAY = dt.timedelta(minutes=30)
+
+
+def exchange_for(ticker):
+    """(timezone, close time) of the exchange a Yahoo Finance ticker trades on"""
+    ticker = ticker.upper()
+    suffix = ticker[ticker.rfind("."):] if "." in ticker else ""
+    return EXCHANGES.get(suffix, EXCHANGES[""])
+
+
+def last_complete_bar_date(ticker, now=None):
+    """Date of the ticker's most recent trading day whose daily bar is final at `now`
+
+    `now` is a timezone-aware time (naive times are taken as the server's
+    local time); the answer depends on the exchange's clock, not the
+    server's. Exchange holidays are not known here; callers handle a
+    trading day that never produces a bar.
+    """
+    timezone, close = exchange_for(ticker)
+    now = pd.Timestamp(now if now is not None else dt.datetime.now(dt.timezone.utc))
+    if now.tz is None:
+        now = now.tz_localize(dt.datetime.now().astimezone().tzinfo)
+    local = now.tz_convert(timezone)
+    today = local.normalize().tz_localize(None)
+    settled = (dt.datetime.combine(dt.date.min, close) + SETTLE_DELAY).time()
+    if today.dayofweek < 5 and local.time() >= settled:
+        return today.date()
+    return (today - pd.offsets.BDay(1)).date()
@@ -0,0 +1,203 @@
+import time
+import bisect
+import threading
+
+# Seconds; spans cache hits (~0.1 ms) to cold downloads and model loads (seconds)
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic counter, optionally split by labels"""
+    type = "counter"
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(name, "") for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(tuple(labels.get(name, "") for name in self.labelnames), 0)
+
+    def samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            yield self.name, tuple(zip(self.labelnames, key)), value
+
+
+class _Timer:
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.started, **self.labels)
+
+
+class Histogram:
+    """Bucketed observations (Prometheus histogram), optionally split by labels
+
+    observe() is a bisect and two additions under a lock; cumulative bucket
+    counts are only built when the histogram is read.
+    """
+    type = "histogram"
+
+    def __init__(self, name, help="", buckets=LATENCY_BUCKETS, labelnames=()):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(sorted(buckets))
+        self.labelnames = tuple(labelnames)
+        self._series = {}  # label values -> [per-bucket counts (+ overflow), sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(name, "") for name in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def time(self, **labels):
+        """Context manager that observes the elapsed seconds of its block"""
+        return _Timer(self, labels)
+
+    def _cumulative(self, key):
+        counts, total = self._series.get(key, [[0] * (len(self.buckets) + 1), 0.0])
+        cumulative, running = [], 0
+        for count in counts:
+            running += count
+            cumulative.append(running)
+        return cumulative, total
+
+    def snapshot(self, **labels):
+        """Cumulative bucket counts, count and sum for one label set"""
+        with self._lock:
+            cumulative, total = self._cumulative(tuple(labels.get(name, "") for name in self.labelnames))
+        return {
+            "buckets": {str(bound): count for bound, count in zip(self.buckets, cumulative)},
+            "count": cumulative[-1],
+            "sum": total,
+        }
+
+    def samples(self):
+        with self._lock:
+            series = {key: self._cumulative(key) for key in sorted(self._series)}
+        for key, (cumulative, total) in series.items():
+            labels = tuple(zip(self.labelnames, key))
+            for bound, count in zip(self.buckets + (float("inf"),), cumulative):
+                yield f"{self.name}_bucket", labels + (("le", _format_value(float(bound))),), count
+            yield f"{self.name}_sum", labels, total
+            yield f"{self.name}_count", labels, cumulative[-1]
+
+
+class CallbackMetric:
+    """Counter or gauge read from a function at scrape time (no cost between scrapes)
+
+    fn returns a number, or a dict mapping a label value to a number when
+    labelname is given.
+    """
+    def __init__(self, name, help, type, fn, labelname=None):
+        self.name = name
+        self.help = help
+        self.type = type
+        self.fn = fn
+        self.labelname = labelname
+
+    def samples(self):
+        value = self.fn()
+        if self.labelname is None:
+            yield self.name, (), value
+            return
+        for label, item in sorted(value.items()):
+            yield self.name, ((self.labelname, label),), item
+
+
+class MetricsRegistry:
+    """Named metrics rendered in the Prometheus text exposition format"""
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        """Add (or replace) a metric by name; returns it"""
+        with self._lock:
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, help, labelnames=()):
+        return self._get_or_create(name, lambda: Counter(name, help, labelnames))
+
+    def histogram(self, name, help, buckets=LATENCY_BUCKETS, labelnames=()):
+        return self._get_or_create(name, lambda: Histogram(name, help, buckets, labelnames))
+
+    def callback(self, name, help, type, fn, labelname=None):
+        return self.register(CallbackMetric(name, help, type, fn, labelname))
+
+    def _get_or_create(self, name, factory):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = factory()
+            return metric
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            try:
+                samples = list(metric.samples())
+            except Exception:
+                continue  # a failing callback must not break the whole scrape
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            for name, labels, value in samples:
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+# Shared by the whole process and served on /metrics
+default_metrics = MetricsRegistry()
+
+PIPELINE_STAGE_SECONDS = default_metrics.histogram(
+    "ml_pipeline_stage_seconds", "Time spent in each prediction pipeline stage", labelnames=("stage",))
+PREDICTIONS = default_metrics.counter(
+    "ml_predictions_total", "Predictions served, by outcome and prediction cache result", labelnames=("status", "cache"))
+PROVIDER_ERRORS = default_metrics.counter(
+    "ml_provider_errors_total", "Market data download errors by kind (rate_limited = HTTP 429)", labelnames=("kind",))
+FETCH_RETRIES = default_metrics.counter(
+    "ml_fetch_retries_total", "Market data download retries")
+FETCH_SKIPPED = default_metrics.counter(
+    "ml_fetch_skipped_total", "Downloads not attempted, by reason", labelnames=("reason",))
+DATA_FALLBACKS = default_metrics.counter(
+    "ml_data_fallbacks_total", "Requests served from stale stored data or mock data", labelnames=("source",))
@@ -0,0 +1,148 @@
+import os
+import time
+import threading
+from collections import deque
+
+import numpy as np
+
+from metrics import Histogram
+
+
+class _Request:
+    def __init__(self, model, X):
+        self.model = model
+        self.X = X
+        self.enqueued_at = time.monotonic()
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class MicroBatcher:
+    """Collects concurrent predict calls into batched forward passes
+
+    Callers hand in their (1, look_back, 1) window and block until it has been
+    predicted. A scheduler thread flushes the oldest request's model as soon as
+    max_batch_size windows for it are queued, or max_wait_ms after that request
+    arrived, whichever comes first. Requests for different models are batched
+    separately; each flush is one model.predict call.
+    """
+    BATCH_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+    def __init__(self, max_batch_size=32, max_wait_ms=2.0):
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = deque()
+        self._rows_by_model = {}  # id(model) -> windows queued for it
+        self._cond = threading.Condition()
+        self._worker = None
+        self.batch_sizes = Histogram("ml_microbatch_size", "Windows per batched forward pass", self.BATCH_BUCKETS)
+        self.queue_depths = Histogram("ml_microbatch_queue_depth", "Requests queued when a request arrives", self.BATCH_BUCKETS)
+        self.flushes = {"full": 0, "timeout": 0}
+        self.requests = 0
+
+    def _ensure_worker(self):
+        # Started lazily so constructing a predictor never spawns threads
+        if self._worker is None:
+            self._worker = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+            self._worker.start()
+
+    def predict(self, model, X):
+        """model.predict(X) for one caller's windows, run as part of a shared batch"""
+        request = _Request(model, np.asarray(X, dtype=np.float32))
+        with self._cond:
+            self._ensure_worker()
+            self._queue.append(request)
+            key = id(model)
+            self._rows_by_model[key] = self._rows_by_model.get(key, 0) + len(request.X)
+            self.requests += 1
+            self.queue_depths.observe(len(self._queue))
+            self._cond.notify()
+
+        request.done.wait()
+        if request.error is not None:
+            raise request.error
+        return request.result
+
+    def _run(self):
+        while True:
+            batch, reason = self._next_batch()
+            self._execute(batch)
+            with self._cond:
+                self.flushes[reason] += 1
+                self.batch_sizes.observe(sum(len(r.X) for r in batch))
+
+    def _next_batch(self):
+        """Wait until the oldest request's model has a full batch or its wait time is up"""
+        with self._cond:
+            while not self._queue:
+                self._cond.wait()
+            head = self._queue[0]
+            key = id(head.model)
+            deadline = head.enqueued_at + self.max_wait
+            reason = "timeout"
+            while True:
+                if self._rows_by_model[key] >= self.max_batch_size:
+                    reason = "full"
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+
+            # Take this model's requests in arrival order, leaving other models queued
+            batch, rows, kept = [], 0, deque()
+            while self._queue:
+                request = self._queue.popleft()
+                if request.model is head.model and (not batch or rows + len(request.X) <= self.max_batch_size):
+                    batch.append(request)
+                    rows += len(request.X)
+                else:
+                    kept.append(request)
+            self._queue = kept
+            self._rows_by_model[key] -= rows
+            if not self._rows_by_model[key]:
+                del self._rows_by_model[key]
+            return batch, reason
+
+    @staticmethod
+    def _execute(batch):
+        try:
+            X = np.concatenate([request.X for request in batch], axis=0)
+            output = np.asarray(batch[0].model.predict(X, verbose=0))
+        except Exception as e:
+            for request in batch:
+                request.error = e
+                request.done.set()
+            return
+
+        offset = 0
+        for request in batch:
+            request.result = output[offset:offset + len(request.X)]
+            offset += len(request.X)
+            request.done.set()
+
+    def stats(self):
+        with self._cond:
+            return {
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait * 1000.0,
+                "queue_depth": len(self._queue),
+                "requests": self.requests,
+                "flushes": dict(self.flushes),
+                "batch_size_histogram": self.batch_sizes.snapshot(),
+                "queue_depth_histogram": self.queue_depths.snapshot(),
+            }
+
+
+def micro_batcher_from_env():
+    """Batcher configured by ML_BATCH_MAX_SIZE and ML_BATCH_MAX_WAIT_MS (None unless ML_BATCH_MAX_SIZE > 1)
+
+    Off by default: windows are only batched when they share a model, which
+    in practice means the shared stock_model.h5 or the naive fallback. With
+    per-ticker models every request would wait max_wait_ms for nothing.
+    """
+    max_batch_size = int(os.environ.get("ML_BATCH_MAX_SIZE", 1))
+    if max_batch_size <= 1:
+        return None
+    return MicroBatcher(max_batch_size=max_batch_size, max_wait_ms=float(os.environ.get("ML_BATCH_MAX_WAIT_MS", 2.0)))
@@ -1,11 +1,75 @@
 import pandas as pd
 import numpy as np
 import datetime as dt
-import random
+import json
+import zlib
+
+
+def bounded_cumprod(multipliers, start, lower, upper):
+    """Vectorized price walk p[t] = clip(p[t-1] * m[t], lower, upper) along the last axis
+
+    Each step is the map x -> clip(x + log m, log lower, log upper) in log space,
+    and such maps compose into the same form, so all prefixes are computed with
+    a log2(T)-pass parallel scan instead of a per-day Python loop.
+    """
+    shift = np.log(np.maximum(multipliers, 1e-12))
+    # start/lower/upper are scalars or one value per row of multipliers
+    lo = np.broadcast_to(np.log(np.asarray(lower, dtype=float))[..., None], shift.shape)
+    hi = np.broadcast_to(np.log(np.asarray(upper, dtype=float))[..., None], shift.shape)
+    
+    steps = shift.shape[-1]
+    offset = 1
+    while offset < steps:
+        # Compose the map ending at t - offset (applied first) with the one ending at t
+        earlier_shift = shift[..., :-offset]
+        later_lo, later_hi = lo[..., offset:], hi[..., offset:]
+        new_lo = np.clip(lo[..., :-offset] + shift[..., offset:], later_lo, later_hi)
+        new_hi = np.clip(hi[..., :-offset] + shift[..., offset:], later_lo, later_hi)
+        shift = np.concatenate([shift[..., :offset], earlier_shift + shift[..., offset:]], axis=-1)
+        lo = np.concatenate([lo[..., :offset], new_lo], axis=-1)
+        hi = np.concatenate([hi[..., :offset], new_hi], axis=-1)
+        offset *= 2
+    
+    log_start = np.log(np.asarray(start, dtype=float))[..., None]
+    return np.exp(np.clip(log_start + shift, lo, hi))
+
+def ticker_seed_sequence(seed, ticker):
+    """Stable seed for (seed, ticker), independent of call order, process or PYTHONHASHSEED"""
+    return np.random.SeedSequence([seed, zlib.crc32(ticker.upper().encode())])
+
+def ohlcv_from_close(dates, close, volatility, rng):
+    """Build an OHLCV DataFrame around a close-price path"""
+    n = len(close)
+    
+    # Open is close of previous day with small gap
+    previous_close = np.concatenate([close[:1], close[:-1]])
+    open_price = previous_close * (1 + rng.normal(0, volatility * 0.5, n))
+    
+    # High and low based on intraday volatility
+    intraday_range = close * volatility * rng.uniform(0.5, 2.0, n)
+    high = np.maximum(open_price, close) + intraday_range * 0.5
+    low = np.minimum(open_price, close) - intraday_range * 0.5
+    
+    # Volume (random but realistic)
+    avg_volume = rng.integers(10000000, 100000000, n, endpoint=True)
+    volume = (avg_volume * rng.lognormal(0, 0.5, n)).astype(np.int64)
+    
+    return pd.DataFrame({
+        'Open': open_price,
+        'High': high,
+        'Low': low,
+        'Close': close,
+        'Volume': volume
+    }, index=dates)
 
 class MockStockDataProvider:
-    """Provides mock stock data when Yahoo Finance is unavailable"""
-    def __init__(self):
+    """Provides mock stock data when Yahoo Finance is unavailable
+
+    With a seed, each ticker's history is reproducible: the same (seed, ticker)
+    always yields the same data.
+    """
+    def __init__(self, seed=None):
+        self.seed = seed
         self.mock_stocks = {
             'AAPL': {'name': 'Apple Inc.', 'base_price': 150.0, 'volatility': 0.02},
             'MSFT': {'name': 'Microsoft Corp.', 'base_price': 330.0, 'volatility': 0.015},
@@ -16,82 +80,124 @@ class MockStockDataProvider:
             'INFY.NS': {'name': 'Infosys Ltd.', 'base_price': 1450.0, 'volatility': 0.022},
         }
     
-    def generate_mock_data(self, ticker, days_back=365):
-        """Generate realistic mock stock data"""
+    def stock_info(self, ticker):
+        """Name, base price and volatility for a ticker (stable for unknown tickers)"""
         ticker = ticker.upper()
+        if ticker in self.mock_stocks:
+            return self.mock_stocks[ticker]
         
-        if ticker not in self.mock_stocks:
-            # Generate mock data for unknown ticker
-            stock_info = {
-                'name': f'{ticker} Corp.',
-                'base_price': random.uniform(50, 500),
-                'volatility': random.uniform(0.01, 0.04)
-            }
-        else:
-            stock_info = self.mock_stocks[ticker]
+        # Unknown tickers get a profile keyed by the symbol, so it never changes between calls
+        rng = np.random.default_rng(zlib.crc32(ticker.encode()))
+        return {
+            'name': f'{ticker} Corp.',
+            'base_price': rng.uniform(50, 500),
+            'volatility': rng.uniform(0.01, 0.04)
+        }
+    
+    def generate_mock_data(self, ticker, days_back=365, seed=None):
+        """Generate realistic mock stock data (same seed -> identical output)"""
+        ticker = ticker.upper()
+        if seed is None and self.seed is not None:
+            seed = ticker_seed_sequence(self.seed, ticker)
+        rng = np.random.default_rng(seed)
+        stock_info = self.stock_info(ticker)
         
-        # Generate dates
+        # Generate business dates
         end_date = dt.datetime.now()
         start_date = end_date - dt.timedelta(days=days_back)
-        dates = pd.date_range(start=start_date, end=end_date, freq='D')
+        dates = pd.bdate_range(start=start_date, end=end_date, name='Date')
+        n = len(dates)
+        volatility = stock_info['volatility']
+        base_price = stock_info['base_price']
         
-        # Remove weekends (approximate)
-        business_dates = [d for d in dates if d.weekday() < 5]
-          # Generate price data with realistic movements
-        prices = []
-        current_price = stock_info['base_price']
+        # Generate price data with realistic movements
+        i = np.arange(n)
+        trend_factor = 1 + (i / n) * 0.02  # Small upward trend
+        seasonal_factor = 1 + 0.01 * np.sin(2 * np.pi * i / 252)  # Small seasonality
+        daily_change = rng.normal(0.0005, volatility, n)  # Random walk with controlled drift
+        multipliers = (1 + daily_change) * trend_factor * seasonal_factor
         
-        for i, date in enumerate(business_dates):
-            # Add some trend and seasonality (more controlled)
-            trend_factor = 1 + (i / len(business_dates)) * 0.02  # Small upward trend
-            seasonal_factor = 1 + 0.01 * np.sin(2 * np.pi * i / 252)  # Small seasonality
-            
-            # Random walk with controlled drift
-            daily_change = np.random.normal(0.0005, stock_info['volatility'])  # Smaller drift
-            current_price *= (1 + daily_change) * trend_factor * seasonal_factor
-            
-            # Keep price within reasonable bounds
-            min_price = stock_info['base_price'] * 0.5
-            max_price = stock_info['base_price'] * 2.0
-            current_price = max(min_price, min(max_price, current_price))
-            
-            prices.append(current_price)
+        # Cumulative-product walk, kept within reasonable bounds at every step
+        close = bounded_cumprod(multipliers, base_price, base_price * 0.5, base_price * 2.0)
         
-        # Create OHLC data
-        data = []
-        for i, (date, close) in enumerate(zip(business_dates, prices)):
-            # Generate realistic OHLC from close price
-            volatility = stock_info['volatility']
-            
-            # Open is close of previous day with small gap
-            if i == 0:
-                open_price = close * (1 + np.random.normal(0, volatility * 0.5))
-            else:
-                open_price = prices[i-1] * (1 + np.random.normal(0, volatility * 0.5))
-            
-            # High and low based on intraday volatility
-            intraday_range = close * volatility * np.random.uniform(0.5, 2.0)
-            high = max(open_price, close) + intraday_range * 0.5
-            low = min(open_price, close) - intraday_range * 0.5
-            
-            # Volume (random but realistic)
-            avg_volume = random.randint(10000000, 100000000)
-            volume = int(avg_volume * np.random.lognormal(0, 0.5))
-            
-            data.append({
-                'Date': date,
-                'Open': open_price,
-                'High': high,
-                'Low': low,
-                'Close': close,
-                'Volume': volume
-            })
+        return ohlcv_from_close(dates, close, volatility, rng)
+    
+    def download(self, ticker, start_date, end_date):
+        """Provider interface matching YahooFinanceProvider.download"""
+        days_back = (dt.datetime.now() - start_date).days + 1
+        df = self.generate_mock_data(ticker, days_back)
+        return df[(df.index >= start_date) & (df.index < end_date)]
+
+class SyntheticMarket:
+    """Seedable synthetic universe of N tickers x T business days
+
+    Daily returns follow a one-factor model, r[i, t] = beta[i] * market[t] + eps[i, t],
+    so tickers are correlated through the shared market factor. Each ticker draws
+    from its own Generator keyed by (seed, ticker), so its history does not depend
+    on which other tickers are generated or how the universe is chunked.
+    """
+    def __init__(self, tickers, days=252, seed=0, end_date=None, market_drift=0.0003, market_volatility=0.01):
+        self.tickers = [t.upper() for t in tickers]
+        self.days = days
+        self.seed = seed
+        end = pd.Timestamp(end_date if end_date is not None else dt.date.today()).normalize()
+        self.dates = pd.bdate_range(end=end, periods=days, name='Date')
+        self.profiles = MockStockDataProvider()
         
-        # Create DataFrame
-        df = pd.DataFrame(data)
-        df.set_index('Date', inplace=True)
+        market_rng = np.random.default_rng(ticker_seed_sequence(seed, "^MARKET"))
+        self.market_returns = market_rng.normal(market_drift, market_volatility, days)
+    
+    def _ticker_draws(self, ticker):
+        """Base price, volatility, close-to-close returns and the ticker's Generator"""
+        info = self.profiles.stock_info(ticker)
+        rng = np.random.default_rng(ticker_seed_sequence(self.seed, ticker))
+        beta = rng.uniform(0.5, 1.5)
+        returns = beta * self.market_returns + rng.normal(0, info['volatility'], self.days)
+        return info['base_price'], info['volatility'], returns, rng
+    
+    def close_block(self, tickers=None):
+        """Close prices as an (N, T) array for the given tickers (default: whole universe)"""
+        tickers = self.tickers if tickers is None else [t.upper() for t in tickers]
+        base_prices = np.empty(len(tickers))
+        returns = np.empty((len(tickers), self.days))
+        for row, ticker in enumerate(tickers):
+            base_prices[row], _, returns[row], _ = self._ticker_draws(ticker)
+        return bounded_cumprod(1 + returns, base_prices, base_prices * 0.2, base_prices * 5.0)
+    
+    def frame(self, ticker):
+        """Full OHLCV history for one ticker"""
+        base_price, volatility, returns, rng = self._ticker_draws(ticker)
+        close = bounded_cumprod(1 + returns, base_price, base_price * 0.2, base_price * 5.0)
+        return ohlcv_from_close(self.dates, close, volatility, rng)
+    
+    def download(self, ticker, start_date, end_date):
+        """Provider interface matching YahooFinanceProvider.download"""
+        df = self.frame(ticker)
+        return df[(df.index >= pd.Timestamp(start_date)) & (df.index < pd.Timestamp(end_date))]
+    
+    def write_memmap(self, path, chunk_size=1024, dtype='float32'):
+        """Write the (N, T) close block straight into a .npy memory-mapped file, chunk by chunk"""
+        block = np.lib.format.open_memmap(path, mode='w+', dtype=dtype, shape=(len(self.tickers), self.days))
+        for start in range(0, len(self.tickers), chunk_size):
+            stop = min(start + chunk_size, len(self.tickers))
+            block[start:stop] = self.close_block(self.tickers[start:stop])
+        block.flush()
+        del block
         
-        return df
+        with open(path + '.json', 'w') as f:
+            json.dump({
+                "tickers": self.tickers,
+                "dates": [d.strftime("%Y-%m-%d") for d in self.dates],
+                "seed": self.seed,
+            }, f)
+        return path
+    
+    @staticmethod
+    def load_memmap(path):
+        """Open a block written by write_memmap: returns (read-only memmap, tickers, dates)"""
+        with open(path + '.json') as f:
+            meta = json.load(f)
+        return np.load(path, mmap_mode='r'), meta["tickers"], pd.DatetimeIndex(meta["dates"], name='Date')
 
 # Test the mock data provider
 if __name__ == "__main__":
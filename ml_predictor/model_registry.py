@@ -0,0 +1,255 @@
+import os
+import re
+import json
+import threading
+import contextlib
+import datetime as dt
+from collections import OrderedDict
+from numpy_lstm import npz_path_for
+from metrics import PIPELINE_STAGE_SECONDS
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process training lock
+    fcntl = None
+
+
+def _default_loader(path):
+    """Prefer the NumPy export next to a model file so serving needs no TensorFlow"""
+    from numpy_lstm import NumpyLSTMModel
+    npz_path = npz_path_for(path)
+    if os.path.exists(npz_path) and os.path.getmtime(npz_path) >= os.path.getmtime(path):
+        return NumpyLSTMModel.load(npz_path)
+
+    from keras.models import load_model
+    return load_model(path)
+
+
+class ModelRegistry:
+    """Process-wide cache of loaded models, keyed by artifact path
+
+    Each model is deserialized once and kept resident. A cached model is
+    reloaded when its file changes on disk (mtime or size), and the least
+    recently used model is evicted once more than max_models are held.
+    """
+    def __init__(self, max_models=4, loader=None):
+        self.max_models = max_models
+        self.loader = loader or _default_loader
+        self._models = OrderedDict()  # path -> (signature, model)
+        self._lock = threading.RLock()
+        self._path_locks = {}
+        self.hits = 0
+        self.misses = 0
+        self.reloads = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _signature(path):
+        """Cheap change detector for a model file"""
+        stat = os.stat(path)
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _path_lock(self, path):
+        with self._lock:
+            return self._path_locks.setdefault(path, threading.Lock())
+
+    def get(self, path):
+        """Return the model stored at path, loading it only if not cached or changed"""
+        path = os.path.abspath(path)
+        signature = self._signature(path)
+
+        with self._lock:
+            entry = self._models.get(path)
+            if entry is not None and entry[0] == signature:
+                self._models.move_to_end(path)
+                self.hits += 1
+                return entry[1]
+
+        # Load outside the registry lock so other models stay available meanwhile;
+        # the per-path lock stops concurrent requests loading the same file twice
+        with self._path_lock(path):
+            with self._lock:
+                entry = self._models.get(path)
+                if entry is not None and entry[0] == signature:
+                    self._models.move_to_end(path)
+                    self.hits += 1
+                    return entry[1]
+
+            stale = entry is not None
+            with PIPELINE_STAGE_SECONDS.time(stage="model_load"):
+                model = self.loader(path)
+
+            with self._lock:
+                self.misses += 1
+                if stale:
+                    self.reloads += 1
+                self._store(path, signature, model)
+            return model
+
+    def put(self, path, model):
+        """Register an already-built model (e.g. just trained) for its saved file"""
+        path = os.path.abspath(path)
+        signature = self._signature(path)
+        with self._lock:
+            self._store(path, signature, model)
+
+    def invalidate(self, path=None):
+        """Drop one cached model, or all of them"""
+        with self._lock:
+            if path is None:
+                self._models.clear()
+            else:
+                self._models.pop(os.path.abspath(path), None)
+
+    def _store(self, path, signature, model):
+        self._models[path] = (signature, model)
+        self._models.move_to_end(path)
+        while len(self._models) > self.max_models:
+            self._models.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self):
+        """Cache counters for monitoring"""
+        with self._lock:
+            return {
+                "cached_models": len(self._models),
+                "max_models": self.max_models,
+                "hits": self.hits,
+                "misses": self.misses,
+                "reloads": self.reloads,
+                "evictions": self.evictions,
+            }
+
+
+class ModelArtifacts:
+    """Versioned per-ticker model files: <root>/<TICKER>/v0001.h5, v0002.h5, ...
+
+    Each version may carry a NumPy export (vNNNN.npz), metadata (vNNNN.json,
+    including the training scaler) and the serving scaler (vNNNN.scaler.json).
+
+    A new version is trained into a temporary file and published with an
+    atomic rename, so readers only ever see complete artifacts and pick up
+    the newest version on their next lookup (hot swap).
+    """
+    VERSION_PATTERN = re.compile(r"^v(\d+)\.h5$")
+
+    def __init__(self, root="models"):
+        self.root = root
+        self._lock = threading.Lock()
+        # Called with the ticker whenever a new version is published
+        self.listeners = []
+        os.makedirs(self.root, exist_ok=True)
+
+    def _ticker_dir(self, ticker):
+        safe_name = ticker.upper().replace('/', '_').replace('\\', '_')
+        return os.path.join(self.root, safe_name)
+
+    def versions(self, ticker):
+        """Sorted list of published version numbers for a ticker"""
+        ticker_dir = self._ticker_dir(ticker)
+        if not os.path.isdir(ticker_dir):
+            return []
+        found = []
+        for name in os.listdir(ticker_dir):
+            match = self.VERSION_PATTERN.match(name)
+            if match:
+                found.append(int(match.group(1)))
+        return sorted(found)
+
+    def path(self, ticker, version):
+        return os.path.join(self._ticker_dir(ticker), f"v{version:04d}.h5")
+
+    def latest(self, ticker):
+        """Return (version, path) of the newest published model, or (None, None)"""
+        versions = self.versions(ticker)
+        if not versions:
+            return None, None
+        return versions[-1], self.path(ticker, versions[-1])
+
+    def metadata(self, ticker, version):
+        """Metadata written when the version was published ({} if none)"""
+        path = self.path(ticker, version)[:-3] + ".json"
+        if not os.path.exists(path):
+            return {}
+        with open(path) as f:
+            return json.load(f)
+
+    def scaler(self, ticker, version):
+        """Serving scaler state saved for the version (None if none yet)"""
+        path = self.path(ticker, version)[:-3] + ".scaler.json"
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return json.load(f)
+
+    def save_scaler(self, ticker, version, state):
+        """Atomically replace the version's serving scaler state"""
+        self._write_json(self.path(ticker, version)[:-3] + ".scaler.json", state)
+
+    @staticmethod
+    def _write_json(path, data, indent=None):
+        # Write to a temp file and swap so readers never see a partial file
+        temp_path = f"{path}.{os.getpid()}-{threading.get_ident()}.tmp"
+        with open(temp_path, "w") as f:
+            json.dump(data, f, indent=indent)
+        os.replace(temp_path, path)
+
+    def staging_path(self, ticker):
+        """Temporary file to train the next version into"""
+        ticker_dir = self._ticker_dir(ticker)
+        os.makedirs(ticker_dir, exist_ok=True)
+        return os.path.join(ticker_dir, f"staging-{os.getpid()}-{threading.get_ident()}.h5")
+
+    @contextlib.contextmanager
+    def training_lock(self, ticker):
+        """Exclusive per-ticker lock shared by all processes using this directory
+
+        Yields True if it was free, or False once it has been released by
+        another holder (who has usually just published a version).
+        """
+        ticker_dir = self._ticker_dir(ticker)
+        os.makedirs(ticker_dir, exist_ok=True)
+        with open(os.path.join(ticker_dir, "training.lock"), "a") as lock_file:
+            if fcntl is None:
+                yield True
+                return
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                uncontended = True
+            except BlockingIOError:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                uncontended = False
+            try:
+                yield uncontended
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def publish(self, ticker, staging_path, metadata=None):
+        """Promote a trained staging file to the next version number"""
+        with self._lock:
+            versions = self.versions(ticker)
+            version = (versions[-1] + 1) if versions else 1
+            final_path = self.path(ticker, version)
+
+            # The .h5 makes the version visible, so everything a reader needs
+            # with it (training scaler, NumPy export) is in place before it appears
+            info = dict(metadata or {})
+            info.update({
+                "ticker": ticker.upper(),
+                "version": version,
+                "published_at": dt.datetime.now().isoformat(timespec="seconds"),
+            })
+            self._write_json(final_path[:-3] + ".json", info, indent=2)
+
+            staging_npz = npz_path_for(staging_path)
+            if os.path.exists(staging_npz):
+                os.replace(staging_npz, npz_path_for(final_path))
+            os.replace(staging_path, final_path)
+
+        for listener in list(self.listeners):
+            listener(ticker.upper())
+        return version, final_path
+
+
+# Shared by every StockPredictorAPI in the process
+default_registry = ModelRegistry(max_models=64)
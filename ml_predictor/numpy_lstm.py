@@ -0,0 +1,154 @@
+import os
+import sys
+import json
+import numpy as np
+
+# Exported layer kinds: Bidirectional(LSTM) and Dense; Dropout is a no-op at inference
+SUPPORTED_ACTIVATIONS = {
+    'linear': lambda x: x,
+    'relu': lambda x: np.maximum(x, 0.0),
+    'tanh': np.tanh,
+    'sigmoid': lambda x: 1.0 / (1.0 + np.exp(-x)),
+}
+
+
+def _sigmoid(x):
+    return 1.0 / (1.0 + np.exp(-x))
+
+
+def _activation_name(fn):
+    name = getattr(fn, '__name__', str(fn))
+    if name not in SUPPORTED_ACTIVATIONS:
+        raise ValueError(f"Unsupported activation '{name}'")
+    return name
+
+
+def export_weights(model, path):
+    """Extract the weights of a trained Keras model into a compact .npz file"""
+    arrays = {}
+    layers = []
+
+    for layer in model.layers:
+        kind = type(layer).__name__
+        if kind == 'Dropout':
+            continue
+
+        prefix = f"layer{len(layers)}"
+        if kind == 'Bidirectional':
+            if type(layer.forward_layer).__name__ != 'LSTM' or layer.merge_mode != 'concat':
+                raise ValueError("Only Bidirectional(LSTM) with concat merge is supported")
+            for direction, rnn in (('fw', layer.forward_layer), ('bw', layer.backward_layer)):
+                if _activation_name(rnn.activation) != 'tanh' or _activation_name(rnn.recurrent_activation) != 'sigmoid':
+                    raise ValueError("Only tanh/sigmoid LSTM activations are supported")
+                kernel, recurrent_kernel, bias = rnn.get_weights()
+                arrays[f"{prefix}_{direction}_kernel"] = kernel.astype(np.float32)
+                arrays[f"{prefix}_{direction}_recurrent"] = recurrent_kernel.astype(np.float32)
+                arrays[f"{prefix}_{direction}_bias"] = bias.astype(np.float32)
+            layers.append({
+                "type": "bilstm",
+                "units": int(layer.forward_layer.units),
+                "return_sequences": bool(layer.forward_layer.return_sequences),
+            })
+        elif kind == 'Dense':
+            kernel, bias = layer.get_weights()
+            arrays[f"{prefix}_kernel"] = kernel.astype(np.float32)
+            arrays[f"{prefix}_bias"] = bias.astype(np.float32)
+            layers.append({"type": "dense", "activation": _activation_name(layer.activation)})
+        else:
+            raise ValueError(f"Unsupported layer type '{kind}'")
+
+    arrays["spec"] = np.array(json.dumps({"layers": layers}))
+    tmp_path = f"{path}.{os.getpid()}.tmp.npz"
+    np.savez(tmp_path, **arrays)
+    os.replace(tmp_path, path)
+    return path
+
+
+class NumpyLSTMModel:
+    """Pure-NumPy forward pass for exported Bidirectional LSTM -> Dense stacks
+
+    Exposes the same predict(X, verbose=0) call as a Keras model so it can be
+    served in place of one without importing TensorFlow.
+    """
+    def __init__(self, layers, weights):
+        self.layers = layers
+        self.weights = weights
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            spec = json.loads(str(data["spec"]))
+            weights = {key: data[key] for key in data.files if key != "spec"}
+        return cls(spec["layers"], weights)
+
+    def predict(self, X, verbose=0, batch_size=None):
+        out = np.asarray(X, dtype=np.float32)
+        for i, layer in enumerate(self.layers):
+            prefix = f"layer{i}"
+            if layer["type"] == "bilstm":
+                out = self._bilstm(out, prefix, layer["units"], layer["return_sequences"])
+            else:
+                out = out @ self.weights[f"{prefix}_kernel"] + self.weights[f"{prefix}_bias"]
+                out = SUPPORTED_ACTIVATIONS[layer["activation"]](out)
+        return out
+
+    def _bilstm(self, X, prefix, units, return_sequences):
+        """Run both LSTM directions together, one (2, N, 4*units) matmul per time step"""
+        n, steps, _ = X.shape
+        w = self.weights
+
+        # Input projections for every time step at once; the backward direction
+        # sees the sequence reversed
+        Z = np.stack([
+            X @ w[f"{prefix}_fw_kernel"] + w[f"{prefix}_fw_bias"],
+            X[:, ::-1, :] @ w[f"{prefix}_bw_kernel"] + w[f"{prefix}_bw_bias"],
+        ])  # (2, N, T, 4u)
+        R = np.stack([w[f"{prefix}_fw_recurrent"], w[f"{prefix}_bw_recurrent"]])  # (2, u, 4u)
+
+        h = np.zeros((2, n, units), dtype=np.float32)
+        c = np.zeros((2, n, units), dtype=np.float32)
+        if return_sequences:
+            outputs = np.empty((2, n, steps, units), dtype=np.float32)
+
+        for t in range(steps):
+            gates = Z[:, :, t, :] + np.matmul(h, R)
+            i = _sigmoid(gates[..., :units])
+            f = _sigmoid(gates[..., units:2 * units])
+            g = np.tanh(gates[..., 2 * units:3 * units])
+            o = _sigmoid(gates[..., 3 * units:])
+            c = f * c + i * g
+            h = o * np.tanh(c)
+            if return_sequences:
+                outputs[:, :, t, :] = h
+
+        if not return_sequences:
+            return np.concatenate([h[0], h[1]], axis=-1)
+
+        # Re-align the backward outputs with the original time order, as Keras does
+        return np.concatenate([outputs[0], outputs[1][:, ::-1, :]], axis=-1)
+
+
+def npz_path_for(model_path):
+    """Path of the NumPy export that sits next to a Keras model file"""
+    return os.path.splitext(model_path)[0] + ".npz"
+
+
+# Export / verify from the command line
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python numpy_lstm.py <model.h5> [output.npz]")
+        sys.exit(1)
+
+    from keras.models import load_model
+
+    model_path = sys.argv[1]
+    out_path = sys.argv[2] if len(sys.argv) > 2 else npz_path_for(model_path)
+
+    keras_model = load_model(model_path)
+    export_weights(keras_model, out_path)
+    print(f"✓ Exported {model_path} -> {out_path} ({os.path.getsize(out_path) / 1024:.1f} KB)")
+
+    sample = np.random.rand(8, keras_model.input_shape[1], 1).astype(np.float32)
+    expected = keras_model.predict(sample, verbose=0)
+    actual = NumpyLSTMModel.load(out_path).predict(sample)
+    print(f"  Max abs difference vs Keras on random input: {np.abs(expected - actual).max():.2e}")
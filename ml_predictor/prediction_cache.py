@@ -0,0 +1,123 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+
+
+class PredictionCache:
+    """TTL + LRU cache of prediction results keyed by (ticker, last bar date, model version)
+
+    A next-day prediction only changes when a new daily bar arrives or the model
+    is retrained, and both are part of the key. Entries also expire after ttl
+    seconds. With a path, entries are persisted to SQLite and survive restarts.
+    """
+    def __init__(self, ttl=3600, max_entries=1024, path=None, clock=time.time):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.path = path
+        self.clock = clock
+        self._entries = OrderedDict()  # key -> (expires_at, result)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        if self.path:
+            with self._db() as conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS predictions ("
+                    " key TEXT PRIMARY KEY, ticker TEXT NOT NULL, expires_at REAL NOT NULL, result TEXT NOT NULL)"
+                )
+
+    def _db(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def make_key(ticker, last_bar_date, model_version):
+        return f"{ticker.upper()}|{last_bar_date}|{model_version}"
+
+    def get(self, key):
+        """Cached result for key, or None; also returns the remaining TTL in seconds"""
+        now = self.clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= now:
+                del self._entries[key]
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return dict(entry[1]), entry[0] - now
+
+        if self.path:
+            row = self._db().execute(
+                "SELECT expires_at, result FROM predictions WHERE key = ? AND expires_at > ?", (key, now)
+            ).fetchone()
+            if row is not None:
+                expires_at, result = row[0], json.loads(row[1])
+                with self._lock:
+                    self._store(key, expires_at, result)
+                    self.hits += 1
+                return dict(result), expires_at - now
+
+        with self._lock:
+            self.misses += 1
+        return None, 0.0
+
+    def put(self, key, result):
+        expires_at = self.clock() + self.ttl
+        with self._lock:
+            self._store(key, expires_at, dict(result))
+        if self.path:
+            with self._db() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO predictions (key, ticker, expires_at, result) VALUES (?, ?, ?, ?)",
+                    (key, key.split("|", 1)[0], expires_at, json.dumps(result)),
+                )
+
+    def _store(self, key, expires_at, result):
+        self._entries[key] = (expires_at, result)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, ticker=None):
+        """Drop cached results for one ticker (e.g. new bars or a new model), or everything"""
+        prefix = None if ticker is None else f"{ticker.upper()}|"
+        with self._lock:
+            for key in [k for k in self._entries if prefix is None or k.startswith(prefix)]:
+                del self._entries[key]
+            self.invalidations += 1
+        if self.path:
+            with self._db() as conn:
+                if ticker is None:
+                    conn.execute("DELETE FROM predictions")
+                else:
+                    conn.execute("DELETE FROM predictions WHERE ticker = ?", (ticker.upper(),))
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                "persistent": bool(self.path),
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+            }
+
+
+def prediction_cache_from_env():
+    """Cache configured by ML_PREDICTION_CACHE_TTL, ML_PREDICTION_CACHE_SIZE and ML_PREDICTION_CACHE_PATH"""
+    return PredictionCache(
+        ttl=float(os.environ.get("ML_PREDICTION_CACHE_TTL", 3600)),
+        max_entries=int(os.environ.get("ML_PREDICTION_CACHE_SIZE", 1024)),
+        path=os.environ.get("ML_PREDICTION_CACHE_PATH") or None,
+    )
@@ -0,0 +1,202 @@
+import os
+import io
+import re
+import json
+import time
+import uuid
+import pstats
+import hmac
+import cProfile
+import threading
+import itertools
+import tracemalloc
+
+_local = threading.local()
+
+
+def profiling_active():
+    """True while the calling thread is inside RequestProfiler.profile"""
+    return getattr(_local, "active", False)
+
+
+def _component(filename):
+    """Which library a profiled function belongs to: a site-packages top-level name, 'ml_predictor', 'builtins' or 'stdlib'"""
+    if filename in ("~", "") or filename.startswith("<"):
+        return "builtins"
+    parts = filename.replace("\\", "/").split("/")
+    for marker in ("site-packages", "dist-packages"):
+        if marker in parts:
+            index = parts.index(marker)
+            if index + 1 < len(parts):
+                return parts[index + 1].split(".")[0].lstrip("_")
+    if os.path.dirname(os.path.abspath(filename)) == os.path.dirname(os.path.abspath(__file__)):
+        return "ml_predictor"
+    return "stdlib"
+
+
+class RequestProfiler:
+    """Opt-in cProfile + tracemalloc profiling of single requests
+
+    A request is profiled when the caller asks for it (allowed only with
+    on_demand=True, and only with the right token when one is configured) or
+    as every sample_every-th request. Each profile gets a new server-side id
+    (so a caller's request id can never overwrite another profile) and is
+    stored in output_dir as <profile id>.prof (a pstats dump) and
+    <profile id>.json (top functions by time, time per library and top
+    allocation sites); only the newest max_artifacts profiles are kept.
+
+    One request is profiled at a time: tracemalloc traces the whole process,
+    so others that ask meanwhile run unprofiled. cProfile only sees the
+    profiled thread, so work handed to other threads shows up as waiting.
+    """
+    REQUEST_ID_PATTERN = re.compile(r"^[A-Za-z0-9_.-]{1,64}$")
+
+    def __init__(self, output_dir="profiles", on_demand=False, token=None, sample_every=0, top_n=25, max_artifacts=100):
+        self.output_dir = output_dir
+        self.on_demand = on_demand
+        self.token = token
+        self.sample_every = sample_every
+        self.top_n = top_n
+        self.max_artifacts = max_artifacts
+        self._busy = threading.Lock()
+        self._counter = itertools.count(1)
+        self.profiled = 0
+        self.skipped_busy = 0
+
+    @property
+    def enabled(self):
+        return self.on_demand or self.sample_every > 0
+
+    def should_profile(self, requested=None):
+        """'requested', 'sampled' or None; requested is the header/query flag value, if any"""
+        if requested and self.on_demand and (not self.token or hmac.compare_digest(requested.encode(), self.token.encode())):
+            return "requested"
+        if self.sample_every > 0 and next(self._counter) % self.sample_every == 0:
+            return "sampled"
+        return None
+
+    def profile(self, request_id, reason, fn, *args, **kwargs):
+        """Run fn under the profiler; returns (fn's result, summary dict or None if another profile is running)
+
+        request_id is only recorded in the summary; the summary's profile_id names the stored files.
+        """
+        if not self._busy.acquire(blocking=False):
+            self.skipped_busy += 1
+            return fn(*args, **kwargs), None
+
+        try:
+            profiler = cProfile.Profile()
+            started_tracing = not tracemalloc.is_tracing()
+            if started_tracing:
+                tracemalloc.start(10)
+            tracemalloc.reset_peak()
+            before = tracemalloc.take_snapshot()
+            _local.active = True
+            started = time.perf_counter()
+            try:
+                result = profiler.runcall(fn, *args, **kwargs)
+            finally:
+                wall_seconds = time.perf_counter() - started
+                _local.active = False
+                after = tracemalloc.take_snapshot()
+                _, peak = tracemalloc.get_traced_memory()
+                if started_tracing:
+                    tracemalloc.stop()
+
+            profile_id = uuid.uuid4().hex[:16]
+            summary = self._summarize(profile_id, request_id, reason, profiler, before, after, peak, wall_seconds)
+            self._store(profile_id, profiler, summary)
+            self.profiled += 1
+            return result, summary
+        finally:
+            self._busy.release()
+
+    def _summarize(self, profile_id, request_id, reason, profiler, before, after, peak, wall_seconds):
+        stats = pstats.Stats(profiler, stream=io.StringIO())
+        by_component = {}
+        functions = []
+        for (filename, line, name), (_, calls, total, cumulative, _) in stats.stats.items():
+            component = _component(filename)
+            by_component[component] = by_component.get(component, 0.0) + total
+            functions.append({
+                "function": f"{filename}:{line}({name})",
+                "component": component,
+                "calls": calls,
+                "total_seconds": round(total, 6),
+                "cumulative_seconds": round(cumulative, 6),
+            })
+        functions.sort(key=lambda f: f["total_seconds"], reverse=True)
+
+        # Skip our own snapshot bookkeeping so only the request's allocations are listed
+        ignore = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)]
+        differences = after.filter_traces(ignore).compare_to(before.filter_traces(ignore), "lineno")
+        allocations = [{
+            "location": f"{diff.traceback[0].filename}:{diff.traceback[0].lineno}",
+            "component": _component(diff.traceback[0].filename),
+            "size_kb": round(diff.size_diff / 1024, 1),
+            "count": diff.count_diff,
+        } for diff in differences[:self.top_n] if diff.size_diff > 0]
+
+        return {
+            "profile_id": profile_id,
+            "request_id": request_id,
+            "reason": reason,
+            "profiled_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "wall_seconds": round(wall_seconds, 6),
+            "profiled_seconds": round(stats.total_tt, 6),
+            "seconds_by_component": {name: round(seconds, 6) for name, seconds in
+                                     sorted(by_component.items(), key=lambda item: item[1], reverse=True)},
+            "top_functions": functions[:self.top_n],
+            "peak_traced_kb": round(peak / 1024, 1),
+            "top_allocations": allocations,
+        }
+
+    def _paths(self, profile_id):
+        base = os.path.join(self.output_dir, profile_id)
+        return base + ".prof", base + ".json"
+
+    def _store(self, profile_id, profiler, summary):
+        os.makedirs(self.output_dir, exist_ok=True)
+        prof_path, json_path = self._paths(profile_id)
+        profiler.dump_stats(prof_path)
+        summary["pstats_path"] = prof_path
+        with open(json_path, "w") as f:
+            json.dump(summary, f, indent=2)
+
+        # Sampling runs unattended, so cap how many profiles pile up
+        stored = sorted((entry for entry in os.scandir(self.output_dir) if entry.name.endswith(".json")),
+                        key=lambda entry: (entry.stat().st_mtime_ns, entry.name))
+        for entry in stored[:max(0, len(stored) - self.max_artifacts)]:
+            for path in self._paths(entry.name[:-5]):
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def load(self, profile_id):
+        """Stored summary for a profile id, or None"""
+        if not self.REQUEST_ID_PATTERN.match(profile_id or ""):
+            return None
+        _, json_path = self._paths(profile_id)
+        if not os.path.exists(json_path):
+            return None
+        with open(json_path) as f:
+            return json.load(f)
+
+    def stats(self):
+        return {
+            "on_demand": self.on_demand,
+            "token_required": bool(self.token),
+            "sample_every": self.sample_every,
+            "profiled": self.profiled,
+            "skipped_busy": self.skipped_busy,
+            "output_dir": self.output_dir,
+        }
+
+
+def profiler_from_env():
+    """Profiler configured by ML_PROFILE_ON_DEMAND, ML_PROFILE_TOKEN, ML_PROFILE_SAMPLE_EVERY and ML_PROFILE_DIR"""
+    return RequestProfiler(
+        output_dir=os.environ.get("ML_PROFILE_DIR", "profiles"),
+        on_demand=os.environ.get("ML_PROFILE_ON_DEMAND", "").strip().lower() in ("1", "true", "yes"),
+        token=os.environ.get("ML_PROFILE_TOKEN") or None,
+        sample_every=int(os.environ.get("ML_PROFILE_SAMPLE_EVERY", 0)),
+    )
@@ -0,0 +1,105 @@
+import os
+import time
+import sqlite3
+import threading
+
+
+class InProcessBucketBackend:
+    """Bucket state held in memory, shared by the threads of one process"""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets = {}  # name -> (tokens, updated_at)
+
+    def take(self, name, tokens, rate, capacity, now):
+        """Take tokens if available; returns 0 on success, else seconds until they would be"""
+        with self._lock:
+            level, updated_at = self._buckets.get(name, (capacity, now))
+            level = min(capacity, level + (now - updated_at) * rate)
+            if level >= tokens:
+                self._buckets[name] = (level - tokens, now)
+                return 0.0
+            self._buckets[name] = (level, now)
+            return (tokens - level) / rate
+
+
+class SQLiteBucketBackend:
+    """Bucket state in a SQLite file, shared by every process (e.g. Gunicorn workers) on the host"""
+    def __init__(self, path="rate_limit.sqlite3"):
+        self.path = path
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS buckets ("
+                " name TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL)"
+            )
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            self._local.conn = conn
+        return conn
+
+    def take(self, name, tokens, rate, capacity, now):
+        conn = self._connect()
+        # BEGIN IMMEDIATE takes the write lock, so read-modify-write is atomic across processes
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT tokens, updated_at FROM buckets WHERE name = ?", (name,)).fetchone()
+            level, updated_at = row if row else (capacity, now)
+            level = min(capacity, level + max(0.0, now - updated_at) * rate)
+            wait = 0.0 if level >= tokens else (tokens - level) / rate
+            if wait == 0.0:
+                level -= tokens
+            conn.execute(
+                "INSERT OR REPLACE INTO buckets (name, tokens, updated_at) VALUES (?, ?, ?)",
+                (name, level, now),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return wait
+
+
+class TokenBucket:
+    """Token-bucket rate limiter that never has to block the caller
+
+    try_acquire() answers immediately; acquire(timeout) waits at most timeout
+    seconds. Either way the caller learns whether it may proceed and can serve
+    from a cache or queue the work instead of sleeping.
+    """
+    def __init__(self, rate, capacity, name="default", backend=None, clock=time.time):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self.name = name
+        self.backend = backend if backend is not None else InProcessBucketBackend()
+        # Wall-clock time so state stays meaningful across processes
+        self.clock = clock
+
+    def try_acquire(self, tokens=1):
+        """Returns (acquired, seconds_until_available) without waiting"""
+        wait = self.backend.take(self.name, tokens, self.rate, self.capacity, self.clock())
+        return wait == 0.0, wait
+
+    def acquire(self, tokens=1, timeout=0.0):
+        """Acquire tokens, waiting up to timeout seconds (0 = "would block" answer only)"""
+        deadline = time.monotonic() + (timeout or 0.0)
+        while True:
+            acquired, wait = self.try_acquire(tokens)
+            if acquired:
+                return True
+            remaining = deadline - time.monotonic()
+            if wait > remaining:
+                return False
+            time.sleep(wait)
+
+
+def rate_limiter_from_env(calls_per_minute=5):
+    """Yahoo Finance limiter configured by ML_RATE_LIMIT_BACKEND=memory|sqlite and ML_RATE_LIMIT_DB"""
+    backend_name = os.environ.get("ML_RATE_LIMIT_BACKEND", "memory").lower()
+    if backend_name == "sqlite":
+        backend = SQLiteBucketBackend(os.environ.get("ML_RATE_LIMIT_DB", "rate_limit.sqlite3"))
+    else:
+        backend = InProcessBucketBackend()
+    return TokenBucket(rate=calls_per_minute / 60.0, capacity=calls_per_minute, name="yahoo_finance", backend=backend)
@@ -0,0 +1,108 @@
+import threading
+import numpy as np
+import pandas as pd
+
+
+class MinMaxState:
+    """Running min/max of a ticker's closes, used as a fitted MinMaxScaler(feature_range=(0, 1))
+
+    update() folds in new bars only, so keeping the scaler current costs a
+    min and a max over the bars added since the last call. transform() and
+    inverse_transform() are one subtraction and one multiplication, and
+    accept the same shapes as the scikit-learn scaler.
+    """
+    def __init__(self, data_min=np.inf, data_max=-np.inf, last_date=None, count=0):
+        self.data_min = float(data_min)
+        self.data_max = float(data_max)
+        self.last_date = last_date
+        self.count = count
+
+    @classmethod
+    def fit(cls, closes, dates=None):
+        state = cls()
+        state.update(closes, dates)
+        return state
+
+    def update(self, closes, dates=None):
+        """Widen the range with bars dated after last_date (all bars if no dates); returns True if any were new"""
+        closes = np.asarray(closes, dtype=float).ravel()
+        if dates is not None:
+            dates = pd.DatetimeIndex(dates)
+            if self.last_date is not None:
+                new = dates > self.last_date
+                closes, dates = closes[new], dates[new]
+        if not len(closes):
+            return False
+
+        self.data_min = min(self.data_min, float(np.min(closes)))
+        self.data_max = max(self.data_max, float(np.max(closes)))
+        self.count += len(closes)
+        if dates is not None:
+            self.last_date = dates[-1]
+        return True
+
+    @property
+    def scale(self):
+        span = self.data_max - self.data_min
+        return 1.0 / span if span > 0 else 1.0  # MinMaxScaler treats constant input the same way
+
+    def transform(self, X):
+        return (np.asarray(X, dtype=float) - self.data_min) * self.scale
+
+    def inverse_transform(self, X):
+        return np.asarray(X, dtype=float) / self.scale + self.data_min
+
+    def copy(self):
+        return MinMaxState(self.data_min, self.data_max, self.last_date, self.count)
+
+    def to_dict(self):
+        return {
+            "data_min": self.data_min,
+            "data_max": self.data_max,
+            "last_date": None if self.last_date is None else str(self.last_date.date()),
+            "count": self.count,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        last_date = data.get("last_date")
+        return cls(data["data_min"], data["data_max"], None if last_date is None else pd.Timestamp(last_date),
+                   data.get("count", 0))
+
+
+class ScalerEngine:
+    """Per-ticker scalers for versioned models, kept current across requests
+
+    A model version starts from the scaler it was trained with (stored in its
+    metadata). Bars that arrive after training widen the range, and the
+    updated state is saved next to the model artifact, so restarts and other
+    workers continue from it. Versions published without a scaler start from
+    the first history they are served with.
+    """
+    def __init__(self, artifacts):
+        self.artifacts = artifacts
+        self._states = {}  # ticker -> (version, MinMaxState)
+        self._lock = threading.Lock()
+
+    def latest(self, ticker, version, df):
+        """Scaler for a ticker's model version, updated with the Close history in df (DataFrame indexed by date)"""
+        ticker = ticker.upper()
+        with self._lock:
+            cached = self._states.get(ticker)
+            state = cached[1] if cached is not None and cached[0] == version else self._load(ticker, version)
+            if state.update(df['Close'].to_numpy(dtype=float), df.index):
+                self.artifacts.save_scaler(ticker, version, state.to_dict())
+            self._states[ticker] = (version, state)
+            # Callers get a snapshot so a concurrent update cannot shift the range mid-request
+            return state.copy()
+
+    def _load(self, ticker, version):
+        saved = self.artifacts.scaler(ticker, version) or self.artifacts.metadata(ticker, version).get("scaler")
+        return MinMaxState.from_dict(saved) if saved else MinMaxState()
+
+    def reset(self, ticker=None):
+        with self._lock:
+            if ticker is None:
+                self._states.clear()
+            else:
+                self._states.pop(ticker.upper(), None)
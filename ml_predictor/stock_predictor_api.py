@@ -1,166 +1,326 @@
 import pandas as pd
 import numpy as np
-import yfinance as yf
 import datetime as dt
-from sklearn.preprocessing import MinMaxScaler
-from keras.models import Sequential, load_model
-from keras.layers import Dense, Dropout, LSTM, Bidirectional
-from keras.callbacks import EarlyStopping, ModelCheckpoint, ReduceLROnPlateau
 import os
 import warnings
 import time
 import random
-import requests
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from mock_data_provider import MockStockDataProvider
+from data_store import OHLCVStore
+from model_registry import ModelArtifacts, ModelRegistry, default_registry
+from training_queue import TrainingQueue
+from numpy_lstm import export_weights, npz_path_for
+from circuit_breaker import CircuitBreaker, classify_error, yahoo_finance_breaker
+from rate_limiter import rate_limiter_from_env
+from single_flight import SingleFlight
+from indicators import IndicatorEngine, compute_indicators
+from windowing import sliding_windows
+from async_fetch import fetch_universe
+from micro_batching import micro_batcher_from_env
+from profiling import profiling_active
+from scaling import MinMaxState, ScalerEngine
+from market_calendar import last_complete_bar_date
+from metrics import DATA_FALLBACKS, FETCH_RETRIES, FETCH_SKIPPED, PIPELINE_STAGE_SECONDS, PREDICTIONS, PROVIDER_ERRORS
+from prediction_cache import PredictionCache, prediction_cache_from_env
 warnings.filterwarnings('ignore')
 
-# Global variable to track API usage and implement simple rate limiting
-_last_api_call = 0
-_api_call_count = 0
-_max_calls_per_minute = 5
+# yfinance and keras/tensorflow are imported on first use so that
+# importing this module (and starting api_server.py) stays fast
 
-class StockPredictorAPI:
-    def __init__(self):
-        self.ticker = None
+# Yahoo Finance call budget shared by every StockPredictorAPI in the process
+# (or across processes with ML_RATE_LIMIT_BACKEND=sqlite)
+yahoo_finance_limiter = rate_limiter_from_env(calls_per_minute=5)
+
+class YahooFinanceProvider:
+    """Downloads daily OHLCV bars from Yahoo Finance over one shared keep-alive HTTP session"""
+    is_remote = True
+    
+    def __init__(self, max_connections=16):
+        # Pool size when falling back to requests (curl_cffi sizes its own pool)
+        self.max_connections = max_connections
+        self._session = None
+        self._session_lock = threading.Lock()
+    
+    @property
+    def session(self):
+        """HTTP session shared by every download (single requests and batch prefetches alike)"""
+        with self._session_lock:
+            if self._session is None:
+                self._session = self._new_session()
+            return self._session
+    
+    def _new_session(self):
+        try:
+            # What yfinance itself uses when available; Yahoo rejects many plain clients
+            from curl_cffi import requests as curl_requests
+            return curl_requests.Session(impersonate="chrome")
+        except ImportError:
+            import requests
+            from requests.adapters import HTTPAdapter
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_maxsize=self.max_connections)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            return session
+    
+    def download(self, ticker, start_date, end_date):
+        """Download bars for [start_date, end_date); Yahoo errors (429s, timeouts) are raised"""
+        import yfinance as yf
+        # Ticker.history raises its own errors. yf.download only logs them into a
+        # module-level dict that concurrent calls overwrite (and newer yfinance leaves
+        # empty), so a 429 would look like an empty, successful download.
+        return yf.Ticker(ticker, session=self.session).history(
+            start=start_date,
+            end=end_date,
+            interval="1d",
+            prepost=False,
+            auto_adjust=True,
+            actions=False,
+            keepna=False,
+            timeout=30,
+            raise_errors=True,
+        )
+
+def build_lstm_model(look_back=60):
+    """Bidirectional LSTM architecture used for every ticker model"""
+    from keras.models import Sequential
+    from keras.layers import Dense, Dropout, LSTM, Bidirectional
+    
+    model = Sequential()
+    model.add(Bidirectional(LSTM(50, return_sequences=True), input_shape=(look_back, 1)))
+    model.add(Dropout(0.2))
+    model.add(Bidirectional(LSTM(50)))
+    model.add(Dropout(0.2))
+    model.add(Dense(25, activation='relu'))
+    model.add(Dense(1))
+    
+    model.compile(optimizer='adam', loss='mean_squared_error')
+    return model
+
+class PredictionContext:
+    """Per-request prediction state (data, scaler, indicators, data source flag)"""
+    def __init__(self, ticker):
+        self.ticker = ticker.upper()
         self.df = None
         self.scaler = None
-        self.model = None
+        self.indicators = None
+        self.using_mock_data = False
+        self.model_version = None
+        self.training_job_id = None
+        self.artifact = None
+
+class LastValueModel:
+    """Naive fallback that predicts the last value of each window (used until a ticker's model is trained)"""
+    def predict(self, X, verbose=0):
+        return np.asarray(X)[:, -1, :]
+
+# One stateless instance, so naive predictions can share batched forward passes
+naive_model = LastValueModel()
+
+class StockPredictorAPI:
+    """Prediction pipeline; holds only shared, immutable resources so one instance can serve concurrent requests"""
+    # Seconds before the first download retry; doubles on each further retry
+    retry_base_delay = 2
+    
+    def __init__(self, provider=None, data_store=None, model_registry=None, model_artifacts=None, train_in_background=True,
+                 circuit_breaker=None, rate_limiter=None, rate_limit_timeout=0.0, prediction_cache=None,
+                 micro_batcher="env"):
         self.model_path = "stock_model.h5"
         self.mock_provider = MockStockDataProvider()
-        self.using_mock_data = False
+        self.provider = provider if provider is not None else YahooFinanceProvider()
+        self.data_store = data_store if data_store is not None else OHLCVStore()
+        self.model_registry = model_registry if model_registry is not None else default_registry
+        self.model_artifacts = model_artifacts if model_artifacts is not None else ModelArtifacts()
+        self.train_in_background = train_in_background
+        self.circuit_breaker = circuit_breaker if circuit_breaker is not None else yahoo_finance_breaker
+        self.rate_limiter = rate_limiter if rate_limiter is not None else yahoo_finance_limiter
+        # Seconds a request may wait for rate budget before serving stored/mock data instead
+        self.rate_limit_timeout = rate_limit_timeout
+        self.training_queue = TrainingQueue(self.train_ticker_model)
+        # ticker -> latest complete bar date the provider has been asked for (no bar yet: holiday)
+        self._checked_through = {}
+        self._checked_lock = threading.Lock()
+        self.single_flight = SingleFlight()
+        self.indicator_engine = IndicatorEngine()
+        self.scaler_engine = ScalerEngine(self.model_artifacts)
+        self.prediction_cache = prediction_cache if prediction_cache is not None else prediction_cache_from_env()
+        # Single-window predictions from concurrent requests share batched forward passes (None: direct calls)
+        self.micro_batcher = micro_batcher_from_env() if micro_batcher == "env" else micro_batcher
+        # New bars or a new model version make cached predictions for that ticker obsolete
+        self.data_store.listeners.append(self.prediction_cache.invalidate)
+        self.model_artifacts.listeners.append(self.prediction_cache.invalidate)
+    
+    def get_yahoo_finance_status(self):
+        """Get the current status of Yahoo Finance API from recent fetch outcomes (no network call)"""
+        return self.circuit_breaker.status()
     
-    def _wait_for_rate_limit(self):
-        """Implement simple rate limiting to avoid 429 errors"""
-        global _last_api_call, _api_call_count, _max_calls_per_minute
+    def fetch_data(self, ctx, days_back=365):
+        """Fetch historical data for the context's ticker, downloading only bars missing from the local store"""
+        ctx.using_mock_data = False
         
-        current_time = time.time()
+        now = self._now()
+        end_date = now.astimezone().replace(tzinfo=None)
+        start_date = end_date - dt.timedelta(days=days_back)
         
-        # Reset counter every minute
-        if current_time - _last_api_call > 60:
-            _api_call_count = 0
+        # Serve straight from the local store when it already has the latest complete bar
+        missing = self._missing_window(ctx.ticker, start_date, now)
+        if missing is None:
+            ctx.df = self.data_store.read(ctx.ticker, start=start_date)
+            print(f"✓ Using stored data for {ctx.ticker}: {len(ctx.df)} days (up to {ctx.df.index[-1].date()})")
+            return ctx.df
+        fetch_start, min_rows = missing
         
-        # If we've made too many calls, wait
-        if _api_call_count >= _max_calls_per_minute:
-            wait_time = 60 - (current_time - _last_api_call)
-            if wait_time > 0:
-                print(f"Rate limiting: waiting {wait_time:.1f}s before next API call...")
-                time.sleep(wait_time)
-                _api_call_count = 0
+        if getattr(self.provider, 'is_remote', False):
+            # Recent fetch outcomes decide whether to try Yahoo Finance at all
+            if not self.circuit_breaker.allow_request():
+                print("⚠ Yahoo Finance circuit is open (recent failures); skipping download.")
+                FETCH_SKIPPED.inc(reason="circuit_open")
+                return self._fallback_data(ctx, days_back, start_date)
+            
+            # Never sleep out the rate limit inside the request; serve what we have instead
+            if not self.rate_limiter.acquire(timeout=self.rate_limit_timeout):
+                print("⚠ Yahoo Finance call budget exhausted; not waiting for it.")
+                FETCH_SKIPPED.inc(reason="rate_budget")
+                # No call is made, so a half-open trial claimed above goes to the next request
+                self.circuit_breaker.release_trial()
+                return self._fallback_data(ctx, days_back, start_date)
         
-        _last_api_call = current_time
-        _api_call_count += 1
-    def _test_yahoo_finance_connectivity(self):
-        """Test if Yahoo Finance is accessible"""
-        try:
-            test_url = "https://finance.yahoo.com"
-            response = requests.get(test_url, timeout=10)
-            return response.status_code == 200
-        except:
+        new_data = self._download_with_retry(ctx.ticker, fetch_start, end_date, min_rows)
+        if new_data is None:
+            return self._fallback_data(ctx, days_back, start_date)
+        
+        added = self.data_store.append(ctx.ticker, self._complete_bars(new_data, ctx.ticker, now))
+        self._mark_checked(ctx.ticker, now)
+        ctx.df = self.data_store.read(ctx.ticker, start=start_date)
+        print(f"✓ Fetched {added} new bars for {ctx.ticker}; {len(ctx.df)} days available")
+        print(f"  Date range: {ctx.df.index[0].date()} to {ctx.df.index[-1].date()}")
+        print(f"  Latest price: ${ctx.df['Close'].iloc[-1]:.2f}")
+        return ctx.df
+    
+    def _missing_window(self, ticker, start_date, now):
+        """(fetch_start, min_rows) still to download for a ticker, or None if the store is current"""
+        last_stored = self.data_store.last_date(ticker)
+        if self._store_is_current(ticker, last_stored, now):
+            return None
+        if last_stored is not None:
+            # Re-request the last stored bar too (append replaces it) in case it was revised;
+            # an empty tail just means no new bars (e.g. market holiday)
+            return max(start_date, dt.datetime.combine(last_stored, dt.time())), 0
+        return start_date, 10  # Need at least 10 days for a fresh history
+    
+    def _store_is_current(self, ticker, last_stored, now):
+        """True if the store has the latest complete bar, or the provider had nothing newer when last asked"""
+        if last_stored is None:
             return False
+        expected = self._last_complete_bar_date(ticker, now)
+        with self._checked_lock:
+            checked = self._checked_through.get(ticker)
+        return last_stored >= expected or (checked is not None and checked >= expected)
     
-    def get_yahoo_finance_status(self):
-        """Get the current status of Yahoo Finance API"""
-        try:
-            # Test a simple ticker request
-            test_ticker = yf.Ticker("AAPL")
-            
-            # Try to get basic info (lighter request than historical data)
-            info = test_ticker.info
-            
-            if info and 'symbol' in info:
-                return {
-                    "status": "working",
-                    "message": "Yahoo Finance API is accessible"
-                }
-            else:
-                return {
-                    "status": "limited", 
-                    "message": "Yahoo Finance API has limited functionality"
-                }
-                
-        except Exception as e:
-            error_str = str(e).lower()
-            if any(term in error_str for term in ["429", "too many requests", "rate limit"]):
-                return {
-                    "status": "rate_limited",
-                    "message": "Yahoo Finance API is rate limited (429 error)"
-                }
-            elif any(term in error_str for term in ["timeout", "connection", "network"]):
-                return {
-                    "status": "network_error",
-                    "message": "Network connectivity issues with Yahoo Finance"
-                }
-            else:
-                return {
-                    "status": "error",
-                    "message": f"Yahoo Finance API error: {e}"
-                }
-    def fetch_data(self, ticker, days_back=365):
-        """Fetch historical data for the given ticker with robust retry logic"""
-        # First check connectivity
-        if not self._test_yahoo_finance_connectivity():
-            print("⚠ Yahoo Finance seems unreachable. Using mock data...")
-            self.df = self.mock_provider.generate_mock_data(ticker, days_back)
-            self.using_mock_data = True
-            return self.df
-        
-        # Wait for rate limiting
-        self._wait_for_rate_limit()
-        
-        end_date = dt.datetime.now()
-        start_date = end_date - dt.timedelta(days=days_back)
+    def _mark_checked(self, ticker, now):
+        """Record a successful fetch, so a trading day without a bar (holiday) is not re-fetched per request"""
+        with self._checked_lock:
+            self._checked_through[ticker] = self._last_complete_bar_date(ticker, now)
+    
+    def prefetch(self, tickers, days_back=365, max_concurrency=8):
+        """Bring the local store up to date for many tickers with concurrent async downloads
         
-        self.ticker = ticker.upper()
-        self.using_mock_data = False
+        Returns {ticker: number of new bars or error message} for the tickers that needed data.
+        """
+        now = self._now()
+        end_date = now.astimezone().replace(tzinfo=None)
+        start_date = end_date - dt.timedelta(days=days_back)
+        requests = {}
+        for ticker in dict.fromkeys(t.upper() for t in tickers):
+            missing = self._missing_window(ticker, start_date, now)
+            if missing is not None:
+                requests[ticker] = (missing[0], end_date, missing[1])
+        if not requests:
+            return {}
         
+        fetched = fetch_universe(
+            requests, self.provider, max_concurrency=max_concurrency,
+            rate_limiter=self.rate_limiter, max_rate_wait=self.rate_limit_timeout,
+            circuit_breaker=self.circuit_breaker,
+        )
+        summary = {}
+        for ticker, data in fetched.items():
+            if isinstance(data, Exception):
+                summary[ticker] = str(data)
+            else:
+                summary[ticker] = self.data_store.append(ticker, self._complete_bars(data, ticker, now))
+                self._mark_checked(ticker, now)
+        print(f"✓ Prefetched {sum(1 for v in summary.values() if isinstance(v, int))}/{len(requests)} tickers")
+        return summary
+    
+    def _now(self):
+        """Current time (timezone-aware)"""
+        return dt.datetime.now(dt.timezone.utc)
+    
+    def _last_complete_bar_date(self, ticker, now=None):
+        """Date of the ticker's most recent trading day whose daily bar is final, by the exchange's clock"""
+        return last_complete_bar_date(ticker, now if now is not None else self._now())
+    
+    def _complete_bars(self, df, ticker, now):
+        """Drop bars still forming at `now` (today's intraday bar), so the store only holds final bars"""
+        if df is None or df.empty:
+            return df
+        index = pd.DatetimeIndex(df.index)
+        if index.tz is not None:
+            index = index.tz_localize(None)
+        return df[index.normalize() <= pd.Timestamp(self._last_complete_bar_date(ticker, now))]
+    
+    def _download_with_retry(self, ticker, start_date, end_date, min_rows):
+        """Download bars from the provider with robust retry logic (None if all attempts fail)"""
         max_retries = 4  # Increased retries for rate limiting
-        base_delay = 2  # Base delay in seconds
+        base_delay = self.retry_base_delay
+        # Only a remote provider's outcomes say anything about Yahoo Finance's health
+        remote = getattr(self.provider, 'is_remote', False)
         
         for attempt in range(max_retries):
             try:
                 # Progressive delay for rate limiting
                 if attempt > 0:
+                    # Retries spend the same call budget as first attempts; check it before
+                    # backing off so a request never sleeps only to find no budget left
+                    if remote and not self.rate_limiter.try_acquire()[0]:
+                        print("  → Call budget exhausted; giving up on retries")
+                        break
                     # Exponential backoff with jitter
-                    delay = base_delay * (2 ** attempt) + random.uniform(0, 2)
+                    delay = base_delay * (2 ** attempt) + random.uniform(0, base_delay)
                     print(f"Yahoo Finance rate limited. Waiting {delay:.1f}s before retry {attempt + 1}/{max_retries}...")
+                    FETCH_RETRIES.inc()
                     time.sleep(delay)
                 
-                print(f"Attempting to fetch data for {self.ticker} (attempt {attempt + 1}/{max_retries})...")
-                
-                # Try to download data with more conservative settings
-                self.df = yf.download(
-                    self.ticker, 
-                    start=start_date, 
-                    end=end_date, 
-                    progress=False,
-                    prepost=False,
-                    auto_adjust=True,
-                    keepna=False,
-                    threads=False,  # Single-threaded to be more conservative
-                    timeout=30      # Add timeout
-                )
+                print(f"Attempting to fetch data for {ticker} from {start_date.date()} (attempt {attempt + 1}/{max_retries})...")
+                data = self.provider.download(ticker, start_date, end_date)
+                if remote:
+                    self.circuit_breaker.record_success()
                 
                 # Check if we got meaningful data
-                if not self.df.empty and len(self.df) > 10:  # Need at least 10 days
-                    print(f"✓ Successfully fetched real data for {self.ticker}: {len(self.df)} days")
-                    print(f"  Date range: {self.df.index[0].date()} to {self.df.index[-1].date()}")
-                    print(f"  Latest price: ${self.df['Close'].iloc[-1]:.2f}")
-                    return self.df
-                elif not self.df.empty:
-                    print(f"⚠ Got data but insufficient ({len(self.df)} days). Retrying...")
+                if data is not None and len(data) >= min_rows:
+                    return data
+                elif data is not None and not data.empty:
+                    print(f"⚠ Got data but insufficient ({len(data)} days). Retrying...")
                 else:
                     print(f"⚠ No data returned. Retrying...")
                     
             except Exception as e:
-                error_str = str(e).lower()
                 print(f"Yahoo Finance error (attempt {attempt + 1}/{max_retries}): {e}")
                 
                 # Check for specific error types
-                if any(term in error_str for term in ["429", "too many requests", "rate limit"]):
+                error_kind = self.circuit_breaker.record_failure(e) if remote else classify_error(e)
+                PROVIDER_ERRORS.inc(kind=error_kind)
+                if remote and self.circuit_breaker.state == CircuitBreaker.OPEN:
+                    print("  → Circuit opened; giving up on Yahoo Finance for now")
+                    break
+                if error_kind == "rate_limited":
                     print("  → Rate limiting detected")
                     if attempt < max_retries - 1:
                         continue
-                elif any(term in error_str for term in ["timeout", "connection", "network"]):
+                elif error_kind == "network_error":
                     print("  → Network issue detected")
                     if attempt < max_retries - 1:
                         continue
@@ -168,89 +328,145 @@ class StockPredictorAPI:
                     print(f"  → Other error: {e}")
                     # For other errors, still try to retry but with shorter delay
                     if attempt < max_retries - 1:
-                        time.sleep(1)
+                        time.sleep(base_delay / 2)
                         continue
         
-        # Fallback to mock data if all retries failed
-        print(f"\n⚠ Yahoo Finance failed after {max_retries} attempts. Using mock data for {ticker}...")
+        print(f"\n⚠ Yahoo Finance failed after {attempt + 1} attempts.")
         print("  This might be due to:")
         print("  - Rate limiting (too many requests)")
         print("  - Network connectivity issues")
         print("  - Yahoo Finance API maintenance")
         print("  - Invalid ticker symbol")
+        return None
+    
+    def _fallback_data(self, ctx, days_back, start_date):
+        """Serve stale stored history when offline, otherwise fall back to mock data"""
+        stored = self.data_store.read(ctx.ticker, start=start_date)
+        if stored is not None and not stored.empty:
+            print(f"  Using stored data for {ctx.ticker} (last bar {stored.index[-1].date()})")
+            DATA_FALLBACKS.inc(source="stored")
+            ctx.df = stored
+            return ctx.df
         
-        self.df = self.mock_provider.generate_mock_data(ticker, days_back)
-        self.using_mock_data = True
-        
-        return self.df
+        print(f"  Using mock data for {ctx.ticker}...")
+        DATA_FALLBACKS.inc(source="mock")
+        ctx.df = self.mock_provider.generate_mock_data(ctx.ticker, days_back)
+        ctx.using_mock_data = True
+        return ctx.df
+    
+    def add_technical_indicators(self, ctx):
+        """Compute the latest technical indicators (MA 10/20/50, RSI, MACD) for the context"""
+        if ctx.using_mock_data:
+            # Mock histories differ on every call; don't let them replace a ticker's rolling state
+            indicators = compute_indicators(ctx.df['Close'].to_numpy(dtype=float))
+            ctx.indicators = {key: float(values[-1]) for key, values in indicators.items()}
+        else:
+            # Only the bars added since the ticker's last request are processed
+            ctx.indicators = self.indicator_engine.latest(ctx.ticker, ctx.df)
+        return ctx.indicators
     
-    def add_technical_indicators(self):
-        """Add technical indicators to the dataframe"""
-        # Moving Averages
-        self.df['MA_10'] = self.df['Close'].rolling(window=10).mean()
-        self.df['MA_20'] = self.df['Close'].rolling(window=20).mean()
-        self.df['MA_50'] = self.df['Close'].rolling(window=50).mean()
+    def prepare_data_for_prediction(self, ctx, look_back=60):
+        """Scale the last look_back closes into the (1, look_back, 1) model input"""
+        closes = ctx.df['Close'].to_numpy(dtype=float)
+        if len(closes) < look_back:
+            raise ValueError(f"Not enough data. Need at least {look_back} days.")
         
-        # RSI
-        delta = self.df['Close'].diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-        rs = gain / loss
-        self.df['RSI'] = 100 - (100 / (1 + rs))
+        version, _ = self._resolve_artifact(ctx)
+        if version is not None and not ctx.using_mock_data:
+            # The ticker's own model: the scaler it was trained with, widened by the bars since
+            ctx.scaler = self.scaler_engine.latest(ctx.ticker, version, ctx.df)
+        else:
+            # Shared or naive model: scale to the fetched history
+            ctx.scaler = MinMaxState.fit(closes)
+        
+        return ctx.scaler.transform(closes[-look_back:]).reshape(1, look_back, 1)
+    
+    def _resolve_artifact(self, ctx):
+        """(version, path) of the ticker's newest model, looked up once per request so scaler and model match"""
+        if ctx.artifact is None:
+            ctx.artifact = self.model_artifacts.latest(ctx.ticker)
+        return ctx.artifact
+    
+    def build_and_train_model(self, ctx, look_back=60):
+        """Return the model to serve for the context's ticker, queueing training if it has none"""
+        version, path = self._resolve_artifact(ctx)
+        if path is not None:
+            # Deserialized once per process; a newly published version is picked up here
+            ctx.model_version = f"{ctx.ticker}/v{version}"
+            return self.model_registry.get(path)
         
-        # MACD
-        exp12 = self.df['Close'].ewm(span=12, adjust=False).mean()
-        exp26 = self.df['Close'].ewm(span=26, adjust=False).mean()
-        self.df['MACD'] = exp12 - exp26
+        # Untrained ticker: never train inside the request, answer with a fallback model meanwhile.
+        # Mock data means the provider is unavailable, and training refuses mock data anyway.
+        if self.train_in_background and not ctx.using_mock_data:
+            ctx.training_job_id = self.training_queue.submit(ctx.ticker)
         
-        # Fill any NaN values
-        self.df.ffill(inplace=True)
+        shared_version = self._shared_model_version()
+        if shared_version is not None:
+            ctx.model_version = shared_version
+            return self.model_registry.get(self.model_path)
         
-        return self.df
+        ctx.model_version = "naive"
+        return naive_model
     
-    def prepare_data_for_prediction(self, look_back=60):
-        """Prepare data for prediction"""
-        self.scaler = MinMaxScaler(feature_range=(0, 1))
-        scaled_data = self.scaler.fit_transform(self.df[['Close']].values)
+    def train_ticker_model(self, ticker, look_back=60):
+        """Train and publish a new model version for a ticker (runs on the training worker)"""
+        # Every server worker process has its own training queue; the artifact lock keeps
+        # them from training the same ticker at once
+        with self.model_artifacts.training_lock(ticker) as uncontended:
+            version, _ = self.model_artifacts.latest(ticker)
+            if not uncontended and version is not None:
+                print(f"✓ {ticker.upper()}/v{version} was just trained by another worker")
+                return version
+            return self._train_and_publish(ticker, look_back)
+    
+    def _train_and_publish(self, ticker, look_back):
+        ctx = PredictionContext(ticker)
+        self.fetch_data(ctx)
+        if ctx.using_mock_data:
+            raise RuntimeError(f"No market data available for {ctx.ticker}; not training on mock data")
         
-        # Get the last sequence for prediction
-        if len(scaled_data) < look_back:
-            raise ValueError(f"Not enough data. Need at least {look_back} days.")
-            
-        last_sequence = scaled_data[-look_back:]
-        return last_sequence.reshape(1, look_back, 1)
+        staging_path = self.model_artifacts.staging_path(ctx.ticker)
+        started = time.time()
+        try:
+            history = self._train_model(ctx, staging_path, look_back)
+            from keras.models import load_model
+            # Serve exactly what was checkpointed, and export it so serving workers can skip TensorFlow
+            model = load_model(staging_path)
+            export_weights(model, npz_path_for(staging_path))
+        except Exception:
+            for leftover in (staging_path, npz_path_for(staging_path)):
+                if os.path.exists(leftover):
+                    os.remove(leftover)
+            raise
+        
+        version, path = self.model_artifacts.publish(ctx.ticker, staging_path, metadata={
+            "look_back": look_back,
+            "training_days": len(ctx.df),
+            "last_bar": str(ctx.df.index[-1].date()),
+            "epochs": len(history.get("loss", [])),
+            "loss": min(history["loss"]) if history.get("loss") else None,
+            "val_loss": min(history["val_loss"]) if history.get("val_loss") else None,
+            "training_seconds": round(time.time() - started, 2),
+            "scaler": ctx.scaler.to_dict(),
+        })
+        self.model_registry.put(path, model)
+        print(f"✓ Published model {ctx.ticker}/v{version}")
+        return version
     
-    def build_and_train_model(self, look_back=60):
-        """Build and train the model if it doesn't exist"""
-        if os.path.exists(self.model_path):
-            print("Loading existing model...")
-            self.model = load_model(self.model_path)
-            return
-            
-        print("Training new model...")
+    def _train_model(self, ctx, model_path, look_back=60):
+        """Build and train a new model on the context's data, saving it to model_path; returns the loss history"""
+        print(f"Training new model for {ctx.ticker}...")
+        from keras.callbacks import EarlyStopping, ModelCheckpoint
         
-        # Prepare training data
-        self.scaler = MinMaxScaler(feature_range=(0, 1))
-        scaled_data = self.scaler.fit_transform(self.df[['Close']].values)
+        # Prepare training data; the scaler is published with the model so serving scales the same way
+        ctx.scaler = MinMaxState.fit(ctx.df['Close'].to_numpy(dtype=float), ctx.df.index)
+        scaled_data = ctx.scaler.transform(ctx.df[['Close']].to_numpy(dtype=float))
         
-        X, y = [], []
-        for i in range(look_back, len(scaled_data)):
-            X.append(scaled_data[i-look_back:i, 0])
-            y.append(scaled_data[i, 0])
-            
-        X, y = np.array(X), np.array(y)
-        X = np.reshape(X, (X.shape[0], X.shape[1], 1))
+        # (samples, look_back, 1) strided view of scaled_data, no per-sample copies
+        X, y = sliding_windows(scaled_data, look_back)
         
         # Build model
-        model = Sequential()
-        model.add(Bidirectional(LSTM(50, return_sequences=True), input_shape=(look_back, 1)))
-        model.add(Dropout(0.2))
-        model.add(Bidirectional(LSTM(50)))
-        model.add(Dropout(0.2))
-        model.add(Dense(25, activation='relu'))
-        model.add(Dense(1))
-        
-        model.compile(optimizer='adam', loss='mean_squared_error')
+        model = build_lstm_model(look_back)
           # Train model with validation split for better monitoring
         if len(X) > 100:  # Only use validation split if we have enough data
             validation_split = 0.2
@@ -263,67 +479,366 @@ class StockPredictorAPI:
         
         # Only add ModelCheckpoint if we have validation data
         if validation_split > 0:
-            callbacks.append(ModelCheckpoint(self.model_path, save_best_only=True, monitor='val_loss'))
+            callbacks.append(ModelCheckpoint(model_path, save_best_only=True, monitor='val_loss'))
         else:
-            callbacks.append(ModelCheckpoint(self.model_path, save_best_only=True, monitor='loss'))
+            callbacks.append(ModelCheckpoint(model_path, save_best_only=True, monitor='loss'))
         
-        model.fit(X, y, epochs=30, batch_size=16, 
+        history = model.fit(X, y, epochs=30, batch_size=16, 
                  validation_split=validation_split,
                  callbacks=callbacks, verbose=0)
-        self.model = model
         
         print("Model training completed and saved.")
+        return {key: [float(v) for v in values] for key, values in history.history.items()}
+    
+    def warm_up(self, tickers=(), look_back=60):
+        """Preload models and push a reference window through each model"""
+        started = time.time()
+        
+        models = []
+        if os.path.exists(self.model_path):
+            models.append(self.model_registry.get(self.model_path))
+        for ticker in tickers:
+            _, path = self.model_artifacts.latest(ticker)
+            if path is not None:
+                models.append(self.model_registry.get(path))
+        
+        # First predict call builds any lazily-initialised graph/buffers
+        reference_window = np.linspace(0, 1, look_back, dtype=np.float32).reshape(1, look_back, 1)
+        for model in models:
+            model.predict(reference_window, verbose=0)
+        
+        elapsed = time.time() - started
+        print(f"✓ Warm-up complete: {len(models)} model(s) loaded in {elapsed:.2f}s")
+        return elapsed
     
     def predict_next_day(self, ticker):
         """Predict next day price for given ticker"""
+        ticker = ticker.upper()
+        cached = self._cached_prediction(ticker)
+        if cached is not None:
+            PREDICTIONS.inc(status="success", cache="hit")
+            return cached
+        
+        # Concurrent requests for the same ticker, model version and data date share one computation
+        key = (ticker, self._model_version_key(ticker), self._last_complete_bar_date(ticker))
+        with PIPELINE_STAGE_SECONDS.time(stage="total"):
+            result, _ = self.single_flight.do(key, lambda: self._predict_next_day(ticker))
+        result = dict(result)
+        result["cache_status"] = "MISS"
+        PREDICTIONS.inc(status="success" if result["success"] else "error", cache="miss")
+        return result
+    
+    def _cached_prediction(self, ticker, horizon=None):
+        """Cached result if the stored data is current and the same model version produced it"""
+        last_stored = self.data_store.last_date(ticker)
+        if not self._store_is_current(ticker, last_stored, self._now()):
+            return None
+        
+        key = PredictionCache.make_key(ticker, last_stored, self._cache_version(self._model_version_key(ticker), horizon))
+        result, _ = self.prediction_cache.get(key)
+        if result is not None:
+            result["cache_status"] = "HIT"
+        return result
+    
+    def _cache_result(self, ctx, result, horizon=None):
+        """Cache a successful prediction made from real (non-mock) data"""
+        if result["success"] and not ctx.using_mock_data:
+            key = PredictionCache.make_key(ctx.ticker, ctx.df.index[-1].date(), self._cache_version(ctx.model_version, horizon))
+            self.prediction_cache.put(key, result)
+    
+    @staticmethod
+    def _cache_version(model_version, horizon):
+        """Cache key version part; horizon forecasts are cached separately from next-day predictions"""
+        return model_version if horizon is None else f"{model_version}@h{horizon}"
+    
+    def _model_version_key(self, ticker):
+        """Model version a prediction for ticker would currently use (cheap; no model load)"""
+        version, _ = self.model_artifacts.latest(ticker)
+        if version is not None:
+            return f"{ticker}/v{version}"
+        return self._shared_model_version() or "naive"
+    
+    def _shared_model_version(self):
+        """Version of the shared model file, tagged with its mtime and size so a replaced file is a new version"""
         try:
-            # Fetch data
-            self.fetch_data(ticker)
-            self.add_technical_indicators()
-            
-            # Prepare data
-            X_pred = self.prepare_data_for_prediction()
+            mtime_ns, size = ModelRegistry._signature(self.model_path)
+        except OSError:
+            return None
+        return f"shared@{mtime_ns}-{size}"
+    
+    def _predict_next_day(self, ticker):
+        # All per-request state lives on the context so concurrent requests never share it
+        ctx = PredictionContext(ticker)
+        try:
+            # Fetch data and prepare the input window
+            X_pred = self._prepare_context(ctx)
             
             # Load or train model
-            self.build_and_train_model()
-              # Make prediction
-            prediction_scaled = self.model.predict(X_pred, verbose=0)
-            prediction = float(self.scaler.inverse_transform(prediction_scaled)[0, 0])
-            
-            # Get current price
-            current_price = float(self.df['Close'].iloc[-1])
+            with PIPELINE_STAGE_SECONDS.time(stage="model_lookup"):
+                model = self.build_and_train_model(ctx)
             
-            # Calculate change
-            price_change = float(prediction - current_price)
-            percent_change = float((price_change / current_price) * 100)
-            
-            # Generate explanation based on technical indicators
-            explanation = self._generate_explanation(current_price, prediction)
-            return {
-                "success": True,
-                "ticker": str(ticker.upper()),
-                "current_price": float(round(current_price, 2)),
-                "predicted_price": float(round(prediction, 2)),
-                "price_change": float(round(price_change, 2)),
-                "percent_change": float(round(percent_change, 2)),
-                "explanation": str(explanation),
-                "prediction_date": str((dt.datetime.now() + dt.timedelta(days=1)).strftime("%Y-%m-%d")),                "using_mock_data": bool(self.using_mock_data)
-            }
+            # Make prediction (batched with other in-flight requests for the same model)
+            with PIPELINE_STAGE_SECONDS.time(stage="predict"):
+                # A profiled request predicts on its own thread so the model time shows in its profile
+                if self.micro_batcher is not None and not profiling_active():
+                    prediction_scaled = self.micro_batcher.predict(model, X_pred)
+                else:
+                    prediction_scaled = model.predict(X_pred, verbose=0)
+            result = self._build_result(ctx, prediction_scaled[0, 0])
+            self._cache_result(ctx, result)
+            return result
             
         except Exception as e:
-            return {
-                "success": False,
-                "error": str(e),
-                "ticker": str(ticker.upper())
-            }
+            return self._error_result(ticker, e)
+    
+    def predict_many(self, tickers, max_workers=8):
+        """Predict next day prices for many tickers with one batched model.predict per model"""
+        tickers, results, groups = self._prepare_many(tickers, max_workers)
+        
+        for model, members in groups.values():
+            try:
+                X_batch = np.concatenate([X for _, X in members], axis=0)
+                with PIPELINE_STAGE_SECONDS.time(stage="predict_batch"):
+                    predictions_scaled = model.predict(X_batch, verbose=0)
+            except Exception as e:
+                for ctx, _ in members:
+                    results[ctx.ticker] = self._error_result(ctx.ticker, e)
+                continue
+            for (ctx, _), prediction_scaled in zip(members, predictions_scaled[:, 0]):
+                try:
+                    result = self._build_result(ctx, prediction_scaled)
+                    self._cache_result(ctx, result)
+                    result["cache_status"] = "MISS"
+                    results[ctx.ticker] = result
+                except Exception as e:
+                    results[ctx.ticker] = self._error_result(ctx.ticker, e)
+        
+        return self._batch_summary(tickers, results)
+    
+    def predict_stream(self, tickers, max_workers=8, heartbeat=None):
+        """Yield next-day results as they become available: cache hits first, then each ticker as it completes
+        
+        With heartbeat (seconds), None is yielded whenever nothing completed for that long, so
+        callers can keep a connection alive. Closing the generator (e.g. the client went away)
+        cancels tickers that have not started; ones already running finish and are cached.
+        """
+        tickers = list(dict.fromkeys(t.strip().upper() for t in tickers if t and t.strip()))
+        pending = []
+        for ticker in tickers:
+            cached = self._cached_prediction(ticker)
+            if cached is not None:
+                PREDICTIONS.inc(status="success", cache="hit")
+                yield cached
+            else:
+                pending.append(ticker)
+        if not pending:
+            return
+        
+        # Tickers computing together still share forward passes through the micro-batcher
+        pool = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(pending))))
+        try:
+            futures = {pool.submit(self.predict_next_day, ticker): ticker for ticker in pending}
+            waiting = set(futures)
+            while waiting:
+                done, waiting = wait(waiting, timeout=heartbeat, return_when=FIRST_COMPLETED)
+                if not done:
+                    yield None
+                for future in done:
+                    try:
+                        yield future.result()
+                    except Exception as e:
+                        yield self._error_result(futures[future], e)
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
     
-    def _generate_explanation(self, current_price, predicted_price):
+    def predict_horizon(self, ticker, steps):
+        """Predict a path of daily prices `steps` trading days ahead for a ticker"""
+        return self.predict_horizon_many([ticker], steps)["results"][0]
+    
+    def predict_horizon_many(self, tickers, steps, max_workers=8):
+        """Multi-step forecasts for many tickers
+        
+        Each model's tickers are rolled forward together: every step is one batched
+        predict over all their windows, so an N-ticker, S-step forecast costs S
+        forward passes per model rather than N × S.
+        """
+        steps = int(steps)
+        if steps < 1:
+            raise ValueError("Horizon must be at least 1 step")
+        tickers, results, groups = self._prepare_many(tickers, max_workers, horizon=steps)
+        
+        for model, members in groups.values():
+            try:
+                with PIPELINE_STAGE_SECONDS.time(stage="predict_horizon"):
+                    paths_scaled = self._rollout(model, np.concatenate([X for _, X in members], axis=0), steps)
+            except Exception as e:
+                for ctx, _ in members:
+                    results[ctx.ticker] = self._error_result(ctx.ticker, e)
+                continue
+            for (ctx, _), path_scaled in zip(members, paths_scaled):
+                try:
+                    result = self._build_horizon_result(ctx, path_scaled)
+                    self._cache_result(ctx, result, horizon=steps)
+                    result["cache_status"] = "MISS"
+                    results[ctx.ticker] = result
+                except Exception as e:
+                    results[ctx.ticker] = self._error_result(ctx.ticker, e)
+        
+        return self._batch_summary(tickers, results)
+    
+    @staticmethod
+    def _rollout(model, windows, steps):
+        """Recursive forecast: feed each step's predictions back in as the newest window value
+        
+        windows is (N, look_back, 1); returns (N, steps) scaled predictions.
+        """
+        windows = np.array(windows, dtype=np.float32)
+        paths = np.empty((len(windows), steps), dtype=np.float32)
+        for step in range(steps):
+            paths[:, step] = np.asarray(model.predict(windows, verbose=0))[:, 0]
+            # Slide every window left by one and append this step's predictions
+            windows[:, :-1, :] = windows[:, 1:, :]
+            windows[:, -1, 0] = paths[:, step]
+        return paths
+    
+    def _prepare_many(self, tickers, max_workers=8, horizon=None):
+        """Resolve cache hits and prepare the rest, grouped by the model that serves them
+        
+        Returns (tickers, results, groups): the de-duplicated tickers, results found so
+        far (cache hits and failures), and {id(model): (model, [(ctx, X), ...])}.
+        """
+        # Preserve request order, ignore duplicates
+        tickers = list(dict.fromkeys(t.strip().upper() for t in tickers if t and t.strip()))
+        results = {}
+        # Cached results need no data fetch or model call
+        for ticker in tickers:
+            cached = self._cached_prediction(ticker, horizon=horizon)
+            if cached is not None:
+                results[ticker] = cached
+        
+        def prepare(ticker):
+            ctx = PredictionContext(ticker)
+            try:
+                return ctx, self._prepare_context(ctx)
+            except Exception as e:
+                results[ticker] = self._error_result(ticker, e)
+                return ctx, None
+        
+        # Fetching is I/O bound and the pipeline is stateless, so prepare tickers in parallel
+        pending = [ticker for ticker in tickers if ticker not in results]
+        if getattr(self.provider, 'is_remote', False) and len(pending) > 1:
+            # Download all stale tickers concurrently up front; prepare() then reads the store
+            try:
+                self.prefetch(pending)
+            except Exception as e:
+                print(f"⚠ Prefetch failed, fetching per ticker: {e}")
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(pending) or 1))) as pool:
+            prepared = [(ctx, X) for ctx, X in pool.map(prepare, pending) if X is not None]
+        
+        # Contexts served by the same model share one forward pass over an (N, look_back, 1) batch
+        groups = {}
+        for ctx, X in prepared:
+            try:
+                with PIPELINE_STAGE_SECONDS.time(stage="model_lookup"):
+                    model = self.build_and_train_model(ctx)
+            except Exception as e:
+                results[ctx.ticker] = self._error_result(ctx.ticker, e)
+                continue
+            groups.setdefault(id(model), (model, []))[1].append((ctx, X))
+        return tickers, results, groups
+    
+    def _batch_summary(self, tickers, results):
+        ordered = [results[ticker] for ticker in tickers]
+        for r in ordered:
+            PREDICTIONS.inc(status="success" if r["success"] else "error", cache=r.get("cache_status", "miss").lower())
+        succeeded = sum(1 for r in ordered if r["success"])
+        return {
+            "success": succeeded > 0,
+            "count": len(ordered),
+            "succeeded": succeeded,
+            "failed": len(ordered) - succeeded,
+            "cache_hits": sum(1 for r in ordered if r.get("cache_status") == "HIT"),
+            "results": ordered
+        }
+    
+    def _prepare_context(self, ctx):
+        """Fetch data, add indicators and return the scaled input window for a context"""
+        with PIPELINE_STAGE_SECONDS.time(stage="fetch"):
+            self.fetch_data(ctx)
+        with PIPELINE_STAGE_SECONDS.time(stage="indicators"):
+            self.add_technical_indicators(ctx)
+        with PIPELINE_STAGE_SECONDS.time(stage="scale"):
+            return self.prepare_data_for_prediction(ctx)
+    
+    def _build_result(self, ctx, prediction_scaled):
+        """Turn a scaled model output into the prediction response for a context"""
+        prediction = float(ctx.scaler.inverse_transform([[prediction_scaled]])[0, 0])
+        
+        # Get current price
+        current_price = float(ctx.df['Close'].iloc[-1])
+        
+        # Calculate change
+        price_change = float(prediction - current_price)
+        percent_change = float((price_change / current_price) * 100)
+        
+        # Generate explanation based on technical indicators
+        explanation = self._generate_explanation(ctx, current_price, prediction)
+        return {
+            "success": True,
+            "ticker": str(ctx.ticker),
+            "current_price": float(round(current_price, 2)),
+            "predicted_price": float(round(prediction, 2)),
+            "price_change": float(round(price_change, 2)),
+            "percent_change": float(round(percent_change, 2)),
+            "explanation": str(explanation),
+            "prediction_date": str((dt.datetime.now() + dt.timedelta(days=1)).strftime("%Y-%m-%d")),
+            "using_mock_data": bool(ctx.using_mock_data),
+            "model_version": ctx.model_version,
+            "training_job_id": ctx.training_job_id
+        }
+    
+    def _build_horizon_result(self, ctx, path_scaled):
+        """Turn a scaled multi-step path into the horizon response for a context"""
+        path = ctx.scaler.inverse_transform(np.asarray(path_scaled, dtype=float).reshape(-1, 1))[:, 0]
+        current_price = float(ctx.df['Close'].iloc[-1])
+        final_price = float(path[-1])
+        price_change = final_price - current_price
+        
+        # One step per trading day after the last bar
+        dates = pd.bdate_range(ctx.df.index[-1] + pd.offsets.BDay(1), periods=len(path))
+        return {
+            "success": True,
+            "ticker": str(ctx.ticker),
+            "horizon": int(len(path)),
+            "current_price": float(round(current_price, 2)),
+            "predicted_price": float(round(final_price, 2)),
+            "price_change": float(round(price_change, 2)),
+            "percent_change": float(round(price_change / current_price * 100, 2)),
+            "path": [
+                {"date": date.strftime("%Y-%m-%d"), "predicted_price": float(round(price, 2))}
+                for date, price in zip(dates, path)
+            ],
+            "explanation": str(self._generate_explanation(ctx, current_price, final_price)),
+            "using_mock_data": bool(ctx.using_mock_data),
+            "model_version": ctx.model_version,
+            "training_job_id": ctx.training_job_id
+        }
+    
+    def _error_result(self, ticker, error):
+        """Failure response for a ticker"""
+        return {
+            "success": False,
+            "error": str(error),
+            "ticker": str(ticker.upper())
+        }
+    
+    def _generate_explanation(self, ctx, current_price, predicted_price):
         """Generate explanation based on technical indicators and prediction"""
         change_percent = float(((predicted_price - current_price) / current_price) * 100)
         
         # Get latest technical indicators (convert to Python native types)
-        latest_rsi = float(self.df['RSI'].iloc[-1]) if not pd.isna(self.df['RSI'].iloc[-1]) else 50.0
-        latest_macd = float(self.df['MACD'].iloc[-1]) if not pd.isna(self.df['MACD'].iloc[-1]) else 0.0
+        latest_rsi = float(ctx.indicators['RSI']) if not pd.isna(ctx.indicators['RSI']) else 50.0
+        latest_macd = float(ctx.indicators['MACD']) if not pd.isna(ctx.indicators['MACD']) else 0.0
         
         trend_direction = "bullish" if change_percent > 0 else "bearish"
         confidence = float(min(abs(change_percent) * 10, 85))  # Cap confidence at 85%
@@ -345,9 +860,12 @@ class StockPredictorAPI:
         explanation += f"{rsi_signal}{macd_signal}"
         explanation += f"Model confidence: {confidence:.1f}%. "
         
-        if self.using_mock_data:
+        if ctx.using_mock_data:
             explanation += "[Note: Using simulated data due to Yahoo Finance rate limiting]"
         
+        if ctx.training_job_id:
+            explanation += f"[Note: A dedicated model for {ctx.ticker} is being trained; this is a fallback estimate]"
+        
         return explanation
 
 # Simple CLI interface for testing
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Check the async fetch layer against the mock provider (no network)
+"""
+
+import os
+import sys
+import asyncio
+import threading
+import datetime as dt
+
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from async_fetch import AsyncFetcher, AsyncProviderSource, fetch_universe
+from circuit_breaker import CircuitBreaker
+from rate_limiter import TokenBucket
+from mock_data_provider import MockStockDataProvider
+from stock_predictor_api import YahooFinanceProvider
+
+START = dt.datetime(2024, 1, 1)
+END = dt.datetime(2024, 3, 1)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class ConcurrencyProbe:
+    """Wraps a source and records the peak number of downloads in flight"""
+    def __init__(self, source):
+        self.source = source
+        self.is_remote = False
+        self.in_flight = 0
+        self.peak = 0
+
+    async def download(self, ticker, start_date, end_date):
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            await asyncio.sleep(0.01)
+            return await self.source.download(ticker, start_date, end_date)
+        finally:
+            self.in_flight -= 1
+
+
+def test_fetch_many_from_mock_provider():
+    """Every ticker is fetched, never more than max_concurrency at a time"""
+    provider = MockStockDataProvider(seed=1)
+    probe = ConcurrencyProbe(AsyncProviderSource(provider))
+    tickers = [f"T{i:02d}" for i in range(20)]
+
+    async def run():
+        fetcher = AsyncFetcher(probe, max_concurrency=4)
+        return await fetcher.fetch_many({t: (START, END, 10) for t in tickers})
+
+    results = asyncio.run(run())
+    assert list(results) == tickers
+    assert all(isinstance(df, pd.DataFrame) and len(df) >= 10 for df in results.values())
+    assert probe.peak == 4
+
+
+class FlakyRemoteProvider(MockStockDataProvider):
+    """Synchronous remote provider whose first call per ticker answers 429; records the calling threads"""
+    is_remote = True
+
+    def __init__(self):
+        super().__init__(seed=2)
+        self.calls = []
+        self.threads = set()
+
+    def download(self, ticker, start_date, end_date):
+        self.calls.append(ticker)
+        self.threads.add(threading.get_ident())
+        if self.calls.count(ticker) == 1:
+            raise RuntimeError("429 Too Many Requests")
+        return super().download(ticker, start_date, end_date)
+
+
+def test_remote_provider_in_worker_threads():
+    """A blocking provider is driven off the event loop; rate-limited attempts are retried and spend budget"""
+    provider = FlakyRemoteProvider()
+    breaker = CircuitBreaker(failure_threshold=10, clock=FakeClock())
+    budget = TokenBucket(rate=0.001, capacity=6, clock=FakeClock())
+    tickers = ["AAA", "BBB", "CCC"]
+
+    async def run():
+        fetcher = AsyncFetcher(AsyncProviderSource(provider), max_concurrency=2, rate_limiter=budget,
+                               circuit_breaker=breaker, base_delay=0.01)
+        return await fetcher.fetch_many({t: (START, END, 10) for t in tickers})
+
+    results = asyncio.run(run())
+    assert all(isinstance(results[t], pd.DataFrame) for t in tickers)
+    assert sorted(provider.calls) == sorted(tickers * 2)
+    assert threading.get_ident() not in provider.threads
+    assert not budget.try_acquire()[0]  # one token per attempt
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_budget_skip_releases_half_open_trial():
+    """A half-open fetch that finds no call budget hands the trial back instead of wedging the breaker"""
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=60, clock=clock)
+    breaker.record_failure(ConnectionError("Connection reset by peer"))
+    clock.now += 60
+    budget = TokenBucket(rate=0.001, capacity=1, clock=clock)
+    assert budget.try_acquire()[0]  # spent
+
+    provider = FlakyRemoteProvider()
+    fetcher_kwargs = dict(rate_limiter=budget, circuit_breaker=breaker, max_rate_wait=0)
+    results = fetch_universe({"AAA": (START, END, 10)}, provider, **fetcher_kwargs)
+    assert isinstance(results["AAA"], RuntimeError) and "budget" in str(results["AAA"])
+    assert provider.calls == []
+    assert breaker.state == CircuitBreaker.HALF_OPEN and breaker.allow_request()
+
+
+class RecordingTicker:
+    """Stands in for yfinance.Ticker; records the session each download was made with"""
+    sessions = []
+    mock = MockStockDataProvider(seed=6)
+
+    def __init__(self, ticker, session=None):
+        self.ticker = ticker
+        RecordingTicker.sessions.append(session)
+
+    def history(self, start, end, **kwargs):
+        return RecordingTicker.mock.download(self.ticker, start, end)
+
+
+def test_yahoo_downloads_share_one_session():
+    """Concurrent batch downloads all go through the provider's one keep-alive session"""
+    import yfinance
+    provider = YahooFinanceProvider()
+    RecordingTicker.sessions = []
+    original = yfinance.Ticker
+    yfinance.Ticker = RecordingTicker
+    try:
+        results = fetch_universe({f"T{i:02d}": (START, END, 10) for i in range(12)}, provider, max_concurrency=4)
+    finally:
+        yfinance.Ticker = original
+
+    assert all(isinstance(df, pd.DataFrame) and len(df) >= 10 for df in results.values())
+    assert len(RecordingTicker.sessions) == 12
+    assert all(session is provider.session for session in RecordingTicker.sessions)
+
+
+def main():
+    """Run the checks"""
+    try:
+        test_fetch_many_from_mock_provider()
+        test_remote_provider_in_worker_threads()
+        test_budget_skip_releases_half_open_trial()
+        test_yahoo_downloads_share_one_session()
+        print("✅ Async fetch layer bounds concurrency, retries in worker threads and releases unused trials")
+    except AssertionError as e:
+        print(f"❌ Async fetch check failed: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Check the walk-forward backtest against a per-day loop using the serving scaler
+"""
+
+import os
+import sys
+import tempfile
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import MinMaxScaler
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from backtest import WalkForwardBacktest, forecast_metrics, rolling_min_max, run_published, synthetic_chunks
+from mock_data_provider import SyntheticMarket
+from data_store import OHLCVStore
+from model_registry import ModelArtifacts, ModelRegistry
+from scaling import MinMaxState
+from stock_predictor_api import LastValueModel
+from testing_helpers import MeanModel
+
+
+def test_rolling_min_max_matches_pandas(window=7):
+    values = np.random.default_rng(0).random((3, 50))
+    low, high = rolling_min_max(values, window)
+    for row in range(len(values)):
+        series = pd.Series(values[row])
+        np.testing.assert_allclose(low[row], series.rolling(window).min().to_numpy())
+        np.testing.assert_allclose(high[row], series.rolling(window).max().to_numpy())
+
+
+def test_walk_forward_matches_loop(look_back=20, scale_window=40):
+    """Batched predictions equal one-window-at-a-time predictions with a fitted MinMaxScaler"""
+    closes = SyntheticMarket(["AAA", "BBB", "CCC"], days=120, seed=4).close_block()
+    backtest = WalkForwardBacktest(MeanModel(), look_back=look_back, scale_window=scale_window, batch_size=37)
+    days, predictions = backtest.predict_block(closes)
+    assert days[0] == scale_window - 1 and days[-1] == closes.shape[1] - 2
+
+    for row in range(len(closes)):
+        for col, day in enumerate(days):
+            scaler = MinMaxScaler().fit(closes[row, day - scale_window + 1:day + 1, None])
+            window = scaler.transform(closes[row, day - look_back + 1:day + 1, None])
+            expected = scaler.inverse_transform(MeanModel().predict(window[None]))[0, 0]
+            assert abs(predictions[row, col] - expected) < 1e-4 * expected
+
+
+def test_naive_model_metrics():
+    """The last-price model's error is exactly the naive baseline and it never calls a direction"""
+    market = SyntheticMarket([f"SYN{i}" for i in range(10)], days=400, seed=1)
+    report = WalkForwardBacktest(LastValueModel()).run_chunks(synthetic_chunks(market, chunk_size=4))
+    assert report["tickers"] == 10
+    assert report["samples"] == 10 * (400 - 252)
+    for metrics in report["per_ticker"].values():
+        assert abs(metrics["mae"] - metrics["naive_mae"]) < 1e-6 * metrics["naive_mae"]
+        assert metrics["strategy_return"] == 0.0
+
+
+def test_strategy_wipe_out_is_a_total_loss():
+    """A short through a more-than-doubling loses everything instead of turning the return into NaN"""
+    current = np.array([[100.0, 100.0, 100.0]])
+    predicted = np.array([[90.0, 110.0, 90.0]])  # short, long, short
+    actual = np.array([[250.0, 110.0, 90.0]])
+    metrics = forecast_metrics(current, predicted, actual)
+    assert metrics["strategy_return"][0] == -1.0
+
+    metrics = forecast_metrics(current[:, 1:], predicted[:, 1:], actual[:, 1:])
+    assert abs(metrics["strategy_return"][0] - (1.1 * 1.1 - 1)) < 1e-12
+
+
+class OffsetModel(MeanModel):
+    """Predicts the window mean plus a constant in scaled units, so its prices depend on the scaling range"""
+    def predict(self, X, verbose=0):
+        return super().predict(X) + 0.05
+
+
+def test_published_models_use_their_training_scaler(look_back=20, days=120, trained_days=80):
+    """Stored tickers are backtested with their own model, scaled by the training range widened by later bars"""
+    frame = SyntheticMarket(["AAA"], days=days, seed=6).frame("AAA")
+    closes = frame["Close"].to_numpy()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        store = OHLCVStore(os.path.join(tmp_dir, "market_data"))
+        store.append("AAA", frame)
+        store.append("BBB", frame)
+        artifacts = ModelArtifacts(os.path.join(tmp_dir, "models"))
+        training_scaler = MinMaxState.fit(closes[:trained_days]).to_dict()
+        staging_path = artifacts.staging_path("AAA")
+        open(staging_path, "w").close()
+        artifacts.publish("AAA", staging_path, {"scaler": training_scaler})
+        # The serving scaler has already seen the whole history; the backtest must not use it
+        artifacts.save_scaler("AAA", 1, MinMaxState.fit(closes).to_dict())
+
+        report = run_published(store, artifacts, ["AAA", "BBB"], days, look_back=look_back,
+                               registry=ModelRegistry(loader=lambda path: OffsetModel()))
+        assert list(report["per_ticker"]) == ["AAA"]
+        assert report["samples"] == days - look_back
+
+    expected = []
+    for day in range(look_back - 1, days - 1):
+        state = MinMaxState.from_dict(training_scaler)
+        state.update(closes[:day + 1])
+        window = state.transform(closes[day - look_back + 1:day + 1])
+        expected.append(state.inverse_transform(OffsetModel().predict(window[None, :, None]))[0, 0])
+    expected = np.array(expected)
+    mae = np.abs(expected - closes[look_back:]).mean()
+    assert abs(report["per_ticker"]["AAA"]["mae"] - mae) < 1e-4 * mae
+
+
+def main():
+    """Run the checks"""
+    try:
+        test_rolling_min_max_matches_pandas()
+        test_walk_forward_matches_loop()
+        test_naive_model_metrics()
+        test_strategy_wipe_out_is_a_total_loss()
+        test_published_models_use_their_training_scaler()
+        print("✅ Walk-forward backtest matches the per-day loop")
+    except AssertionError as e:
+        print(f"❌ Backtest check failed: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
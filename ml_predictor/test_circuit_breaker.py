@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Check the provider circuit breaker state machine (no network, fake clock)
+"""
+
+import os
+import sys
+import time
+import tempfile
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from circuit_breaker import CircuitBreaker, classify_error
+from rate_limiter import TokenBucket
+from metrics import PROVIDER_ERRORS
+from mock_data_provider import MockStockDataProvider
+from stock_predictor_api import YahooFinanceProvider
+from testing_helpers import make_predictor
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+NETWORK_ERROR = ConnectionError("Connection reset by peer")
+RATE_LIMITED = RuntimeError("429 Too Many Requests")
+
+
+def open_breaker(clock, threshold=3, recovery=60):
+    breaker = CircuitBreaker(failure_threshold=threshold, recovery_timeout=recovery, clock=clock)
+    for _ in range(threshold):
+        breaker.record_failure(NETWORK_ERROR)
+    return breaker
+
+
+def test_error_classification():
+    assert classify_error(RATE_LIMITED) == "rate_limited"
+    assert classify_error(NETWORK_ERROR) == "network_error"
+    assert classify_error(ValueError("No data found for ticker ZZZZ")) == "error"
+
+
+def test_failure_threshold():
+    """The circuit opens after failure_threshold consecutive provider failures; a success resets the count"""
+    breaker = CircuitBreaker(failure_threshold=3, clock=FakeClock())
+    breaker.record_failure(NETWORK_ERROR)
+    breaker.record_failure(RATE_LIMITED)
+    breaker.record_success()
+    breaker.record_failure(NETWORK_ERROR)
+    breaker.record_failure(NETWORK_ERROR)
+    assert breaker.state == CircuitBreaker.CLOSED and breaker.allow_request()
+
+    breaker.record_failure(RATE_LIMITED)
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow_request()
+    assert breaker.status()["status"] == "rate_limited"
+
+
+def test_error_kind_does_not_trip():
+    """Errors such as an unknown ticker say nothing about provider health"""
+    breaker = CircuitBreaker(failure_threshold=2, clock=FakeClock())
+    for _ in range(10):
+        assert breaker.record_failure(ValueError("No data found for ticker ZZZZ")) == "error"
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.status()["consecutive_failures"] == 0
+
+
+def test_recovery_timeout_and_single_trial():
+    """After recovery_timeout one trial is let through at a time; its outcome closes or re-opens the circuit"""
+    clock = FakeClock()
+    breaker = open_breaker(clock, recovery=60)
+    clock.now += 59
+    assert breaker.state == CircuitBreaker.OPEN and not breaker.allow_request()
+
+    clock.now += 1
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow_request()
+    assert not breaker.allow_request()  # the trial is in flight
+
+    breaker.record_failure(NETWORK_ERROR)
+    assert breaker.state == CircuitBreaker.OPEN and not breaker.allow_request()
+
+    clock.now += 60
+    assert breaker.allow_request()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow_request() and breaker.allow_request()
+
+
+def test_released_trial_can_be_claimed_again():
+    """A trial claimed but never used (e.g. no call budget) goes back to the next caller"""
+    clock = FakeClock()
+    breaker = open_breaker(clock)
+    clock.now += 60
+    assert breaker.allow_request()
+    breaker.release_trial()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow_request()
+    assert not breaker.allow_request()
+
+
+def test_error_kind_releases_trial():
+    """A half-open probe that hits a non-health error may be retried by the next request"""
+    clock = FakeClock()
+    breaker = open_breaker(clock)
+    clock.now += 60
+    assert breaker.allow_request()
+    breaker.record_failure(ValueError("No data found for ticker ZZZZ"))
+    assert breaker.state == CircuitBreaker.HALF_OPEN and breaker.allow_request()
+
+
+class FailingLocalProvider:
+    """Non-remote provider whose downloads fail with network-looking errors"""
+    is_remote = False
+
+    def download(self, ticker, start_date, end_date):
+        raise ConnectionError("connection refused by test fixture")
+
+
+def test_local_provider_leaves_breaker_alone():
+    """Failures of a mock/test provider are not recorded on the (process-wide) Yahoo breaker"""
+    breaker = CircuitBreaker(failure_threshold=1, clock=FakeClock())
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        predictor = make_predictor(tmp_dir, FailingLocalProvider(), circuit_breaker=breaker)
+        predictor.retry_base_delay = 0
+        result = predictor.predict_next_day("AAPL")
+    assert result["success"] and result["using_mock_data"]
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.status()["consecutive_failures"] == 0
+
+
+class RemoteProvider(MockStockDataProvider):
+    """Mock data presented as a remote provider; fails with a 429 the first `failures` calls"""
+    is_remote = True
+
+    def __init__(self, failures=0):
+        super().__init__(seed=4)
+        self.failures = failures
+        self.calls = 0
+
+    def download(self, ticker, start_date, end_date):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise RuntimeError("429 Too Many Requests")
+        return super().download(ticker, start_date, end_date)
+
+
+def make_remote_predictor(tmp_dir, provider, breaker, rate_limiter):
+    return make_predictor(tmp_dir, provider, circuit_breaker=breaker, rate_limiter=rate_limiter)
+
+
+def test_half_open_trial_survives_empty_budget():
+    """A half-open request that finds no call budget must not keep the trial slot (the breaker would wedge)"""
+    clock = FakeClock()
+    breaker = open_breaker(clock)
+    clock.now += 60
+    budget = TokenBucket(rate=1.0, capacity=1, clock=clock)
+    assert budget.try_acquire()[0]  # spent
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        provider = RemoteProvider()
+        predictor = make_remote_predictor(tmp_dir, provider, breaker, budget)
+        assert predictor.predict_next_day("AAPL")["using_mock_data"]
+        assert provider.calls == 0
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+
+        # Once budget is back the next request gets the trial, and its success closes the circuit
+        clock.now += 1
+        result = predictor.predict_next_day("AAPL")
+        assert provider.calls == 1 and not result["using_mock_data"]
+        assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_retry_checks_budget_before_sleeping():
+    """A failed download with no budget left for a retry gives up without backing off"""
+    clock = FakeClock()
+    breaker = CircuitBreaker(clock=clock)
+    budget = TokenBucket(rate=0.001, capacity=1, clock=clock)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        provider = RemoteProvider(failures=1)
+        predictor = make_remote_predictor(tmp_dir, provider, breaker, budget)
+        predictor.retry_base_delay = 60  # sleeping would stall the test
+        started = time.monotonic()
+        assert predictor.predict_next_day("AAPL")["using_mock_data"]
+        assert time.monotonic() - started < 10
+        assert provider.calls == 1
+
+
+class ThrottledTicker:
+    """Stands in for yfinance.Ticker; history() fails the way yfinance does when Yahoo answers 429"""
+    calls = []
+
+    def __init__(self, ticker, session=None):
+        self.ticker = ticker
+
+    def history(self, **kwargs):
+        ThrottledTicker.calls.append(kwargs)
+        if not kwargs.get("raise_errors"):
+            return pd.DataFrame()  # the error is only logged
+        raise RuntimeError("Too Many Requests. Rate limited. Try after a while.")
+
+
+def test_yahoo_throttling_opens_the_circuit():
+    """A 429 from Yahoo reaches the breaker as a rate-limit failure instead of an empty success"""
+    import yfinance
+    breaker = CircuitBreaker(failure_threshold=3, clock=FakeClock())
+    budget = TokenBucket(rate=1.0, capacity=100, clock=FakeClock())
+    rate_limited_before = PROVIDER_ERRORS.value(kind="rate_limited")
+    ThrottledTicker.calls = []
+    original = yfinance.Ticker
+    yfinance.Ticker = ThrottledTicker
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            predictor = make_remote_predictor(tmp_dir, YahooFinanceProvider(), breaker, budget)
+            predictor.retry_base_delay = 0
+            assert predictor.predict_next_day("AAPL")["using_mock_data"]
+    finally:
+        yfinance.Ticker = original
+
+    assert all(call["raise_errors"] for call in ThrottledTicker.calls)
+    assert len(ThrottledTicker.calls) == 3
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.status()["status"] == "rate_limited"
+    assert PROVIDER_ERRORS.value(kind="rate_limited") - rate_limited_before == 3
+
+
+def main():
+    """Run the checks"""
+    try:
+        test_error_classification()
+        test_failure_threshold()
+        test_error_kind_does_not_trip()
+        test_recovery_timeout_and_single_trial()
+        test_released_trial_can_be_claimed_again()
+        test_error_kind_releases_trial()
+        test_local_provider_leaves_breaker_alone()
+        test_half_open_trial_survives_empty_budget()
+        test_retry_checks_budget_before_sleeping()
+        test_yahoo_throttling_opens_the_circuit()
+        print("✅ Circuit breaker opens, recovers and hands out trials correctly")
+    except AssertionError as e:
+        print(f"❌ Circuit breaker check failed: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Concurrency stress test for the prediction pipeline (offline, mock data)
+"""
+
+import os
+import sys
+import time
+import tempfile
+import threading
+import datetime as dt
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from stock_predictor_api import LastValueModel, PredictionContext
+from mock_data_provider import MockStockDataProvider
+from market_calendar import last_complete_bar_date
+from prediction_cache import PredictionCache
+from testing_helpers import make_predictor
+
+TICKERS = ["AAPL", "MSFT", "GOOGL", "TSLA", "RELIANCE.NS", "TCS.NS", "INFY.NS", "ZZZ"]
+
+
+def test_concurrent_predictions(requests_per_ticker=25, workers=16):
+    """Concurrent requests for different tickers must not see each other's data or scaler"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # The naive last-value model as the shared model; no cache, so every request runs the pipeline
+        predictor = make_predictor(tmp_dir, model=LastValueModel())
+
+        # Warm the store so every request sees a fixed history per ticker
+        expected = {}
+        for ticker in TICKERS:
+            result = predictor.predict_next_day(ticker)
+            assert result["success"], result
+            expected[ticker] = result["current_price"]
+
+        jobs = TICKERS * requests_per_ticker
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(predictor.predict_next_day, jobs))
+
+        for ticker, result in zip(jobs, results):
+            assert result["success"], result
+            assert result["ticker"] == ticker
+            assert result["current_price"] == expected[ticker], (ticker, result)
+            # The persistence model returns the last scaled close, so a mixed-up
+            # scaler or window would break this equality
+            assert result["predicted_price"] == expected[ticker], (ticker, result)
+
+
+class SlowModel(LastValueModel):
+    """Stand-in model slow enough for concurrent requests to overlap"""
+    def predict(self, X, verbose=0):
+        time.sleep(0.3)
+        return super().predict(X)
+
+
+def test_same_ticker_requests_are_coalesced(workers=10):
+    """Concurrent requests for one ticker share a single pipeline run"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        predictor = make_predictor(tmp_dir, model=SlowModel())
+        predictor.predict_next_day("AAPL")  # warm the store
+        before = predictor.single_flight.stats()
+
+        barrier = threading.Barrier(workers)
+
+        def request(_):
+            barrier.wait()
+            return predictor.predict_next_day("AAPL")
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(request, range(workers)))
+
+        stats = predictor.single_flight.stats()
+        assert all(r == results[0] for r in results)
+        assert stats["executions"] - before["executions"] < workers
+        assert stats["coalesced"] - before["coalesced"] == workers - (stats["executions"] - before["executions"])
+
+
+class IntradayProvider(MockStockDataProvider):
+    """Mock provider whose downloads end with today's still-forming bar, as yfinance's do during market hours"""
+    def download(self, ticker, start_date, end_date):
+        df = super().download(ticker, start_date, end_date)
+        today = df.iloc[-1:].copy()
+        today.index = [dt.datetime.combine(dt.date.today(), dt.time(14, 30))]
+        return pd.concat([df[df.index.date < dt.date.today()], today])
+
+
+def test_unfinished_bar_is_not_stored():
+    """Only complete daily bars reach the store, so a partial bar is never frozen into the history"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        predictor = make_predictor(tmp_dir, IntradayProvider())
+        last_complete = predictor._last_complete_bar_date("AAPL")
+
+        predictor.fetch_data(PredictionContext("AAPL"))
+        assert predictor.data_store.last_date("AAPL") == last_complete
+
+        predictor.prefetch(["MSFT"])
+        assert predictor.data_store.last_date("MSFT") == last_complete
+
+
+def test_completeness_follows_the_exchange_clock():
+    """A bar is final after its own exchange's close, whatever the server's timezone"""
+    # Tuesday 00:30 in India is still Monday afternoon in New York
+    ist = pd.Timestamp("2024-06-04 00:30", tz="Asia/Kolkata")
+    assert last_complete_bar_date("AAPL", ist) == dt.date(2024, 5, 31)
+    assert last_complete_bar_date("RELIANCE.NS", ist) == dt.date(2024, 6, 3)
+
+    after_close = pd.Timestamp("2024-06-03 16:45", tz="America/New_York")
+    assert last_complete_bar_date("AAPL", after_close) == dt.date(2024, 6, 3)
+    assert last_complete_bar_date("AAPL", after_close.tz_convert("Asia/Tokyo")) == dt.date(2024, 6, 3)
+    # Monday evening in New York is Tuesday morning in Tokyo, before that day's close
+    assert last_complete_bar_date("7203.T", after_close) == dt.date(2024, 6, 3)
+
+
+class FixedHistoryProvider(MockStockDataProvider):
+    """Mock provider with a fixed calendar: bars end at `through` and requests are recorded"""
+    def __init__(self, through):
+        super().__init__(seed=5)
+        self.through = pd.Timestamp(through)
+        self.requests = []
+
+    def download(self, ticker, start_date, end_date):
+        self.requests.append(pd.Timestamp(start_date))
+        df = self.generate_mock_data(ticker, 400)
+        df.index = pd.bdate_range(end=self.through, periods=len(df), name="Date")
+        return df[df.index >= pd.Timestamp(start_date)]
+
+
+def test_holiday_does_not_defeat_the_store():
+    """A trading day with no bar (holiday) is fetched once, then served from the store and cache"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # Memorial Day: Monday 2024-05-27 has no bar, the last one is Friday's
+        provider = FixedHistoryProvider("2024-05-24")
+        predictor = make_predictor(tmp_dir, provider, prediction_cache=PredictionCache(ttl=3600))
+        now = pd.Timestamp("2024-05-28 12:00", tz="America/New_York").to_pydatetime()
+        predictor._now = lambda: now
+
+        first = predictor.predict_next_day("AAPL")
+        assert first["success"] and first["cache_status"] == "MISS"
+        assert len(provider.requests) == 1
+
+        second = predictor.predict_next_day("AAPL")
+        assert second["cache_status"] == "HIT"
+        predictor.prefetch(["AAPL"])
+        assert len(provider.requests) == 1
+
+        # The next day's fetch starts at the last stored bar, so a revised Friday bar replaces the old one
+        now = pd.Timestamp("2024-05-29 12:00", tz="America/New_York").to_pydatetime()
+        provider.through = pd.Timestamp("2024-05-28")
+        third = predictor.predict_next_day("AAPL")
+        assert third["cache_status"] == "MISS"
+        assert provider.requests[-1] == pd.Timestamp("2024-05-24")
+        assert predictor.data_store.last_date("AAPL") == dt.date(2024, 5, 28)
+
+
+def main():
+    """Run the stress test"""
+    print("=" * 60)
+    print("PREDICTION PIPELINE CONCURRENCY TEST")
+    print("=" * 60)
+    try:
+        test_concurrent_predictions()
+        print("✅ Concurrent predictions are isolated per request")
+        test_same_ticker_requests_are_coalesced()
+        print("✅ Concurrent requests for one ticker are coalesced")
+        test_unfinished_bar_is_not_stored()
+        print("✅ Unfinished intraday bars are not stored")
+        test_completeness_follows_the_exchange_clock()
+        test_holiday_does_not_defeat_the_store()
+        print("✅ Bar completeness follows the exchange clock and survives holidays")
+    except AssertionError as e:
+        print(f"❌ Concurrency test failed: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
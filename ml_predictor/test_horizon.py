@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Check multi-step horizon forecasts (offline, mock data)
+"""
+
+import os
+import sys
+import tempfile
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from mock_data_provider import MockStockDataProvider
+from testing_helpers import MeanModel, make_predictor
+
+TICKERS = ["AAPL", "MSFT", "GOOGL", "TSLA", "ZZZ"]
+
+
+def test_horizon_is_batched_across_tickers(steps=10):
+    """A horizon for many tickers costs one forward pass per step, and matches per-ticker rollouts"""
+    model = MeanModel()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        predictor = make_predictor(tmp_dir, MockStockDataProvider(seed=11), model)
+        predictor.predict_many(TICKERS)  # store the mock histories
+
+        model.calls = 0
+        batch = predictor.predict_horizon_many(TICKERS, steps)
+        assert batch["succeeded"] == len(TICKERS)
+        assert model.calls == steps
+
+        for result in batch["results"]:
+            assert result["horizon"] == steps and len(result["path"]) == steps
+            assert result["predicted_price"] == result["path"][-1]["predicted_price"]
+            dates = [point["date"] for point in result["path"]]
+            assert dates == sorted(set(dates))
+
+            # Reference: roll one ticker's window forward with single-window predicts
+            closes = predictor.data_store.read(result["ticker"])["Close"].to_numpy()[-252:]
+            window = list(closes[-60:])
+            expected = []
+            for _ in range(steps):
+                expected.append(np.mean(window))
+                window = window[1:] + [expected[-1]]
+            actual = [point["predicted_price"] for point in result["path"]]
+            np.testing.assert_allclose(actual, np.round(expected, 2), atol=0.011)
+
+        # One step ahead is the ordinary next-day prediction
+        single = predictor.predict_horizon("AAPL", 1)
+        next_day = predictor.predict_next_day("AAPL")
+        assert single["predicted_price"] == next_day["predicted_price"]
+
+
+def test_horizon_endpoint(steps=5):
+    """GET /predict/<ticker>?horizon=N returns a path; invalid horizons are rejected"""
+    import api_server
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        api_server._predictor = make_predictor(tmp_dir, MockStockDataProvider(seed=11))
+        try:
+            client = api_server.app.test_client()
+            response = client.get(f"/predict/AAPL?horizon={steps}")
+            assert response.status_code == 200
+            assert len(response.get_json()["path"]) == steps
+
+            assert client.get("/predict/AAPL?horizon=0").status_code == 400
+            assert client.get("/predict/AAPL?horizon=abc").status_code == 400
+            assert client.get(f"/predict/AAPL?horizon={api_server.MAX_HORIZON + 1}").status_code == 400
+        finally:
+            api_server._predictor = None
+
+
+def main():
+    """Run the checks"""
+    try:
+        test_horizon_is_batched_across_tickers()
+        test_horizon_endpoint()
+        print("✅ Horizon forecasts are batched and match per-ticker rollouts")
+    except AssertionError as e:
+        print(f"❌ Horizon check failed: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
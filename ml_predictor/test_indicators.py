@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Check the incremental and batch indicator engines against the pandas formulas
+"""
+
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from indicators import INDICATOR_COLUMNS, IndicatorEngine, IndicatorState, compute_indicators
+from mock_data_provider import MockStockDataProvider
+
+TICKERS = ['AAPL', 'MSFT', 'TSLA']
+
+
+def pandas_indicators(df):
+    """Reference: the full-history pandas computation the engine replaces"""
+    df = df.copy()
+    df['MA_10'] = df['Close'].rolling(window=10).mean()
+    df['MA_20'] = df['Close'].rolling(window=20).mean()
+    df['MA_50'] = df['Close'].rolling(window=50).mean()
+
+    delta = df['Close'].diff()
+    gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
+    rs = gain / loss
+    df['RSI'] = 100 - (100 / (1 + rs))
+
+    ema_12 = df['Close'].ewm(span=12, adjust=False).mean()
+    ema_26 = df['Close'].ewm(span=26, adjust=False).mean()
+    df['MACD'] = ema_12 - ema_26
+    return df[INDICATOR_COLUMNS].ffill()
+
+
+def test_incremental_matches_pandas():
+    """IndicatorState.update() must reproduce every row of the pandas output"""
+    provider = MockStockDataProvider()
+    for ticker in TICKERS:
+        df = provider.generate_mock_data(ticker, 1000, seed=3)
+        expected = pandas_indicators(df)
+        state = IndicatorState()
+        actual = pd.DataFrame([state.update(close) for close in df['Close']], index=df.index)
+        np.testing.assert_allclose(actual[INDICATOR_COLUMNS].to_numpy(), expected.to_numpy(), rtol=1e-7, atol=1e-7)
+
+
+def test_engine_only_feeds_new_bars():
+    """A request with one more bar continues the stored state instead of replaying"""
+    df = MockStockDataProvider().generate_mock_data('AAPL', 500, seed=3)
+    engine = IndicatorEngine()
+    engine.latest('AAPL', df.iloc[:-1])
+    state = engine._states['AAPL']
+
+    latest = engine.latest('AAPL', df)
+    assert engine._states['AAPL'] is state
+    assert state.count == len(df)
+    np.testing.assert_allclose([latest[c] for c in INDICATOR_COLUMNS], pandas_indicators(df).iloc[-1].to_numpy(), rtol=1e-7)
+
+    # Rewritten history is replayed from scratch
+    changed = df.copy()
+    changed.iloc[-1, changed.columns.get_loc('Close')] += 1.0
+    latest = engine.latest('AAPL', changed)
+    assert engine._states['AAPL'] is not state
+    np.testing.assert_allclose([latest[c] for c in INDICATOR_COLUMNS], pandas_indicators(changed).iloc[-1].to_numpy(), rtol=1e-7)
+
+
+def test_batch_matches_pandas():
+    """compute_indicators() over an (N, T) block must match pandas per ticker"""
+    provider = MockStockDataProvider()
+    frames = [provider.generate_mock_data(ticker, 1000, seed=3) for ticker in TICKERS]
+    length = min(len(df) for df in frames)
+    closes = np.stack([df['Close'].to_numpy()[-length:] for df in frames])
+    batch = compute_indicators(closes)
+    for i, df in enumerate(frames):
+        expected = pandas_indicators(df.iloc[-length:])
+        for column in INDICATOR_COLUMNS:
+            np.testing.assert_allclose(batch[column][i], expected[column].to_numpy(), rtol=1e-7, atol=1e-7)
+
+
+def test_bulk_state_continues_like_a_replay():
+    """IndicatorState.from_closes() gives the state of a bar-by-bar replay, and later updates agree"""
+    closes = MockStockDataProvider().generate_mock_data('TSLA', 1000, seed=5)['Close'].to_numpy()
+    for count in (1, 13, 49, 50, len(closes) - 30):
+        bulk = IndicatorState.from_closes(closes[:count])
+        replay = IndicatorState()
+        for close in closes[:count]:
+            replay.update(close)
+        assert bulk.count == replay.count and bulk.last_close == replay.last_close
+        np.testing.assert_allclose([bulk.values[c] for c in INDICATOR_COLUMNS],
+                                   [replay.values[c] for c in INDICATOR_COLUMNS], rtol=1e-9, atol=1e-9)
+
+        for close in closes[count:count + 30]:
+            expected = replay.update(close)
+            actual = bulk.update(close)
+            np.testing.assert_allclose([actual[c] for c in INDICATOR_COLUMNS],
+                                       [expected[c] for c in INDICATOR_COLUMNS], rtol=1e-7, atol=1e-7)
+
+
+def main():
+    """Run the checks"""
+    try:
+        test_incremental_matches_pandas()
+        test_engine_only_feeds_new_bars()
+        test_batch_matches_pandas()
+        test_bulk_state_continues_like_a_replay()
+        print("✅ Indicator engines match the pandas implementation")
+    except AssertionError as e:
+        print(f"❌ Indicator mismatch: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Check the Prometheus metrics exposition and the /metrics endpoint (offline, mock data)
+"""
+
+import os
+import sys
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from metrics import MetricsRegistry, PIPELINE_STAGE_SECONDS
+from mock_data_provider import MockStockDataProvider
+from prediction_cache import PredictionCache
+from testing_helpers import make_predictor
+
+
+def parse(text):
+    """{'name{labels}': value} for every sample line"""
+    samples = {}
+    for line in text.splitlines():
+        if line and not line.startswith("#"):
+            name, value = line.rsplit(" ", 1)
+            samples[name] = float(value)
+    return samples
+
+
+def test_exposition_format():
+    """Counters, labelled histograms and callbacks render in the text format"""
+    registry = MetricsRegistry()
+    requests = registry.counter("demo_requests_total", "Requests", labelnames=("code",))
+    latency = registry.histogram("demo_seconds", "Latency", buckets=(0.1, 1.0), labelnames=("stage",))
+    registry.callback("demo_queue", "Queue depth", "gauge", lambda: 3)
+    registry.callback("demo_broken", "Raises", "gauge", lambda: 1 / 0)
+
+    requests.inc(code="200")
+    requests.inc(2, code="500")
+    for value in (0.05, 0.5, 5.0):
+        latency.observe(value, stage='fe"tch')
+
+    text = registry.render()
+    assert "# TYPE demo_seconds histogram" in text
+    assert "demo_broken" not in text
+    samples = parse(text)
+    assert samples['demo_requests_total{code="200"}'] == 1
+    assert samples['demo_requests_total{code="500"}'] == 2
+    assert samples['demo_seconds_bucket{stage="fe\\"tch",le="0.1"}'] == 1
+    assert samples['demo_seconds_bucket{stage="fe\\"tch",le="1.0"}'] == 2
+    assert samples['demo_seconds_bucket{stage="fe\\"tch",le="+Inf"}'] == 3
+    assert samples['demo_seconds_count{stage="fe\\"tch"}'] == 3
+    assert abs(samples['demo_seconds_sum{stage="fe\\"tch"}'] - 5.55) < 1e-9
+    assert samples["demo_queue"] == 3
+
+
+def test_metrics_endpoint_reports_pipeline_stages():
+    """A prediction through the API shows up as stage latencies, outcomes and cache counters"""
+    import api_server
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        predictor = make_predictor(tmp_dir, MockStockDataProvider(seed=5), prediction_cache=PredictionCache(ttl=60))
+        api_server.register_predictor_metrics(predictor)
+        predicted_before = PIPELINE_STAGE_SECONDS.snapshot(stage="predict")["count"]
+
+        api_server._predictor = predictor
+        try:
+            client = api_server.app.test_client()
+            assert client.get("/predict/AAPL").status_code == 200
+            assert client.get("/predict/AAPL").headers["X-Prediction-Cache"] == "HIT"
+            response = client.get("/metrics")
+        finally:
+            api_server._predictor = None
+        assert response.status_code == 200
+        assert response.mimetype == "text/plain"
+        samples = parse(response.get_data(as_text=True))
+        for stage in ("fetch", "indicators", "scale", "model_lookup", "predict", "model_load"):
+            assert samples[f'ml_pipeline_stage_seconds_count{{stage="{stage}"}}'] >= 1, stage
+        assert samples['ml_pipeline_stage_seconds_count{stage="predict"}'] == predicted_before + 1
+        assert samples['ml_predictions_total{status="success",cache="hit"}'] >= 1
+        assert samples["ml_prediction_cache_hits_total"] == 1
+        assert samples['ml_circuit_state{state="closed"}'] == 1
+        assert samples['ml_http_responses_total{method="GET",route="/predict/<ticker>",code="200"}'] >= 2
+
+
+def main():
+    """Run the checks"""
+    try:
+        test_exposition_format()
+        test_metrics_endpoint_reports_pipeline_stages()
+        print("✅ Metrics render in the Prometheus format and /metrics reports the pipeline")
+    except AssertionError as e:
+        print(f"❌ Metrics check failed: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
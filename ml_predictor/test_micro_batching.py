@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Check that the micro-batching scheduler batches concurrent predictions correctly
+"""
+
+import os
+import sys
+import time
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from micro_batching import MicroBatcher
+from testing_helpers import make_predictor
+
+
+class RecordingModel:
+    """Stand-in model that predicts the last value of each window and records batch sizes"""
+    def __init__(self):
+        self.batch_sizes = []
+
+    def predict(self, X, verbose=0):
+        self.batch_sizes.append(len(X))
+        return X[:, -1, :] * 2
+
+
+def window(value, look_back=60):
+    return np.full((1, look_back, 1), value, dtype=np.float32)
+
+
+def test_concurrent_requests_share_batches(requests=64, max_batch_size=8):
+    """Every caller gets its own result; forward passes carry up to max_batch_size windows"""
+    model = RecordingModel()
+    batcher = MicroBatcher(max_batch_size=max_batch_size, max_wait_ms=50)
+    barrier = threading.Barrier(requests)
+
+    def call(i):
+        barrier.wait()
+        return batcher.predict(model, window(i))
+
+    with ThreadPoolExecutor(max_workers=requests) as pool:
+        results = list(pool.map(call, range(requests)))
+
+    for i, result in enumerate(results):
+        assert result.shape == (1, 1) and result[0, 0] == 2 * i
+    assert sum(model.batch_sizes) == requests
+    assert max(model.batch_sizes) == max_batch_size
+    assert len(model.batch_sizes) < requests // 2
+
+    stats = batcher.stats()
+    assert stats["requests"] == requests
+    assert stats["batch_size_histogram"]["count"] == len(model.batch_sizes)
+    assert stats["flushes"]["full"] >= 1
+
+
+def test_lone_request_flushes_after_max_wait(max_wait_ms=30):
+    model = RecordingModel()
+    batcher = MicroBatcher(max_batch_size=8, max_wait_ms=max_wait_ms)
+    started = time.monotonic()
+    result = batcher.predict(model, window(3))
+    assert result[0, 0] == 6
+    assert time.monotonic() - started >= max_wait_ms / 1000.0
+    assert model.batch_sizes == [1]
+    assert batcher.stats()["flushes"] == {"full": 0, "timeout": 1}
+
+
+def test_models_are_batched_separately():
+    """Windows for different models never share a forward pass; errors reach only their callers"""
+    good, bad = RecordingModel(), RecordingModel()
+    bad.predict = lambda X, verbose=0: (_ for _ in ()).throw(RuntimeError("model failed"))
+    batcher = MicroBatcher(max_batch_size=16, max_wait_ms=20)
+
+    def call(i):
+        try:
+            return batcher.predict(good if i % 2 == 0 else bad, window(i))[0, 0]
+        except RuntimeError as e:
+            return str(e)
+
+    with ThreadPoolExecutor(max_workers=10) as pool:
+        results = list(pool.map(call, range(10)))
+    assert results[0::2] == [2 * i for i in range(0, 10, 2)]
+    assert results[1::2] == ["model failed"] * 5
+    assert sum(good.batch_sizes) == 5
+
+
+def test_naive_fallback_requests_share_a_batch():
+    """Tickers without a model share the one naive model, so their windows go through one forward pass"""
+    batcher = MicroBatcher(max_batch_size=2, max_wait_ms=5000)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        predictor = make_predictor(tmp_dir, shared_model=False, micro_batcher=batcher)
+        predictor.prefetch(["AAPL", "MSFT"])
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            results = list(pool.map(predictor.predict_next_day, ["AAPL", "MSFT"]))
+
+    assert all(r["success"] and r["model_version"] == "naive" for r in results)
+    assert time.monotonic() - started < 5  # flushed as a full batch, not after max_wait
+    stats = batcher.stats()
+    assert stats["flushes"] == {"full": 1, "timeout": 0}
+    assert stats["batch_size_histogram"]["count"] == 1 and stats["batch_size_histogram"]["sum"] == 2
+
+
+def main():
+    """Run the checks"""
+    try:
+        test_concurrent_requests_share_batches()
+        test_lone_request_flushes_after_max_wait()
+        test_models_are_batched_separately()
+        test_naive_fallback_requests_share_a_batch()
+        print("✅ Micro-batching scheduler batches and routes results correctly")
+    except AssertionError as e:
+        print(f"❌ Micro-batching check failed: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Check the mock data generators: the vectorized price walk, seeding, stable ticker profiles
+and the synthetic market universe (offline)
+"""
+
+import os
+import sys
+import json
+import tempfile
+import subprocess
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from mock_data_provider import MockStockDataProvider, SyntheticMarket, bounded_cumprod
+
+
+def clipped_walk(multipliers, start, lower, upper):
+    """Reference: the per-day loop bounded_cumprod replaces"""
+    prices = np.empty(len(multipliers))
+    price = start
+    for t, multiplier in enumerate(multipliers):
+        price = min(max(price * multiplier, lower), upper)
+        prices[t] = price
+    return prices
+
+
+def test_bounded_cumprod_matches_a_clipped_loop():
+    """The parallel scan gives the sequential clip loop's prices, including runs pinned at a bound"""
+    rng = np.random.default_rng(0)
+    for steps in (1, 2, 7, 64, 500):
+        # Large moves so the walk hits both bounds and comes back off them
+        multipliers = 1 + rng.normal(0, 0.15, steps)
+        expected = clipped_walk(multipliers, 100.0, 60.0, 140.0)
+        assert np.allclose(bounded_cumprod(multipliers, 100.0, 60.0, 140.0), expected, rtol=1e-9), steps
+
+    rows = 1 + rng.normal(0, 0.1, (3, 300))
+    starts, lowers, uppers = np.array([10.0, 50.0, 90.0]), np.array([5.0, 40.0, 80.0]), np.array([20.0, 60.0, 95.0])
+    block = bounded_cumprod(rows, starts, lowers, uppers)
+    for row in range(3):
+        assert np.allclose(block[row], clipped_walk(rows[row], starts[row], lowers[row], uppers[row]), rtol=1e-9)
+
+
+def test_same_seed_same_frames():
+    """One seed reproduces every ticker's history; another seed gives a different one"""
+    first = MockStockDataProvider(seed=11).generate_mock_data("AAPL", 200)
+    again = MockStockDataProvider(seed=11).generate_mock_data("AAPL", 200)
+    pd.testing.assert_frame_equal(first, again)
+
+    other = MockStockDataProvider(seed=12).generate_mock_data("AAPL", 200)
+    assert not np.allclose(first["Close"].values, other["Close"].values)
+
+
+PROFILE_SCRIPT = (
+    "import json, sys; sys.path.insert(0, sys.argv[1]);"
+    "from mock_data_provider import MockStockDataProvider;"
+    "print(json.dumps(MockStockDataProvider().stock_info('zzqx')))"
+)
+
+
+def test_unknown_ticker_profile_is_stable_across_processes():
+    """An unknown ticker's profile does not depend on string hash salting (PYTHONHASHSEED)"""
+    here = os.path.dirname(os.path.abspath(__file__))
+    profiles = []
+    for hash_seed in ("1", "2"):
+        env = dict(os.environ, PYTHONHASHSEED=hash_seed)
+        output = subprocess.run([sys.executable, "-c", PROFILE_SCRIPT, here], env=env,
+                                capture_output=True, text=True, check=True).stdout
+        profiles.append(json.loads(output))
+
+    assert profiles[0] == profiles[1] == MockStockDataProvider().stock_info("ZZQX")
+    assert profiles[0]["name"] == "ZZQX Corp."
+
+
+def test_synthetic_market_blocks_and_frames():
+    """close_block rows match each ticker's frame and do not depend on which tickers are generated together"""
+    tickers = ["syn0", "SYN1", "SYN2", "SYN3"]
+    market = SyntheticMarket(tickers, days=120, seed=7, end_date="2024-06-28")
+    block = market.close_block()
+    assert block.shape == (4, 120) and np.isfinite(block).all() and (block > 0).all()
+    assert market.dates[-1] == pd.Timestamp("2024-06-28") and len(market.dates) == 120
+
+    frame = market.frame("SYN2")
+    assert list(frame.columns) == ["Open", "High", "Low", "Close", "Volume"]
+    assert frame.index.equals(market.dates)
+    assert np.allclose(frame["Close"].values, block[2])
+    assert np.allclose(market.close_block(["SYN2"])[0], block[2])
+
+    again = SyntheticMarket(tickers, days=120, seed=7, end_date="2024-06-28")
+    assert np.array_equal(again.close_block(), block)
+    assert not np.allclose(SyntheticMarket(tickers, days=120, seed=8, end_date="2024-06-28").close_block(), block)
+
+
+def test_synthetic_market_memmap_round_trip():
+    """write_memmap in chunks and load_memmap return the same block, tickers and dates"""
+    market = SyntheticMarket([f"SYN{i}" for i in range(5)], days=60, seed=3, end_date="2024-06-28")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = market.write_memmap(os.path.join(tmp_dir, "universe.npy"), chunk_size=2)
+        closes, tickers, dates = SyntheticMarket.load_memmap(path)
+        try:
+            assert closes.shape == (5, 60) and closes.dtype == np.float32
+            assert not closes.flags.writeable
+            assert tickers == market.tickers and dates.equals(market.dates)
+            assert np.array_equal(closes, market.close_block().astype(np.float32))
+        finally:
+            del closes  # release the mapping before the directory is removed
+
+
+def main():
+    """Run the checks"""
+    try:
+        test_bounded_cumprod_matches_a_clipped_loop()
+        test_same_seed_same_frames()
+        test_unknown_ticker_profile_is_stable_across_processes()
+        test_synthetic_market_blocks_and_frames()
+        test_synthetic_market_memmap_round_trip()
+        print("✅ Mock data and synthetic universes are reproducible and the vectorized walk matches the loop")
+    except AssertionError as e:
+        print(f"❌ Mock data check failed: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Check the process-wide model cache: reuse, reload on change, LRU eviction and counters (offline)
+"""
+
+import os
+import sys
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from model_registry import ModelRegistry
+
+
+class CountingLoader:
+    """Loader that returns a fresh object per load and counts loads per path"""
+    def __init__(self):
+        self.loads = []
+        self._lock = threading.Lock()
+
+    def __call__(self, path):
+        with self._lock:
+            self.loads.append(os.path.basename(path))
+        return object()
+
+
+def write_model(path, content="weights"):
+    with open(path, "w") as f:
+        f.write(content)
+    return path
+
+
+def test_model_is_loaded_once():
+    """Repeated and concurrent lookups share one deserialized model"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = write_model(os.path.join(tmp_dir, "a.h5"))
+        loader = CountingLoader()
+        registry = ModelRegistry(loader=loader)
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            models = list(pool.map(lambda _: registry.get(path), range(32)))
+        assert all(model is models[0] for model in models)
+        assert loader.loads == ["a.h5"]
+
+        stats = registry.stats()
+        assert (stats["misses"], stats["hits"], stats["cached_models"]) == (1, 31, 1)
+
+
+def test_changed_file_is_reloaded():
+    """A model file replaced on disk is loaded again and counted as a reload"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = write_model(os.path.join(tmp_dir, "a.h5"))
+        loader = CountingLoader()
+        registry = ModelRegistry(loader=loader)
+        first = registry.get(path)
+
+        write_model(path, "retrained weights")
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+        second = registry.get(path)
+        assert second is not first
+        assert registry.get(path) is second
+        assert loader.loads == ["a.h5", "a.h5"]
+        assert registry.stats()["reloads"] == 1
+
+
+def test_least_recently_used_is_evicted():
+    """Beyond max_models the least recently used model is dropped and loads again on its next lookup"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        paths = {name: write_model(os.path.join(tmp_dir, f"{name}.h5")) for name in "abc"}
+        loader = CountingLoader()
+        registry = ModelRegistry(max_models=2, loader=loader)
+
+        registry.get(paths["a"])
+        registry.get(paths["b"])
+        registry.get(paths["a"])  # b is now the least recently used
+        registry.get(paths["c"])
+        assert registry.stats()["evictions"] == 1
+
+        registry.get(paths["a"])
+        assert loader.loads == ["a.h5", "b.h5", "c.h5"]
+        registry.get(paths["b"])
+        assert loader.loads[-1] == "b.h5"
+
+        stats = registry.stats()
+        assert (stats["cached_models"], stats["evictions"], stats["hits"], stats["misses"]) == (2, 2, 2, 4)
+
+
+def main():
+    """Run the checks"""
+    try:
+        test_model_is_loaded_once()
+        test_changed_file_is_reloaded()
+        test_least_recently_used_is_evicted()
+        print("✅ Model registry reuses, reloads and evicts models correctly")
+    except AssertionError as e:
+        print(f"❌ Model registry check failed: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
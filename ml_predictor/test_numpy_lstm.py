@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Check the pure-NumPy LSTM engine against Keras model.predict
+"""
+
+import os
+import sys
+import tempfile
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from stock_predictor_api import build_lstm_model
+from numpy_lstm import NumpyLSTMModel, export_weights
+
+
+def test_numpy_engine_matches_keras(batch_size=16, look_back=60):
+    """Exported weights must reproduce model.predict within float32 tolerance"""
+    model = build_lstm_model(look_back)
+    # Random weights of a realistic scale stand in for a trained model
+    rng = np.random.default_rng(42)
+    model.set_weights([rng.normal(0, 0.3, w.shape).astype(np.float32) for w in model.get_weights()])
+
+    X = rng.random((batch_size, look_back, 1)).astype(np.float32)
+    expected = model.predict(X, verbose=0)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = export_weights(model, os.path.join(tmp_dir, "model.npz"))
+        actual = NumpyLSTMModel.load(path).predict(X)
+
+    assert actual.shape == expected.shape
+    np.testing.assert_allclose(actual, expected, rtol=1e-4, atol=1e-5)
+
+
+def main():
+    """Run the check"""
+    try:
+        test_numpy_engine_matches_keras()
+        print("✅ NumPy engine matches Keras predictions")
+    except AssertionError as e:
+        print(f"❌ NumPy engine mismatch: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
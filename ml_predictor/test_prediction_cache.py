@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Check the prediction cache: expiry, LRU bound, SQLite persistence and invalidation (offline, fake clock)
+"""
+
+import os
+import sys
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from prediction_cache import PredictionCache
+from stock_predictor_api import StockPredictorAPI
+from mock_data_provider import MockStockDataProvider
+from data_store import OHLCVStore
+from model_registry import ModelRegistry, ModelArtifacts
+from testing_helpers import MeanModel, make_predictor
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_700_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+def key(ticker, model_version="naive"):
+    return PredictionCache.make_key(ticker, "2024-06-03", model_version)
+
+
+def test_entries_expire():
+    """An entry is served until ttl seconds after it was stored"""
+    clock = FakeClock()
+    cache = PredictionCache(ttl=60, clock=clock)
+    cache.put(key("AAPL"), {"predicted_price": 1.0})
+
+    clock.now += 59
+    result, remaining = cache.get(key("AAPL"))
+    assert result == {"predicted_price": 1.0} and remaining == 1
+
+    clock.now += 1
+    assert cache.get(key("AAPL")) == (None, 0.0)
+    assert cache.stats()["entries"] == 0
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_lru_bound():
+    """Beyond max_entries the least recently used entry is dropped"""
+    cache = PredictionCache(ttl=60, max_entries=2, clock=FakeClock())
+    cache.put(key("AAPL"), {"n": 1})
+    cache.put(key("MSFT"), {"n": 2})
+    assert cache.get(key("AAPL"))[0] == {"n": 1}  # AAPL is now the most recent
+    cache.put(key("TSLA"), {"n": 3})
+
+    assert cache.get(key("MSFT"))[0] is None
+    assert cache.get(key("AAPL"))[0] == {"n": 1} and cache.get(key("TSLA"))[0] == {"n": 3}
+    assert cache.stats()["entries"] == 2
+
+
+def test_sqlite_persistence():
+    """With a path, entries survive a new cache instance (restart) and still expire and invalidate"""
+    clock = FakeClock()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "predictions.sqlite3")
+        first = PredictionCache(ttl=60, path=path, clock=clock)
+        first.put(key("AAPL"), {"n": 1})
+        first.put(key("MSFT"), {"n": 2})
+
+        restarted = PredictionCache(ttl=60, path=path, clock=clock)
+        assert restarted.get(key("AAPL"))[0] == {"n": 1}
+        restarted.invalidate("MSFT")
+        assert PredictionCache(ttl=60, path=path, clock=clock).get(key("MSFT"))[0] is None
+
+        clock.now += 60
+        assert PredictionCache(ttl=60, path=path, clock=clock).get(key("AAPL"))[0] is None
+
+
+def test_new_bars_and_models_invalidate_their_ticker():
+    """Appending bars or publishing a model version drops only that ticker's cached predictions"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cache = PredictionCache(ttl=3600, clock=FakeClock())
+        predictor = StockPredictorAPI(
+            provider=MockStockDataProvider(seed=3),
+            data_store=OHLCVStore(os.path.join(tmp_dir, "market_data")),
+            model_registry=ModelRegistry(),
+            model_artifacts=ModelArtifacts(os.path.join(tmp_dir, "models")),
+            train_in_background=False,
+            prediction_cache=cache,
+            micro_batcher=None,
+        )
+        cache.put(key("AAPL"), {"n": 1})
+        cache.put(key("MSFT"), {"n": 2})
+
+        predictor.data_store.append("AAPL", predictor.provider.generate_mock_data("AAPL", 30))
+        assert cache.get(key("AAPL"))[0] is None
+        assert cache.get(key("MSFT"))[0] == {"n": 2}
+
+        staging_path = predictor.model_artifacts.staging_path("MSFT")
+        open(staging_path, "w").close()
+        predictor.model_artifacts.publish("MSFT", staging_path)
+        assert cache.get(key("MSFT"))[0] is None
+        assert cache.stats()["invalidations"] == 2
+
+
+class OffsetModel(MeanModel):
+    """Stand-in for a retrained shared model: predicts the window mean plus an offset"""
+    def predict(self, X, verbose=0):
+        return super().predict(X) + 0.01
+
+
+def test_replaced_shared_model_is_not_served_from_cache():
+    """Replacing the shared model file changes its cache version, so stale predictions are not served"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        models = [MeanModel()]
+        predictor = make_predictor(tmp_dir, MockStockDataProvider(seed=3), prediction_cache=PredictionCache(ttl=3600))
+        predictor.model_registry = ModelRegistry(loader=lambda path: models[-1])
+
+        first = predictor.predict_next_day("AAPL")
+        assert first["model_version"].startswith("shared@")
+        assert predictor.predict_next_day("AAPL")["cache_status"] == "HIT"
+
+        models.append(OffsetModel())
+        with open(predictor.model_path, "w") as f:
+            f.write("retrained weights")
+        second = predictor.predict_next_day("AAPL")
+        assert second["cache_status"] == "MISS" and second["model_version"] != first["model_version"]
+        assert second["predicted_price"] != first["predicted_price"]
+
+
+def main():
+    """Run the checks"""
+    try:
+        test_entries_expire()
+        test_lru_bound()
+        test_sqlite_persistence()
+        test_new_bars_and_models_invalidate_their_ticker()
+        test_replaced_shared_model_is_not_served_from_cache()
+        print("✅ Prediction cache expires, evicts, persists and invalidates correctly")
+    except AssertionError as e:
+        print(f"❌ Prediction cache check failed: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
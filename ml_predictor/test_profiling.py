@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Check opt-in request profiling (offline, mock data)
+"""
+
+import os
+import sys
+import pstats
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from profiling import RequestProfiler, profiling_active
+from mock_data_provider import MockStockDataProvider
+import testing_helpers
+from testing_helpers import make_predictor
+from micro_batching import MicroBatcher
+
+
+def allocate(n):
+    assert profiling_active()
+    return [bytes(1024) for _ in range(n)]
+
+
+def test_flags_and_sampling():
+    """Requests are profiled only when allowed by config; sampling picks every N-th request"""
+    assert RequestProfiler(on_demand=False).should_profile("1") is None
+    assert RequestProfiler(on_demand=True).should_profile("1") == "requested"
+    assert RequestProfiler(on_demand=True).should_profile(None) is None
+
+    guarded = RequestProfiler(on_demand=True, token="s3cret")
+    assert guarded.should_profile("1") is None
+    assert guarded.should_profile("s3crét") is None  # non-ASCII input is refused, not a TypeError
+    assert guarded.should_profile("s3cret") == "requested"
+
+    sampler = RequestProfiler(sample_every=4)
+    assert [sampler.should_profile() for _ in range(8)].count("sampled") == 2
+
+
+def test_profile_artifacts(keep=2):
+    """A profile stores a loadable pstats dump and a summary with time and allocation tops"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        profiler = RequestProfiler(output_dir=tmp_dir, on_demand=True, max_artifacts=keep)
+        result, summary = profiler.profile("req-1", "requested", allocate, 500)
+        assert len(result) == 500 and not profiling_active()
+
+        assert summary["request_id"] == "req-1" and summary["reason"] == "requested"
+        assert any("allocate" in f["function"] for f in summary["top_functions"])
+        assert summary["top_allocations"][0]["size_kb"] >= 400
+        assert pstats.Stats(summary["pstats_path"]).total_calls > 0
+        assert profiler.load(summary["profile_id"])["wall_seconds"] == summary["wall_seconds"]
+        assert profiler.load("req-1") is None and profiler.load("../req-1") is None
+
+        # A reused request id gets its own profile rather than overwriting the first
+        ids = [profiler.profile("req-1", "sampled", allocate, 1)[1]["profile_id"] for _ in range(3)]
+        assert len(set(ids) | {summary["profile_id"]}) == 4
+        assert sorted(os.listdir(tmp_dir)) == sorted(f"{profile_id}.{ext}" for profile_id in ids[-keep:]
+                                                     for ext in ("json", "prof"))
+
+
+def test_profiled_api_request():
+    """?profile=1 profiles predict_next_day, including the forward pass a micro-batcher would take off-thread"""
+    import api_server
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        predictor = make_predictor(tmp_dir, MockStockDataProvider(seed=3),
+                                   micro_batcher=MicroBatcher(max_batch_size=8, max_wait_ms=1))
+
+        saved = api_server.profiler
+        api_server._predictor = predictor
+        api_server.profiler = RequestProfiler(output_dir=os.path.join(tmp_dir, "profiles"), on_demand=True)
+        try:
+            client = api_server.app.test_client()
+            plain = client.get("/predict/AAPL")
+            assert plain.status_code == 200 and "X-Profile-Id" not in plain.headers
+
+            profiled = client.get("/predict/AAPL?profile=1", headers={"X-Request-ID": "slow-aapl"})
+            assert profiled.status_code == 200
+            profile_id = profiled.headers["X-Profile-Id"]
+            assert profile_id != "slow-aapl"
+            assert client.get("/profiles/slow-aapl").status_code == 404
+
+            summary = client.get(f"/profiles/{profile_id}").get_json()["profile"]
+            assert summary["request_id"] == "slow-aapl"
+            assert "pandas" in summary["seconds_by_component"]
+            assert "ml_predictor" in summary["seconds_by_component"]
+            profiled_functions = pstats.Stats(summary["pstats_path"]).stats
+            assert any(name == "predict" and filename == os.path.abspath(testing_helpers.__file__)
+                       for filename, _, name in profiled_functions)
+            assert client.get("/profiles/unknown").status_code == 404
+        finally:
+            api_server._predictor = None
+            api_server.profiler = saved
+
+
+def main():
+    """Run the checks"""
+    try:
+        test_flags_and_sampling()
+        test_profile_artifacts()
+        test_profiled_api_request()
+        print("✅ Request profiling is opt-in and stores pstats and summary artifacts")
+    except AssertionError as e:
+        print(f"❌ Profiling check failed: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
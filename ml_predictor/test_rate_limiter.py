@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Check the token-bucket rate limiter and its backends (no network, fake clock)
+"""
+
+import os
+import sys
+import time
+import tempfile
+import threading
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from rate_limiter import TokenBucket, InProcessBucketBackend, SQLiteBucketBackend
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_700_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+def check_refill(backend):
+    clock = FakeClock()
+    bucket = TokenBucket(rate=1.0, capacity=3, backend=backend, clock=clock)
+    assert [bucket.try_acquire()[0] for _ in range(4)] == [True, True, True, False]
+
+    clock.now += 1.5
+    assert bucket.try_acquire() == (True, 0.0)
+    assert not bucket.try_acquire()[0]
+
+    # Idle time never fills the bucket past capacity
+    clock.now += 100
+    assert [bucket.try_acquire()[0] for _ in range(4)] == [True, True, True, False]
+
+
+def test_refill_in_process():
+    check_refill(InProcessBucketBackend())
+
+
+def test_refill_sqlite():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        check_refill(SQLiteBucketBackend(os.path.join(tmp_dir, "limits.sqlite3")))
+
+
+def test_would_block():
+    """An empty bucket reports how long until a token is available, and acquire() does not sleep past its timeout"""
+    clock = FakeClock()
+    bucket = TokenBucket(rate=0.5, capacity=1, backend=InProcessBucketBackend(), clock=clock)
+    assert bucket.try_acquire()[0]
+    acquired, wait = bucket.try_acquire()
+    assert not acquired and abs(wait - 2.0) < 1e-9
+
+    started = time.monotonic()
+    assert not bucket.acquire(timeout=0)
+    assert not bucket.acquire(timeout=1.0)  # 2 s to the next token: give up without waiting
+    assert time.monotonic() - started < 0.5
+
+
+def test_sqlite_budget_shared_across_connections(threads=8, attempts=5):
+    """Separate backends (as in separate processes) and threads draw on one budget without overspending it"""
+    clock = FakeClock()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "limits.sqlite3")
+        first = TokenBucket(rate=0.001, capacity=10, name="yahoo_finance", backend=SQLiteBucketBackend(path), clock=clock)
+        second = TokenBucket(rate=0.001, capacity=10, name="yahoo_finance", backend=SQLiteBucketBackend(path), clock=clock)
+        other = TokenBucket(rate=0.001, capacity=10, name="other", backend=SQLiteBucketBackend(path), clock=clock)
+
+        # Tokens taken through one connection are gone for the other
+        assert all(first.try_acquire()[0] for _ in range(6))
+        assert [second.try_acquire()[0] for _ in range(5)] == [True] * 4 + [False]
+        assert not first.try_acquire()[0]
+        assert other.try_acquire()[0]  # buckets are independent by name
+
+        # Concurrent takers never overspend a refilled budget
+        clock.now += 10 / 0.001
+        granted = []
+        lock = threading.Lock()
+
+        def spend(bucket):
+            for _ in range(attempts):
+                if bucket.try_acquire()[0]:
+                    with lock:
+                        granted.append(bucket)
+
+        workers = [threading.Thread(target=spend, args=(first if i % 2 else second,)) for i in range(threads)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        assert len(granted) == 10
+        assert not first.try_acquire()[0] and not second.try_acquire()[0]
+
+
+def main():
+    """Run the checks"""
+    try:
+        test_refill_in_process()
+        test_refill_sqlite()
+        test_would_block()
+        test_sqlite_budget_shared_across_connections()
+        print("✅ Token bucket refills, reports would-block and shares its budget through SQLite")
+    except AssertionError as e:
+        print(f"❌ Rate limiter check failed: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Check persisted per-ticker scalers (offline, mock data)
+"""
+
+import os
+import sys
+import tempfile
+import subprocess
+import numpy as np
+import pandas as pd
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(HERE)
+
+from scaling import MinMaxState
+from stock_predictor_api import PredictionContext
+from mock_data_provider import MockStockDataProvider
+from model_registry import ModelArtifacts
+from numpy_lstm import npz_path_for
+from testing_helpers import make_predictor
+
+
+def make_scaling_predictor(tmp_dir):
+    """Tickers without a published version get the naive fallback, which keeps no scaler state"""
+    return make_predictor(tmp_dir, MockStockDataProvider(seed=21), shared_model=False)
+
+
+def publish_model(predictor, ticker, trained_bars):
+    """Publish a placeholder model version whose training scaler saw only the first trained_bars bars"""
+    ctx = PredictionContext(ticker)
+    predictor.fetch_data(ctx)
+    training = ctx.df.iloc[:trained_bars]
+    staging_path = predictor.model_artifacts.staging_path(ticker)
+    open(staging_path, "w").close()
+    predictor.model_artifacts.publish(ticker, staging_path, metadata={
+        "scaler": MinMaxState.fit(training['Close'].to_numpy(), training.index).to_dict(),
+    })
+    return ctx.df
+
+
+def test_matches_sklearn():
+    """Same transform and inverse as a fitted MinMaxScaler, including constant input"""
+    from sklearn.preprocessing import MinMaxScaler
+    rng = np.random.default_rng(0)
+    for values in (100 + rng.standard_normal((300, 1)).cumsum(axis=0), np.full((80, 1), 42.0)):
+        reference = MinMaxScaler().fit(values)
+        state = MinMaxState.fit(values)
+        assert np.allclose(state.transform(values), reference.transform(values))
+        assert np.allclose(state.inverse_transform([[0.25]]), reference.inverse_transform([[0.25]]))
+
+
+def test_incremental_updates():
+    """Feeding bars in pieces (with overlap) gives the same range as fitting them at once"""
+    dates = pd.bdate_range("2024-01-01", periods=200)
+    closes = 50 + np.sin(np.arange(200) / 9.0) * np.arange(200) / 10.0
+    state = MinMaxState.fit(closes[:120], dates[:120])
+    assert state.update(closes[100:160], dates[100:160])
+    assert not state.update(closes[:160], dates[:160])
+    state.update(closes, dates)
+
+    full = MinMaxState.fit(closes, dates)
+    assert (state.data_min, state.data_max, state.last_date) == (full.data_min, full.data_max, dates[-1])
+    assert state.count == 200
+    assert MinMaxState.from_dict(state.to_dict()).to_dict() == state.to_dict()
+
+
+def test_serving_uses_persisted_training_scaler():
+    """A ticker's model is served with its training scaler widened by newer bars, saved beside the model"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        predictor = make_scaling_predictor(tmp_dir)
+        history = publish_model(predictor, "AAPL", trained_bars=150)
+
+        ctx = PredictionContext("AAPL")
+        X = predictor._prepare_context(ctx)
+        closes = history['Close'].to_numpy()
+        assert ctx.scaler.data_min == closes.min() and ctx.scaler.data_max == closes.max()
+        assert ctx.scaler.last_date == history.index[-1]
+        assert np.allclose(X[0, :, 0], (closes[-60:] - closes.min()) / (closes.max() - closes.min()))
+
+        saved = predictor.model_artifacts.scaler("AAPL", 1)
+        assert saved == ctx.scaler.to_dict()
+
+        # A restarted server continues from the saved state, without refitting
+        restarted = make_scaling_predictor(tmp_dir)
+        state = restarted.scaler_engine.latest("AAPL", 1, history)
+        assert state.to_dict() == saved
+        assert restarted.predict_next_day("AAPL")["model_version"] == "AAPL/v1"
+
+
+def test_serving_path_skips_sklearn():
+    """Predictions with a ticker model or the naive fallback never import scikit-learn"""
+    code = f"""
+import sys, tempfile
+sys.path.insert(0, {HERE!r})
+from test_scaling import make_scaling_predictor, publish_model
+predictor = make_scaling_predictor(tempfile.mkdtemp())
+publish_model(predictor, "MSFT", trained_bars=200)
+assert predictor.predict_next_day("MSFT")["success"]
+assert predictor.predict_next_day("TSLA")["success"]
+print("sklearn" in sys.modules)
+"""
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, cwd=HERE, timeout=300)
+    assert output.returncode == 0, output.stderr
+    assert output.stdout.strip().splitlines()[-1] == "False"
+
+
+def test_metadata_lands_before_the_model():
+    """publish() puts the metadata (training scaler) and NumPy export in place before the .h5 makes the version visible"""
+    import model_registry
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        artifacts = ModelArtifacts(os.path.join(tmp_dir, "models"))
+        staging_path = artifacts.staging_path("AAPL")
+        open(staging_path, "w").close()
+        open(npz_path_for(staging_path), "w").close()
+        replaced = []
+        original_replace = model_registry.os.replace
+
+        def recording_replace(src, dst):
+            replaced.append(os.path.basename(dst))
+            return original_replace(src, dst)
+
+        model_registry.os.replace = recording_replace
+        try:
+            artifacts.publish("AAPL", staging_path, metadata={"scaler": MinMaxState.fit([1.0, 2.0]).to_dict()})
+        finally:
+            model_registry.os.replace = original_replace
+        # The NumPy export too, or a reader in between would load (and cache) the model through Keras
+        assert replaced == ["v0001.json", "v0001.npz", "v0001.h5"], replaced
+        assert artifacts.metadata("AAPL", 1)["scaler"]["data_max"] == 2.0
+
+
+def main():
+    """Run the checks"""
+    try:
+        test_matches_sklearn()
+        test_incremental_updates()
+        test_serving_uses_persisted_training_scaler()
+        test_serving_path_skips_sklearn()
+        test_metadata_lands_before_the_model()
+        print("✅ Per-ticker scalers match training, update incrementally and need no scikit-learn")
+    except AssertionError as e:
+        print(f"❌ Scaler check failed: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
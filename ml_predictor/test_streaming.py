@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Check streamed batch predictions (offline, mock data)
+"""
+
+import os
+import sys
+import json
+import time
+import tempfile
+import threading
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from mock_data_provider import MockStockDataProvider
+from prediction_cache import PredictionCache
+from testing_helpers import make_predictor
+
+
+class SlowProvider(MockStockDataProvider):
+    """Mock provider with a per-ticker download delay that records which tickers were fetched"""
+    def __init__(self, delays, seed=9):
+        super().__init__(seed=seed)
+        self.delays = delays
+        self.downloaded = []
+        self._lock = threading.Lock()
+
+    def download(self, ticker, start_date, end_date):
+        time.sleep(self.delays.get(ticker, 0))
+        with self._lock:
+            self.downloaded.append(ticker)
+        return super().download(ticker, start_date, end_date)
+
+
+def make_streaming_predictor(tmp_dir, provider):
+    return make_predictor(tmp_dir, provider, prediction_cache=PredictionCache(ttl=60))
+
+
+def test_cached_first_then_as_completed():
+    """Cache hits come out before any computed result, and a fast ticker does not wait for a slow one"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        predictor = make_streaming_predictor(tmp_dir, SlowProvider({"SLOW": 0.5}))
+        predictor.predict_many(["AAPL", "MSFT"])  # cached from here on
+
+        results = list(predictor.predict_stream(["SLOW", "aapl", "FAST", "MSFT", "AAPL"], max_workers=4))
+        assert [r["ticker"] for r in results] == ["AAPL", "MSFT", "FAST", "SLOW"]
+        assert [r["cache_status"] for r in results] == ["HIT", "HIT", "MISS", "MISS"]
+        assert all(r["success"] for r in results)
+
+
+def test_heartbeat_and_close_cancels_pending():
+    """Idle periods yield None; closing the stream cancels tickers that have not started"""
+    tickers = [f"T{i}" for i in range(6)]
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        provider = SlowProvider({ticker: 0.3 for ticker in tickers})
+        predictor = make_streaming_predictor(tmp_dir, provider)
+
+        stream = predictor.predict_stream(tickers, max_workers=1, heartbeat=0.05)
+        assert next(stream) is None
+        first = next(item for item in stream if item is not None)
+        assert first["ticker"] == "T0"
+        stream.close()
+
+        time.sleep(0.8)
+        # T1 may already have started when the stream closed; nothing after it runs
+        assert provider.downloaded in (["T0"], ["T0", "T1"]), provider.downloaded
+
+
+def test_stream_endpoint():
+    """GET /predict/stream sends one prediction event per ticker and a closing summary"""
+    import api_server
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        predictor = make_streaming_predictor(tmp_dir, SlowProvider({}))
+        predictor.predict_next_day("GOOGL")
+
+        api_server._predictor = predictor
+        try:
+            client = api_server.app.test_client()
+            assert client.get("/predict/stream").status_code == 400
+
+            response = client.get("/predict/stream?tickers=AAPL,googl,ZZZ")
+            assert response.status_code == 200
+            assert response.mimetype == "text/event-stream"
+            events = []
+            for block in response.get_data(as_text=True).strip().split("\n\n"):
+                fields = dict(line.split(": ", 1) for line in block.splitlines())
+                events.append((fields["event"], fields.get("id"), json.loads(fields["data"])))
+        finally:
+            api_server._predictor = None
+
+        assert [event for event, _, _ in events] == ["prediction"] * 3 + ["done"]
+        assert events[0][1] == "GOOGL" and events[0][2]["cache_status"] == "HIT"
+        assert {ticker for _, ticker, _ in events[:3]} == {"AAPL", "GOOGL", "ZZZ"}
+        assert events[-1][2] == {"count": 3, "succeeded": 3, "failed": 0, "cache_hits": 1}
+
+
+def main():
+    """Run the checks"""
+    try:
+        test_cached_first_then_as_completed()
+        test_heartbeat_and_close_cancels_pending()
+        test_stream_endpoint()
+        print("✅ Streamed predictions arrive cached-first and stop when the stream closes")
+    except AssertionError as e:
+        print(f"❌ Streaming check failed: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Check that batch training resumes from its progress file (offline, no TensorFlow)
+"""
+
+import os
+import sys
+import tempfile
+import threading
+from unittest import mock
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import train_models
+
+
+class InlinePool(ThreadPoolExecutor):
+    """Stands in for the spawn process pool: runs jobs on threads and skips the TensorFlow worker setup"""
+    def __init__(self, max_workers=None, mp_context=None, initializer=None, initargs=()):
+        super().__init__(max_workers=max_workers)
+
+
+class StubTrainer:
+    """Stand-in for _train_one that records calls and fails the tickers in `failing` once"""
+    def __init__(self, failing=(), crashing=()):
+        self.failing = set(failing)
+        self.crashing = set(crashing)
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def __call__(self, ticker, look_back):
+        with self._lock:
+            self.calls.append(ticker)
+        if ticker in self.crashing:
+            self.crashing.discard(ticker)
+            raise RuntimeError("worker process died")
+        if ticker in self.failing:
+            self.failing.discard(ticker)
+            return {"status": "failed", "error": "No market data available", "seconds": 0.1}
+        return {"status": "completed", "version": 1, "seconds": 0.1, "epochs": 3, "loss": 0.01, "val_loss": 0.02}
+
+
+def run(tmp_dir, tickers, trainer, **options):
+    with mock.patch.object(train_models, "_train_one", trainer), \
+         mock.patch.object(train_models, "ProcessPoolExecutor", InlinePool), \
+         mock.patch.dict(os.environ):
+        return train_models.train_tickers(tickers, workers=2, models_dir=os.path.join(tmp_dir, "models"),
+                                          data_dir=os.path.join(tmp_dir, "market_data"), **options)
+
+
+def test_rerun_skips_finished_and_retries_failed():
+    """A re-run trains only tickers that failed or never finished; --restart trains all of them again"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        first = StubTrainer(failing={"MSFT"}, crashing={"TSLA"})
+        progress = run(tmp_dir, ["aapl", "MSFT", "TSLA", "AAPL"], first)
+        assert sorted(first.calls) == ["AAPL", "MSFT", "TSLA"]
+        assert progress["AAPL"]["status"] == "completed"
+        assert (progress["MSFT"]["status"], progress["MSFT"]["error"]) == ("failed", "No market data available")
+        assert progress["TSLA"]["status"] == "failed" and "worker process died" in progress["TSLA"]["error"]
+
+        # The progress file, not the returned dict, carries state into the next run
+        stored = train_models.load_progress(os.path.join(tmp_dir, "models", "training_progress.json"))
+        assert stored == progress
+
+        second = StubTrainer()
+        progress = run(tmp_dir, ["AAPL", "MSFT", "TSLA", "GOOGL"], second)
+        assert sorted(second.calls) == ["GOOGL", "MSFT", "TSLA"]
+        assert all(entry["status"] == "completed" for entry in progress.values())
+
+        third = StubTrainer()
+        run(tmp_dir, ["AAPL", "MSFT"], third)
+        assert third.calls == []
+
+        run(tmp_dir, ["AAPL", "MSFT"], third, restart=True)
+        assert sorted(third.calls) == ["AAPL", "MSFT"]
+
+
+def main():
+    """Run the checks"""
+    try:
+        test_rerun_skips_finished_and_retries_failed()
+        print("✅ Batch training resumes, skipping finished tickers and retrying failed ones")
+    except AssertionError as e:
+        print(f"❌ Batch training check failed: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
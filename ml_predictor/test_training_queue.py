@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Check the background training queue and model hot-swap (offline, no TensorFlow)
+"""
+
+import os
+import sys
+import time
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from training_queue import TrainingQueue
+from testing_helpers import make_predictor
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_jobs_are_deduplicated_per_ticker():
+    """A ticker already queued or training gets its existing job id back"""
+    release = threading.Event()
+    trained = []
+
+    def train(ticker):
+        release.wait(5)
+        trained.append(ticker)
+        return 1
+
+    training = TrainingQueue(train)
+    first = training.submit("aapl")
+    assert training.submit("AAPL") == first
+    other = training.submit("MSFT")
+    assert other != first
+    release.set()
+    training.join()
+
+    assert sorted(trained) == ["AAPL", "MSFT"]
+    assert training.get(first)["status"] == "completed" and training.get(first)["version"] == 1
+    assert training.submit("AAPL") != first  # finished jobs are not reused
+
+
+def test_failed_ticker_backs_off():
+    """A failed ticker is not retried until retry_after has passed, unless forced"""
+    clock = FakeClock()
+    calls = []
+
+    def train(ticker):
+        calls.append(ticker)
+        raise RuntimeError("No market data available")
+
+    training = TrainingQueue(train, retry_after=60, clock=clock)
+    failed = training.submit("AAPL")
+    training.join()
+    assert training.get(failed)["status"] == "failed"
+
+    assert training.submit("AAPL") == failed
+    clock.now += 59
+    assert training.submit("AAPL") == failed
+    assert len(calls) == 1
+
+    forced = training.submit("AAPL", force=True)
+    training.join()
+    assert forced != failed and len(calls) == 2
+
+    clock.now += 60
+    assert training.submit("AAPL") not in (failed, forced)
+    training.join()
+    assert len(calls) == 3
+
+
+def test_finished_jobs_are_capped():
+    """Only the newest max_finished finished jobs are kept"""
+    training = TrainingQueue(lambda ticker: 1, max_finished=3)
+    job_ids = []
+    for ticker in ["A", "B", "C", "D", "E"]:
+        job_ids.append(training.submit(ticker))
+        training.join()
+
+    assert [job["job_id"] for job in training.jobs()] == job_ids[-3:]
+    assert training.get(job_ids[0]) is None
+
+
+class UnavailableProvider:
+    """Provider whose downloads always fail, so requests fall back to mock data"""
+    is_remote = False
+
+    def download(self, ticker, start_date, end_date):
+        raise ConnectionError("connection refused by test fixture")
+
+
+def test_mock_data_does_not_queue_training():
+    """Requests answered from mock data never queue a (doomed) training job"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        predictor = make_predictor(tmp_dir, UnavailableProvider(), shared_model=False, train_in_background=True)
+        predictor.retry_base_delay = 0
+        result = predictor.predict_next_day("AAPL")
+        assert result["success"] and result["using_mock_data"]
+        assert result["training_job_id"] is None
+        assert predictor.training_queue.jobs() == []
+
+
+def publish_placeholder(predictor, ticker):
+    staging_path = predictor.model_artifacts.staging_path(ticker)
+    open(staging_path, "w").close()
+    return predictor.model_artifacts.publish(ticker, staging_path)[0]
+
+
+def test_trained_model_is_hot_swapped():
+    """Requests are served by the fallback until training publishes, then by the new version without a restart"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        predictor = make_predictor(tmp_dir, shared_model=False, train_in_background=True)
+
+        predictor.training_queue = TrainingQueue(lambda ticker: publish_placeholder(predictor, ticker))
+        first = predictor.predict_next_day("AAPL")
+        assert first["model_version"] == "naive" and first["training_job_id"]
+        predictor.training_queue.join()
+        assert predictor.training_queue.get(first["training_job_id"])["version"] == 1
+
+        second = predictor.predict_next_day("AAPL")
+        assert second["model_version"] == "AAPL/v1"
+        assert second["training_job_id"] is None
+
+
+def test_workers_do_not_train_the_same_ticker_twice():
+    """Predictors sharing a models directory (as gunicorn workers do) train a ticker once between them"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        workers = [make_predictor(tmp_dir, shared_model=False) for _ in range(2)]
+        barrier = threading.Barrier(len(workers))
+        trained = []
+
+        def slow_train(predictor):
+            def train(ticker, look_back):
+                trained.append(ticker)
+                time.sleep(0.3)
+                return publish_placeholder(predictor, ticker)
+            return train
+
+        for predictor in workers:
+            predictor._train_and_publish = slow_train(predictor)
+
+        def run(predictor):
+            barrier.wait()
+            return predictor.train_ticker_model("AAPL")
+
+        with ThreadPoolExecutor(max_workers=len(workers)) as pool:
+            versions = list(pool.map(run, workers))
+        assert versions == [1, 1]
+        assert trained == ["AAPL"]
+
+
+def test_training_endpoint():
+    """POST /training validates like /predict/batch and answers errors as JSON"""
+    import api_server
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        predictor = make_predictor(tmp_dir, shared_model=False)
+        predictor.training_queue = TrainingQueue(lambda ticker: publish_placeholder(predictor, ticker))
+        api_server._predictor = predictor
+        try:
+            client = api_server.app.test_client()
+            for body in ({"data": "not json"}, {"json": {}}, {"json": {"tickers": [" "]}},
+                         {"json": {"tickers": ["T"] * (api_server.MAX_BATCH_TICKERS + 1)}}):
+                response = client.post("/training", **body)
+                assert response.status_code == 400 and response.get_json()["success"] is False, body
+
+            single = client.post("/training", json={"ticker": "aapl"})
+            assert single.status_code == 202 and single.get_json()["job"]["ticker"] == "AAPL"
+            batch = client.post("/training", json={"tickers": ["MSFT", "msft", "TSLA"]})
+            assert [job["ticker"] for job in batch.get_json()["jobs"]] == ["MSFT", "TSLA"]
+            predictor.training_queue.join()
+
+            def broken(ticker, force=False):
+                raise RuntimeError("queue unavailable")
+
+            predictor.training_queue.submit = broken
+            failed = client.post("/training", json={"ticker": "AAPL"})
+            assert failed.status_code == 500 and "queue unavailable" in failed.get_json()["error"]
+        finally:
+            api_server._predictor = None
+
+
+def main():
+    """Run the checks"""
+    try:
+        test_jobs_are_deduplicated_per_ticker()
+        test_failed_ticker_backs_off()
+        test_finished_jobs_are_capped()
+        test_mock_data_does_not_queue_training()
+        test_trained_model_is_hot_swapped()
+        test_workers_do_not_train_the_same_ticker_twice()
+        test_training_endpoint()
+        print("✅ Training queue deduplicates, backs off, prunes and hot-swaps models")
+    except AssertionError as e:
+        print(f"❌ Training queue check failed: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Check the sliding-window dataset builder against the original per-sample loop
+"""
+
+import os
+import sys
+import tempfile
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from data_store import OHLCVStore
+from mock_data_provider import MockStockDataProvider
+from windowing import WindowDataset, sliding_windows
+
+
+def loop_windows(series, look_back):
+    """Reference: the list-append loop previously used for training data"""
+    X, y = [], []
+    for i in range(look_back, len(series)):
+        X.append(series[i-look_back:i])
+        y.append(series[i])
+    return np.array(X).reshape(-1, look_back, 1), np.array(y)
+
+
+def test_sliding_windows_are_views(look_back=60):
+    """Windows match the loop output and share memory with the series"""
+    series = np.random.default_rng(0).random((500, 1))
+    X, y = sliding_windows(series, look_back)
+    expected_X, expected_y = loop_windows(series[:, 0], look_back)
+
+    assert X.shape == (500 - look_back, look_back, 1)
+    assert np.shares_memory(X, series)
+    np.testing.assert_array_equal(X, expected_X)
+    np.testing.assert_array_equal(y, expected_y)
+
+
+def test_multi_ticker_batches(look_back=20):
+    """Batches cover every window once and never mix two tickers in one window"""
+    rng = np.random.default_rng(1)
+    series_list = [rng.random(n) * (i + 1) * 100 for i, n in enumerate([120, 21, 300])]
+    dataset = WindowDataset(series_list, look_back)
+    assert len(dataset) == sum(len(s) - look_back for s in series_list)
+
+    expected = []
+    for series in series_list:
+        scaled = (series - series.min()) / (series.max() - series.min())
+        expected.append(loop_windows(scaled, look_back))
+    expected_X = np.concatenate([X for X, _ in expected])
+    expected_y = np.concatenate([y for _, y in expected])
+
+    X, y = dataset.arrays()
+    np.testing.assert_allclose(X, expected_X, rtol=1e-6, atol=1e-6)
+    np.testing.assert_allclose(y, expected_y, rtol=1e-6, atol=1e-6)
+
+    # Shuffled streaming yields the same windows in a different order
+    batches = list(dataset.batches(batch_size=64, shuffle=True, seed=7))
+    assert max(len(batch_y) for _, batch_y in batches) == 64
+    streamed_y = np.concatenate([batch_y for _, batch_y in batches])
+    np.testing.assert_allclose(np.sort(streamed_y), np.sort(expected_y), rtol=1e-6, atol=1e-6)
+
+
+def test_windows_from_store(look_back=60):
+    """Store-backed windows read the memory-mapped history directly"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        store = OHLCVStore(tmp_dir)
+        provider = MockStockDataProvider(seed=5)
+        for ticker in ['AAPL', 'MSFT']:
+            store.append(ticker, provider.generate_mock_data(ticker, 400))
+
+        dataset = WindowDataset.from_store(store, ['AAPL', 'MSFT', 'MISSING'], look_back)
+        assert dataset.tickers == ['AAPL', 'MSFT']
+        # Windows are read-only views onto the mapped file, not copies
+        windows = dataset.windows[0][0]
+        assert not windows.flags.owndata and not windows.flags.writeable
+        base = windows
+        while base.base is not None and not isinstance(base, np.memmap):
+            base = base.base
+        assert isinstance(base, np.memmap)
+
+        closes = store.read('MSFT')['Close'].to_numpy()
+        scaled = (closes - closes.min()) / (closes.max() - closes.min())
+        expected_X, expected_y = loop_windows(scaled, look_back)
+        X, y = dataset._gather(np.arange(dataset.offsets[1], dataset.offsets[2]))
+        np.testing.assert_allclose(X, expected_X, rtol=1e-6, atol=1e-6)
+        np.testing.assert_allclose(y, expected_y, rtol=1e-6, atol=1e-6)
+        del dataset, windows, base, X
+
+
+def main():
+    """Run the checks"""
+    try:
+        test_sliding_windows_are_views()
+        test_multi_ticker_batches()
+        test_windows_from_store()
+        print("✅ Sliding-window datasets match the per-sample loop")
+    except AssertionError as e:
+        print(f"❌ Window mismatch: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+Stand-in models and predictor wiring shared by the offline test scripts
+"""
+
+import os
+
+from stock_predictor_api import StockPredictorAPI
+from mock_data_provider import MockStockDataProvider
+from data_store import OHLCVStore
+from model_registry import ModelRegistry, ModelArtifacts
+from prediction_cache import PredictionCache
+
+
+class MeanModel:
+    """Stand-in model that predicts the window mean and counts forward passes"""
+    def __init__(self):
+        self.calls = 0
+
+    def predict(self, X, verbose=0):
+        self.calls += 1
+        return X.mean(axis=1)
+
+
+def make_predictor(tmp_dir, provider=None, model=None, shared_model=True, **options):
+    """Predictor on a temp store and model directory that loads `model` (a MeanModel by default) for every artifact
+
+    With shared_model, a placeholder shared model file is created so tickers
+    without their own model are served by `model` rather than the naive
+    fallback. Other keyword arguments go to StockPredictorAPI; by default
+    training stays in the foreground, nothing is cached and predictions are
+    not micro-batched.
+    """
+    model = model if model is not None else MeanModel()
+    options.setdefault("train_in_background", False)
+    options.setdefault("prediction_cache", PredictionCache(ttl=0))
+    options.setdefault("micro_batcher", None)
+    predictor = StockPredictorAPI(
+        provider=provider if provider is not None else MockStockDataProvider(),
+        data_store=OHLCVStore(os.path.join(tmp_dir, "market_data")),
+        model_registry=ModelRegistry(loader=lambda path: model),
+        model_artifacts=ModelArtifacts(os.path.join(tmp_dir, "models")),
+        **options,
+    )
+    if shared_model:
+        model_path = os.path.join(tmp_dir, "model.h5")
+        open(model_path, "w").close()
+        predictor.model_path = model_path
+    return predictor
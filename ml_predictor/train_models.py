@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Train per-ticker models for a watchlist in parallel
+
+Each ticker is trained in its own worker process with a capped number of
+TensorFlow threads, and published as a new version under models/<TICKER>/.
+Progress is written to a JSON file after every ticker, so an interrupted run
+picks up where it stopped.
+
+Usage:
+    python train_models.py AAPL MSFT GOOGL [--workers 4] [--threads-per-worker 1]
+    python train_models.py --tickers-file watchlist.txt [--restart] [--json]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import datetime as dt
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(HERE)
+
+# Set in each worker process by _init_worker
+_worker_predictor = None
+
+
+def _init_worker(threads, models_dir, data_dir, rate_limit_timeout):
+    """Cap TensorFlow/BLAS threads before TensorFlow is imported, then build the worker's predictor"""
+    global _worker_predictor
+    for name in ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS", "TF_NUM_INTRAOP_THREADS"):
+        os.environ[name] = str(threads)
+    os.environ["TF_NUM_INTEROP_THREADS"] = "1"
+    os.environ.setdefault("TF_CPP_MIN_LOG_LEVEL", "2")
+
+    import tensorflow as tf
+    tf.config.threading.set_intra_op_parallelism_threads(threads)
+    tf.config.threading.set_inter_op_parallelism_threads(1)
+
+    from stock_predictor_api import StockPredictorAPI
+    from data_store import OHLCVStore
+    from model_registry import ModelArtifacts, ModelRegistry
+    _worker_predictor = StockPredictorAPI(
+        data_store=OHLCVStore(data_dir),
+        model_artifacts=ModelArtifacts(models_dir),
+        # Trained models are not served from the worker; keep none in memory
+        model_registry=ModelRegistry(max_models=1),
+        train_in_background=False,
+        rate_limit_timeout=rate_limit_timeout,
+    )
+
+
+def _train_one(ticker, look_back):
+    """Train and publish one ticker in a worker; returns its progress entry"""
+    started = time.time()
+    try:
+        version = _worker_predictor.train_ticker_model(ticker, look_back)
+    except Exception as e:
+        return {"status": "failed", "error": str(e), "seconds": round(time.time() - started, 2)}
+
+    info = _worker_predictor.model_artifacts.metadata(ticker, version)
+    return {
+        "status": "completed",
+        "version": version,
+        "seconds": round(time.time() - started, 2),
+        "epochs": info.get("epochs"),
+        "loss": info.get("loss"),
+        "val_loss": info.get("val_loss"),
+        "training_days": info.get("training_days"),
+    }
+
+
+def load_progress(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_progress(path, progress):
+    """Write the progress file atomically so an interrupted run never leaves it half-written"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(progress, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def train_tickers(tickers, workers=None, threads_per_worker=1, look_back=60,
+                  models_dir="models", data_dir="market_data", progress_path=None,
+                  restart=False, rate_limit_timeout=120.0):
+    """Train every ticker not already completed in the progress file; returns the progress dict"""
+    progress_path = progress_path or os.path.join(models_dir, "training_progress.json")
+    os.makedirs(models_dir, exist_ok=True)
+    progress = {} if restart else load_progress(progress_path)
+
+    tickers = list(dict.fromkeys(t.upper() for t in tickers))
+    pending = [t for t in tickers if progress.get(t, {}).get("status") != "completed"]
+    skipped = len(tickers) - len(pending)
+    if skipped:
+        print(f"✓ Resuming: {skipped} ticker(s) already trained, {len(pending)} to go")
+    if not pending:
+        return progress
+
+    workers = workers or max(1, (os.cpu_count() or 1) // threads_per_worker)
+    workers = min(workers, len(pending))
+    # Worker processes share one Yahoo Finance budget instead of one each
+    os.environ.setdefault("ML_RATE_LIMIT_BACKEND", "sqlite")
+
+    print(f"Training {len(pending)} ticker(s) on {workers} worker(s) × {threads_per_worker} thread(s)")
+    # spawn: workers start clean rather than forking a parent that may hold TensorFlow state
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker,
+                             initargs=(threads_per_worker, models_dir, data_dir, rate_limit_timeout)) as pool:
+        futures = {pool.submit(_train_one, ticker, look_back): ticker for ticker in pending}
+        for future in as_completed(futures):
+            ticker = futures[future]
+            try:
+                entry = future.result()
+            except Exception as e:  # e.g. a worker process died
+                entry = {"status": "failed", "error": str(e)}
+            entry["finished_at"] = dt.datetime.now().isoformat(timespec="seconds")
+            progress[ticker] = entry
+            save_progress(progress_path, progress)
+            print(format_entry(ticker, entry))
+
+    return progress
+
+
+def format_entry(ticker, entry):
+    if entry["status"] != "completed":
+        return f"❌ {ticker:<8} failed after {entry.get('seconds', 0):.1f}s: {entry.get('error')}"
+    loss = f"{entry['loss']:.6f}" if entry.get("loss") is not None else "n/a"
+    val_loss = f"{entry['val_loss']:.6f}" if entry.get("val_loss") is not None else "n/a"
+    return (f"✅ {ticker:<8} v{entry['version']:04d} in {entry['seconds']:.1f}s "
+            f"({entry.get('epochs')} epochs, loss {loss}, val_loss {val_loss})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train per-ticker models in parallel")
+    parser.add_argument("tickers", nargs="*", help="Tickers to train")
+    parser.add_argument("--tickers-file", help="File with one ticker per line")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPUs / threads per worker)")
+    parser.add_argument("--threads-per-worker", type=int, default=1, help="TensorFlow threads per worker")
+    parser.add_argument("--look-back", type=int, default=60, help="Days of history per sample")
+    parser.add_argument("--models-dir", default="models", help="Versioned model artifacts directory")
+    parser.add_argument("--data-dir", default="market_data", help="Local OHLCV store directory")
+    parser.add_argument("--progress", default=None, help="Progress file (default: <models-dir>/training_progress.json)")
+    parser.add_argument("--restart", action="store_true", help="Ignore previous progress and retrain every ticker")
+    parser.add_argument("--rate-limit-timeout", type=float, default=120.0,
+                        help="Seconds a worker may wait for a Yahoo Finance rate-limit token")
+    parser.add_argument("--json", action="store_true", help="Print the final progress as JSON")
+    args = parser.parse_args()
+
+    tickers = list(args.tickers)
+    if args.tickers_file:
+        with open(args.tickers_file) as f:
+            tickers += [line.strip() for line in f if line.strip() and not line.startswith("#")]
+    if not tickers:
+        parser.error("no tickers given")
+
+    started = time.time()
+    progress = train_tickers(
+        tickers, workers=args.workers, threads_per_worker=args.threads_per_worker,
+        look_back=args.look_back, models_dir=args.models_dir, data_dir=args.data_dir,
+        progress_path=args.progress, restart=args.restart, rate_limit_timeout=args.rate_limit_timeout,
+    )
+
+    if args.json:
+        print(json.dumps(progress, indent=2))
+        return
+
+    requested = {t.upper() for t in tickers}
+    completed = sum(1 for t, e in progress.items() if t in requested and e["status"] == "completed")
+    print("=" * 60)
+    print(f"Trained {completed}/{len(requested)} ticker(s) in {time.time() - started:.1f}s")
+    if completed < len(requested):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+import time
+import queue
+import threading
+import traceback
+import uuid
+import datetime as dt
+
+
+class TrainingQueue:
+    """Background worker queue for model training jobs
+
+    Jobs are deduplicated per ticker: submitting a ticker that is already
+    queued or training returns the existing job id. A ticker whose last job
+    failed is not retried for retry_after seconds (the failed job id is
+    returned instead) unless force=True. Only the newest max_finished
+    finished jobs are kept for status lookups.
+    """
+    def __init__(self, train_fn, num_workers=1, retry_after=900, max_finished=200, clock=time.monotonic):
+        self.train_fn = train_fn
+        self.num_workers = num_workers
+        self.retry_after = retry_after
+        self.max_finished = max_finished
+        self.clock = clock
+        self._queue = queue.Queue()
+        self._jobs = {}
+        self._active_by_ticker = {}
+        self._failed_by_ticker = {}  # ticker -> (failed at, job id)
+        self._lock = threading.Lock()
+        self._workers = []
+
+    def _ensure_workers(self):
+        # Started lazily so importing or constructing the queue never spawns threads
+        if self._workers:
+            return
+        for i in range(self.num_workers):
+            worker = threading.Thread(target=self._run, name=f"training-worker-{i}", daemon=True)
+            worker.start()
+            self._workers.append(worker)
+
+    def submit(self, ticker, force=False):
+        """Queue a training job for ticker and return its job id"""
+        ticker = ticker.upper()
+        with self._lock:
+            job_id = self._active_by_ticker.get(ticker)
+            if job_id is not None:
+                return job_id
+            failed = self._failed_by_ticker.get(ticker)
+            if failed is not None and not force and self.clock() - failed[0] < self.retry_after:
+                return failed[1]
+
+            job_id = uuid.uuid4().hex[:12]
+            self._jobs[job_id] = {
+                "job_id": job_id,
+                "ticker": ticker,
+                "status": "queued",
+                "submitted_at": dt.datetime.now().isoformat(timespec="seconds"),
+                "started_at": None,
+                "finished_at": None,
+                "version": None,
+                "error": None,
+            }
+            self._active_by_ticker[ticker] = job_id
+            self._ensure_workers()
+
+        self._queue.put(job_id)
+        return job_id
+
+    def get(self, job_id):
+        """Return a copy of a job's status, or None if unknown"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def jobs(self):
+        """Copies of all known jobs"""
+        with self._lock:
+            return [dict(job) for job in self._jobs.values()]
+
+    def join(self):
+        """Block until every queued job has finished"""
+        self._queue.join()
+
+    def _run(self):
+        while True:
+            job_id = self._queue.get()
+            with self._lock:
+                job = self._jobs[job_id]
+                job["status"] = "running"
+                job["started_at"] = dt.datetime.now().isoformat(timespec="seconds")
+                ticker = job["ticker"]
+
+            try:
+                version = self.train_fn(ticker)
+                update = {"status": "completed", "version": version}
+            except Exception as e:
+                traceback.print_exc()
+                update = {"status": "failed", "error": str(e)}
+
+            with self._lock:
+                job.update(update)
+                job["finished_at"] = dt.datetime.now().isoformat(timespec="seconds")
+                self._active_by_ticker.pop(ticker, None)
+                if job["status"] == "failed":
+                    self._failed_by_ticker[ticker] = (self.clock(), job_id)
+                else:
+                    self._failed_by_ticker.pop(ticker, None)
+                self._prune()
+            self._queue.task_done()
+
+    def _prune(self):
+        # Jobs are kept in submission order, so the oldest finished ones go first
+        finished = [job_id for job_id, job in self._jobs.items() if job["finished_at"] is not None]
+        for job_id in finished[:max(0, len(finished) - self.max_finished)]:
+            del self._jobs[job_id]
+        now = self.clock()
+        for ticker, (failed_at, _) in list(self._failed_by_ticker.items()):
+            if now - failed_at >= self.retry_after:
+                del self._failed_by_ticker[ticker]
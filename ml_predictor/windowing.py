@@ -0,0 +1,91 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+def sliding_windows(series, look_back, target=0):
+    """(X, y) training pairs as views of series: X[i] = series[i:i+look_back], y[i] = series[i+look_back]
+
+    series is (T,) or (T, features). X is (T - look_back, look_back, features)
+    and shares memory with series, so no per-sample copies are made; y is the
+    target feature of the following bar.
+    """
+    series = np.asarray(series)
+    if series.ndim == 1:
+        series = series[:, None]
+    if len(series) <= look_back:
+        return np.empty((0, look_back, series.shape[1]), series.dtype), np.empty(0, series.dtype)
+
+    # (samples, features, look_back) -> (samples, look_back, features), still a view
+    X = sliding_window_view(series[:-1], look_back, axis=0).transpose(0, 2, 1)
+    y = series[look_back:, target]
+    return X, y
+
+
+class WindowDataset:
+    """Training windows over several tickers' histories without copying them
+
+    Each ticker's series (in memory or a memory-mapped store column) is windowed
+    as a strided view, so windows never cross a ticker boundary. Min-max scaling
+    is applied per ticker as each batch is materialised; batches() therefore
+    holds O(batch_size * look_back) values in memory regardless of history size.
+    """
+    def __init__(self, series_list, look_back, tickers=None, scale=True, target=0):
+        self.look_back = look_back
+        self.tickers = list(tickers) if tickers is not None else [str(i) for i in range(len(series_list))]
+        self.windows = []
+        self.scalers = []  # per-ticker (min, max) of the series
+        for series in series_list:
+            X, y = sliding_windows(series, look_back, target)
+            self.windows.append((X, y))
+            if scale and len(series):
+                self.scalers.append((np.min(series, axis=0), np.max(series, axis=0)))
+            else:
+                self.scalers.append(None)
+        counts = [len(y) for _, y in self.windows]
+        self.offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+        self.target = target
+
+    @classmethod
+    def from_store(cls, store, tickers, look_back, start=None, end=None, column='Close', **kwargs):
+        """Windows over the stored histories of tickers, read through the store's memory maps"""
+        tickers = [t for t in tickers if store.has(t)]
+        series_list = [store.column(t, column, start, end) for t in tickers]
+        return cls(series_list, look_back, tickers=tickers, **kwargs)
+
+    def __len__(self):
+        return int(self.offsets[-1])
+
+    def _scaled(self, ticker_index, X, y):
+        scaler = self.scalers[ticker_index]
+        X = np.asarray(X, dtype=np.float32)
+        y = np.asarray(y, dtype=np.float32)
+        if scaler is not None:
+            low, high = scaler
+            span = np.where(high > low, high - low, 1.0)
+            X = (X - low) / span
+            y = (y - np.atleast_1d(low)[self.target]) / np.atleast_1d(span)[self.target]
+        return X.astype(np.float32, copy=False), y.astype(np.float32, copy=False)
+
+    def _gather(self, indices):
+        """Materialise (X, y) for global window indices, in the given order"""
+        owners = np.searchsorted(self.offsets, indices, side='right') - 1
+        X = np.empty((len(indices), self.look_back, self.windows[0][0].shape[2]), dtype=np.float32)
+        y = np.empty(len(indices), dtype=np.float32)
+        for ticker_index in np.unique(owners):
+            rows = np.flatnonzero(owners == ticker_index)
+            local = indices[rows] - self.offsets[ticker_index]
+            ticker_X, ticker_y = self.windows[ticker_index]
+            X[rows], y[rows] = self._scaled(ticker_index, ticker_X[local], ticker_y[local])
+        return X, y
+
+    def batches(self, batch_size=256, shuffle=False, seed=None):
+        """Yield (X, y) float32 batches across all tickers"""
+        order = np.arange(len(self), dtype=np.int64)
+        if shuffle:
+            np.random.default_rng(seed).shuffle(order)
+        for start in range(0, len(order), batch_size):
+            yield self._gather(order[start:start + batch_size])
+
+    def arrays(self):
+        """All windows as one (X, y) pair (copies; for histories that fit in memory)"""
+        return self._gather(np.arange(len(self), dtype=np.int64))